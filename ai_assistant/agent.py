@@ -1,17 +1,25 @@
 from llama_index.core import PromptTemplate
 from llama_index.core.agent import ReActAgent
+from llama_index.core.llms import LLM
+from ai_assistant.rags import get_llm
 from ai_assistant.tools import (
     travel_guide_tool,
     flight_tool,
     hotel_tool,
     bus_tool,
     restaurant_tool,
+    itinerary_tool,
     trip_summary_tool
 )
 
 
 class TravelAgent:
-    def __init__(self, system_prompt: PromptTemplate | None = None):
+    def __init__(
+        self,
+        system_prompt: PromptTemplate | None = None,
+        llm: LLM | None = None,
+        verbose: bool = True,
+    ):
         self.agent = ReActAgent.from_tools(
             [
                 travel_guide_tool,
@@ -19,9 +27,11 @@ class TravelAgent:
                 hotel_tool,
                 bus_tool,
                 restaurant_tool,
+                itinerary_tool,
                 trip_summary_tool
             ],
-            verbose=True,
+            llm=llm or get_llm(),
+            verbose=verbose,
         )
         if system_prompt is not None:
             self.agent.update_prompts({"agent_worker:system_prompt": system_prompt})
@@ -1,44 +1,325 @@
-from fastapi import FastAPI, Depends, Query
+import os
+import json
+import uuid
+import asyncio
+from contextlib import asynccontextmanager, AsyncExitStack
+from functools import partial
+from typing import AsyncIterator, Awaitable, Callable, Literal
+from fastapi import FastAPI, Query, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from llama_index.core.agent import ReActAgent
-from ai_assistant.agent import TravelAgent
-from ai_assistant.models import AgentAPIResponse
+from llama_index.core.chat_engine.types import AgentChatResponse
+from llama_index.core.tools import BaseTool
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
+from ai_assistant.cache import get_response_cache, make_key
+from ai_assistant.config import get_agent_settings
+from ai_assistant.metrics import RequestTimings, get_metrics, request_timings, track_request
+from ai_assistant.models import AgentAPIResponse, BatchReservationRequest
+from ai_assistant.prompts import recommendation_prompts
+from ai_assistant.pool import get_agent_pool, AgentPoolExhausted
+from ai_assistant.sessions import get_session_manager
+from ai_assistant.singleflight import get_singleflight
+from ai_assistant.snapshots import get_snapshot_store
+from ai_assistant.reservation_index import get_reservation_index
+from ai_assistant.rags import LazyQueryEngine, city_scope, get_query_embed_model, on_ingest, warm_up
 from ai_assistant.tools import (
     reserve_flight,
     reserve_bus,
     reserve_hotel,
-    reserve_restaurant
+    reserve_restaurant,
+    build_reservations,
+    filtered_trip_summary,
+    parse_date,
+    travel_guide_tool,
+    trip_summary_tool,
 )
+from ai_assistant.utils import save_reservations
 
+SETTINGS = get_agent_settings()
+METRICS = get_metrics()
 
+# Bounds how many agent loops run at once in this worker; requests over the
+# limit wait here (without holding a thread) for up to agent_pool_timeout.
+agent_limiter = asyncio.Semaphore(SETTINGS.max_concurrent_agent_calls)
 
-def get_agent() -> ReActAgent:
-    return TravelAgent().get_agent()
 
+@asynccontextmanager
+async def checkout_agent() -> AsyncIterator[ReActAgent]:
+    try:
+        await asyncio.wait_for(agent_limiter.acquire(), SETTINGS.agent_pool_timeout)
+    except TimeoutError:
+        raise HTTPException(status_code=503, detail="Too many concurrent agent requests.")
+    try:
+        pool = await run_in_threadpool(get_agent_pool)
+        try:
+            agent = await run_in_threadpool(pool.acquire)
+        except AgentPoolExhausted as e:
+            raise HTTPException(status_code=503, detail=str(e))
+        try:
+            yield agent
+        finally:
+            pool.release(agent)
+    finally:
+        agent_limiter.release()
 
-app = FastAPI(title="AI Agent API")
+
+async def run_agent(agent: ReActAgent, prompt: str) -> AgentAPIResponse:
+    try:
+        with METRICS.time("agent"):
+            response = await asyncio.wait_for(agent.achat(prompt), SETTINGS.agent_timeout)
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="The agent did not answer in time.")
+    return AgentAPIResponse(status="OK", agent_response=str(response))
+
+
+def sse_event(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def done_event(timings: RequestTimings | None) -> str:
+    done = {"status": "OK"}
+    if timings is not None:
+        done["timings"] = timings.as_dict()
+    return sse_event("done", done)
+
+
+async def stream_agent(
+    agent: ReActAgent, prompt: str, stack: AsyncExitStack, timings: RequestTimings | None = None
+) -> AsyncIterator[str]:
+    """
+    Server-sent events for one agent run: a `tool` event per tool the ReAct
+    loop called, then `token` events for the final answer, then `done` (with
+    the request's `timings`, if given).
+    """
+    try:
+        async with asyncio.timeout(SETTINGS.agent_timeout):
+            with METRICS.time("agent"):
+                response = await agent.astream_chat(prompt)
+            for source in response.sources:
+                yield sse_event("tool", {"tool": source.tool_name, "input": source.raw_input})
+            if isinstance(response, AgentChatResponse):
+                # return_direct tools give a finished answer; don't fake-stream it word by word
+                yield sse_event("token", response.response)
+            else:
+                async for token in response.async_response_gen():
+                    yield sse_event("token", token)
+        yield done_event(timings)
+    except TimeoutError:
+        yield sse_event("error", {"detail": "The agent did not answer in time."})
+    finally:
+        await stack.aclose()
+
+
+async def respond(prompt: str, stream: bool, session_id: str | None = None, timings: bool = False):
+    # The agent checkout (and the session memory attached to it) lives in an
+    # exit stack: closed once the answer is ready, or, when streaming, by the
+    # stream itself (or by the background task if the client goes away
+    # before the stream starts).
+    breakdown = request_timings.get()  # started by the endpoint
+    stack = AsyncExitStack()
+    agent = await stack.enter_async_context(checkout_agent())
+    if session_id is not None:
+        stack.enter_context(get_session_manager().attach(agent, session_id))
+    if not stream:
+        async with stack:
+            response = await run_agent(agent, prompt)
+        response.session_id = session_id
+        if timings and breakdown is not None:
+            response.timings = breakdown.as_dict()
+        return response
+
+    return StreamingResponse(
+        stream_agent(agent, prompt, stack, breakdown if timings else None),
+        media_type="text/event-stream",
+        background=BackgroundTask(stack.aclose),
+    )
+
+
+async def stream_direct(
+    tool: BaseTool, tool_input: dict, query_engine: LazyQueryEngine, timings: RequestTimings | None = None
+) -> AsyncIterator[str]:
+    """
+    Server-sent events for a direct travel guide answer: the `tool` event,
+    then a `token` event per token as the synthesis LLM produces it, then
+    `done` (with the request's `timings`, if given).
+    """
+    yield sse_event("tool", {"tool": tool.metadata.name, "input": tool_input})
+    try:
+        async with asyncio.timeout(SETTINGS.agent_timeout):
+            with METRICS.time("direct"), METRICS.time(f"tool.{tool.metadata.name}"):
+                async for token in query_engine.astream(tool_input["input"]):
+                    yield sse_event("token", token)
+        yield done_event(timings)
+    except TimeoutError:
+        yield sse_event("error", {"detail": "The agent did not answer in time."})
+
+
+async def respond_direct(tool: BaseTool, tool_input: dict, stream: bool, timings: bool = False):
+    """
+    Answer a structured request by calling the one tool the agent would have
+    picked, without the ReAct loop: no agent checkout and no LLM round-trips
+    to choose the tool, only the tool's own work (one synthesis call for the
+    travel guide, none for the trip summary). Streamed travel guide answers
+    are sent token by token as they are synthesized.
+    """
+    breakdown = request_timings.get() if timings else None
+    query_engine = getattr(tool, "query_engine", None)
+    if stream and isinstance(query_engine, LazyQueryEngine):
+        return StreamingResponse(
+            stream_direct(tool, tool_input, query_engine, breakdown), media_type="text/event-stream"
+        )
+    try:
+        with METRICS.time("direct"):
+            output = await asyncio.wait_for(tool.acall(**tool_input), SETTINGS.agent_timeout)
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="The agent did not answer in time.")
+    if not stream:
+        return AgentAPIResponse(
+            status="OK", agent_response=output.content, timings=breakdown.as_dict() if breakdown else None
+        )
+
+    # the trip summary is computed, not generated: it is ready all at once
+    events = [
+        sse_event("tool", {"tool": tool.metadata.name, "input": tool_input}),
+        sse_event("token", output.content),
+        done_event(breakdown),
+    ]
+    return StreamingResponse(iter(events), media_type="text/event-stream")
+
+
+Mode = Literal["direct", "agent"]
+ReservationType = Literal["TripReservation", "HotelReservation", "RestaurantReservation"]
+
+
+async def coalesce(key: tuple, answer: Callable[[], Awaitable[AgentAPIResponse]], timings: bool) -> AgentAPIResponse:
+    """Run `answer` once for all identical requests in flight; each request gets its own copy of the response."""
+    if not SETTINGS.singleflight_enabled:
+        return await answer()
+    try:
+        response = await get_singleflight().do(key, answer)
+    except TimeoutError:
+        raise HTTPException(status_code=504, detail="The agent did not answer in time.")
+    breakdown = request_timings.get() if timings else None
+    return response.model_copy(update={"timings": breakdown.as_dict() if breakdown else None})
+
+
+async def recommend(
+    endpoint: str,
+    prompt: str,
+    city: str | None,
+    notes: list[str] | None,
+    stream: bool,
+    timings: bool = False,
+    mode: Mode | None = None,
+):
+    """Answer a recommendation from the response cache, falling back to the travel guide or the agent."""
+    # The travel guide lookups for this request only retrieve chunks about `city`.
+    city_scope.set(city)
+    breakdown = track_request()
+    mode = mode or SETTINGS.structured_mode
+    if mode == "direct":
+        answer = partial(respond_direct, travel_guide_tool, {"input": prompt}, stream, timings)
+    else:
+        answer = partial(respond, prompt, stream, timings=timings)
+    if stream:
+        return await answer()
+
+    if not notes and mode == "direct":
+        snapshot = get_snapshot_store().get(endpoint, city)
+        METRICS.inc("snapshot_lookups", result="miss" if snapshot is None else "hit")
+        if snapshot is not None:
+            return AgentAPIResponse(
+                status="OK", agent_response=snapshot, timings=breakdown.as_dict() if timings else None
+            )
+
+    if SETTINGS.response_cache_enabled:
+        with METRICS.time("response_cache"):
+            cached = await run_in_threadpool(get_response_cache().get, endpoint, city, notes, mode)
+        METRICS.inc("response_cache_lookups", result="miss" if cached is None else "hit")
+        if cached is not None:
+            return AgentAPIResponse(
+                status="OK", agent_response=cached, timings=breakdown.as_dict() if timings else None
+            )
+
+    async def answer_and_cache() -> AgentAPIResponse:
+        if not SETTINGS.response_cache_enabled:
+            return await answer()
+        response_cache = get_response_cache()
+        version = await run_in_threadpool(response_cache.version)
+        response = await answer()
+        await run_in_threadpool(response_cache.put, endpoint, city, notes, mode, response.agent_response, version)
+        return response
+
+    return await coalesce(make_key(endpoint, city, notes, mode), answer_and_cache, timings)
+
+
+async def refresh_snapshot():
+    try:
+        if await get_snapshot_store().refresh():
+            print(f"regenerated the recommendation snapshot {SETTINGS.snapshot_path}")
+    except Exception as e:
+        print(f"could not regenerate the recommendation snapshot: {e}")
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # The embedder and travel guide index load lazily on the first guide
+    # query; warming up here moves that cost to startup instead, before any
+    # request is in flight.
+    if SETTINGS.warm_up_on_startup:
+        await run_in_threadpool(warm_up)
+        await run_in_threadpool(get_agent_pool)
+    await run_in_threadpool(get_snapshot_store)
+    refreshes: set[asyncio.Task] = set()
+
+    def start_refresh():
+        # in the background: answers are computed live until it is done
+        task = asyncio.create_task(refresh_snapshot())
+        refreshes.add(task)
+        task.add_done_callback(refreshes.discard)
+
+    if SETTINGS.snapshot_auto_refresh and os.path.exists(SETTINGS.snapshot_path):
+        start_refresh()
+        loop = asyncio.get_running_loop()
+        on_ingest(lambda: loop.call_soon_threadsafe(start_refresh))
+    yield
+    for task in refreshes:
+        task.cancel()
+
+
+app = FastAPI(title="AI Agent API", lifespan=lifespan)
 
 
 # Recommendations
 @app.get("/recommendations/cities")
-def recommend_cities(
-    notes: list[str] = Query(...), agent: ReActAgent = Depends(get_agent)
+async def recommend_cities(
+    notes: list[str] = Query(None), stream: bool = False, timings: bool = False, mode: Mode | None = None
 ):
-    prompt = f"recommend cities in bolivia with the following notes: {notes}"
-    return AgentAPIResponse(status="OK", agent_response=str(agent.chat(prompt)))
+    prompt = recommendation_prompts["cities"].format(notes=notes or "no specific notes")
+    return await recommend("cities", prompt, None, notes, stream, timings, mode)
 
 @app.get("/recommendations/hotels")
-def recommend_hotels(
-    city: str, notes: list[str] = Query(None), agent: ReActAgent = Depends(get_agent)
-    ):
-    prompt = f"recommend hotels in {city} with the following notes: {notes or 'no specific notes'}"
-    return AgentAPIResponse(status="OK", agent_response=str(agent.chat(prompt)))
+async def recommend_hotels(
+    city: str,
+    notes: list[str] = Query(None),
+    stream: bool = False,
+    timings: bool = False,
+    mode: Mode | None = None,
+):
+    prompt = recommendation_prompts["hotels"].format(city=city, notes=notes or "no specific notes")
+    return await recommend("hotels", prompt, city, notes, stream, timings, mode)
 
 @app.get("/recommendations/activities")
-def recommend_activities(
-    city: str, notes: list[str] = Query(None), agent: ReActAgent = Depends(get_agent)
-    ):
-    prompt = f"recommend activities in {city} with the following notes: {notes or 'no specific notes'}"
-    return AgentAPIResponse(status="OK", agent_response=str(agent.chat(prompt)))
+async def recommend_activities(
+    city: str,
+    notes: list[str] = Query(None),
+    stream: bool = False,
+    timings: bool = False,
+    mode: Mode | None = None,
+):
+    prompt = recommendation_prompts["activities"].format(city=city, notes=notes or "no specific notes")
+    return await recommend("activities", prompt, city, notes, stream, timings, mode)
 
 
 # Reservations
@@ -76,8 +357,131 @@ def book_restaurant(reservation_time: str, restaurant: str, city: str, dish: str
     }
 
 
+@app.get("/reservations")
+def list_reservations(
+    reservation_type: ReservationType | None = None,
+    city: str | None = None,
+    start_date: str | None = None,
+    end_date: str | None = None,
+    cursor: str | None = None,
+    limit: int = Query(50, ge=1, le=500),
+):
+    """
+    Reservations matching the filters, a page at a time in date order, with
+    the count and cost of every match; follow `next_cursor` for the next page.
+    """
+    index = get_reservation_index()
+    index.refresh()
+    try:
+        page = index.query(
+            reservation_type,
+            city,
+            parse_date(start_date) if start_date else None,
+            parse_date(end_date) if end_date else None,
+            cursor,
+            limit,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return page._asdict()
+
+
+@app.post("/reservations/batch")
+def book_batch(request: BatchReservationRequest):
+    try:
+        reservations = build_reservations(request.reservations)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    save_reservations(reservations)
+    return {
+        "status": "OK",
+        "reservations": [reservation.dict() for reservation in reservations]
+    }
+
+
 @app.get("/report")
-def generate_trip_report(agent: ReActAgent = Depends(get_agent)):
+async def generate_trip_report(stream: bool = False, timings: bool = False, mode: Mode | None = None):
     prompt = "Generate a detailed trip summary based on the activities recorded in the trip log."
-    response = agent.chat(prompt)
-    return AgentAPIResponse(status="OK", agent_response=str(response))
\ No newline at end of file
+    track_request()
+    mode = mode or SETTINGS.structured_mode
+    if mode == "direct":
+        answer = partial(respond_direct, trip_summary_tool, {}, stream, timings)
+    else:
+        answer = partial(respond, prompt, stream, timings=timings)
+    if stream:
+        return await answer()
+    return await coalesce(("report", mode), answer, timings)
+
+
+@app.get("/report/summary")
+def trip_summary_report(city: str | None = None, start_date: str | None = None, end_date: str | None = None):
+    try:
+        return filtered_trip_summary(city, start_date, end_date).as_dict()
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+# Conversations
+@app.post("/chat")
+async def chat(message: str, session_id: str | None = None, stream: bool = False, timings: bool = False):
+    """Talk to the agent; turns sharing a `session_id` share the conversation memory."""
+    session_id = session_id or uuid.uuid4().hex
+    track_request()
+    response = await respond(message, stream, session_id, timings)
+    if stream:
+        response.headers["X-Session-Id"] = session_id
+    return response
+
+
+@app.delete("/chat/{session_id}")
+def end_chat(session_id: str):
+    get_session_manager().drop(session_id)
+    return {"status": "OK"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Stage latencies, LLM tokens and cache counters, in the Prometheus text format."""
+    gauges = {"sessions": get_session_manager().stats()}
+    # Only report components that are already built; scraping shouldn't load models.
+    if get_agent_pool.cache_info().currsize:
+        gauges["agent_pool"] = get_agent_pool().metrics()
+    if get_response_cache.cache_info().currsize:
+        gauges["response_cache"] = get_response_cache().stats()
+    if get_query_embed_model.cache_info().currsize:
+        gauges["query_embeddings"] = get_query_embed_model().stats()
+    if get_singleflight.cache_info().currsize:
+        gauges["singleflight"] = get_singleflight().stats()
+    if get_snapshot_store.cache_info().currsize:
+        gauges["snapshot"] = get_snapshot_store().stats()
+    return PlainTextResponse(METRICS.render(gauges), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/metrics/agent-pool")
+def agent_pool_metrics():
+    return get_agent_pool().metrics()
+
+
+@app.get("/metrics/response-cache")
+def response_cache_metrics():
+    return get_response_cache().stats()
+
+
+@app.get("/metrics/query-embeddings")
+def query_embedding_metrics():
+    return get_query_embed_model().stats()
+
+
+@app.get("/metrics/sessions")
+def session_metrics():
+    return get_session_manager().stats()
+
+
+@app.get("/metrics/singleflight")
+def singleflight_metrics():
+    return get_singleflight().stats()
+
+
+@app.get("/metrics/snapshot")
+def snapshot_metrics():
+    return get_snapshot_store().stats()
@@ -0,0 +1,192 @@
+import time
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from functools import cache
+from typing import Callable, Hashable
+import numpy as np
+from ai_assistant.config import get_agent_settings
+from ai_assistant.rags import get_query_embed_model, get_travel_guide_rag, on_ingest
+
+SETTINGS = get_agent_settings()
+
+CacheKey = tuple[str, str, str, tuple[str, ...]]
+
+# What synthesis answers when retrieval found nothing; never worth caching.
+EMPTY_RESPONSES = {"", "Empty Response"}
+
+
+def normalize(text: str) -> str:
+    return " ".join(text.casefold().split())
+
+
+def make_key(endpoint: str, city: str | None, notes: list[str] | None, mode: str) -> CacheKey:
+    normalized_notes = sorted({normalize(note) for note in notes or [] if note.strip()})
+    return endpoint, mode, normalize(city or ""), tuple(normalized_notes)
+
+
+@dataclass
+class CacheEntry:
+    response: str
+    expires_at: float
+    embedding: np.ndarray | None = field(default=None, repr=False)
+    version: Hashable = None
+
+
+class ResponseCache:
+    """
+    Two-tier cache for agent recommendations.
+
+    The exact tier is keyed on the normalized (endpoint, mode, city, sorted
+    notes); the agent and the direct travel guide answer differently, so
+    neither mode is served the other's answers. On an exact miss, the
+    semantic tier embeds the notes and reuses an entry for the same
+    endpoint, mode and city whose notes embedding has a cosine
+    similarity of at least `similarity_threshold`. Entries expire after `ttl`
+    seconds and the least recently used one is evicted past `max_entries`.
+
+    Entries are only served while `version()` (the version of the guide
+    store they were answered from) is unchanged, and empty answers are
+    never stored.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl: float,
+        similarity_threshold: float,
+        embed: Callable[[str], list[float]] | None = None,
+        version: Callable[[], Hashable] = lambda: None,
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.similarity_threshold = similarity_threshold
+        self._embed = embed
+        self.version = version
+        self._entries: OrderedDict[CacheKey, CacheEntry] = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {
+            "exact_hits": 0,
+            "semantic_hits": 0,
+            "misses": 0,
+            "evictions": 0,
+            "invalidations": 0,
+            "stale": 0,
+            "skipped": 0,
+        }
+
+    def _embedding(self, key: CacheKey) -> np.ndarray | None:
+        if self._embed is None or not key[3]:
+            return None
+        vector = np.asarray(self._embed("; ".join(key[3])), dtype=np.float32)
+        return vector / (np.linalg.norm(vector) or 1.0)
+
+    def _live(self, key: CacheKey, now: float, version: Hashable) -> CacheEntry | None:
+        entry = self._entries.get(key)
+        if entry is not None and (entry.expires_at <= now or entry.version != version):
+            if entry.version != version:
+                self._stats["stale"] += 1
+            del self._entries[key]
+            return None
+        return entry
+
+    def get(self, endpoint: str, city: str | None, notes: list[str] | None, mode: str) -> str | None:
+        key = make_key(endpoint, city, notes, mode)
+        now = time.monotonic()
+        version = self.version()
+        with self._lock:
+            entry = self._live(key, now, version)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._stats["exact_hits"] += 1
+                return entry.response
+            candidates = [
+                (other, entry)
+                for other, entry in self._entries.items()
+                if other[:3] == key[:3]
+                and entry.embedding is not None
+                and entry.expires_at > now
+                and entry.version == version
+            ]
+
+        if candidates:
+            query = self._embedding(key)
+            if query is not None:
+                scores = np.stack([entry.embedding for _, entry in candidates]) @ query
+                best = int(np.argmax(scores))
+                if scores[best] >= self.similarity_threshold:
+                    other, entry = candidates[best]
+                    with self._lock:
+                        if other in self._entries:
+                            self._entries.move_to_end(other)
+                        self._stats["semantic_hits"] += 1
+                    return entry.response
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def put(
+        self,
+        endpoint: str,
+        city: str | None,
+        notes: list[str] | None,
+        mode: str,
+        response: str,
+        version: Hashable = None,
+    ):
+        """
+        Store `response`, answered from the store at `version` (as returned by
+        `version()` before answering, by default the current one); not if the
+        store changed since, nor if the answer is empty.
+        """
+        current = self.version()
+        if response.strip() in EMPTY_RESPONSES or (version is not None and version != current):
+            with self._lock:
+                self._stats["skipped"] += 1
+            return
+        key = make_key(endpoint, city, notes, mode)
+        entry = CacheEntry(response, time.monotonic() + self.ttl, self._embedding(key), current)
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._stats["invalidations"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["exact_hits"] + self._stats["semantic_hits"] + self._stats["misses"]
+            hits = lookups - self._stats["misses"]
+            return {
+                **self._stats,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hit_rate": hits / lookups if lookups else 0.0,
+            }
+
+
+@cache
+def get_response_cache() -> ResponseCache:
+    rag = get_travel_guide_rag()
+
+    def version():
+        # picks up a re-ingest by another process, like the guide queries do
+        rag.check_store()
+        return rag.version
+
+    response_cache = ResponseCache(
+        max_entries=SETTINGS.response_cache_max_entries,
+        ttl=SETTINGS.response_cache_ttl,
+        similarity_threshold=SETTINGS.response_cache_similarity,
+        embed=lambda text: get_query_embed_model().get_query_embedding(text),
+        version=version,
+    )
+    # Cached answers were synthesized from the old guide content.
+    on_ingest(response_cache.clear)
+    return response_cache
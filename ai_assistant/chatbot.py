@@ -1,11 +1,22 @@
 import gradio as gr
-from ai_assistant.agent import TravelAgent
+from llama_index.core.chat_engine.types import AgentChatResponse
+from ai_assistant.pool import get_agent_pool
+from ai_assistant.sessions import get_session_manager
 
-agent = TravelAgent().get_agent()
 
+def agent_response(message, history, request: gr.Request):
+    # Every browser session gets its own conversation memory on a pooled agent.
+    with get_agent_pool().checkout() as agent, get_session_manager().attach(agent, request.session_hash):
+        response = agent.stream_chat(message)
+        if isinstance(response, AgentChatResponse):
+            # return_direct tools (reservations, trip summary) answer in one piece
+            yield response.response
+            return
 
-def agent_response(message, history):
-    return agent.chat(message).response
+        partial = ""
+        for token in response.response_gen:
+            partial += token
+            yield partial
 
 
 if __name__ == "__main__":
@@ -0,0 +1,76 @@
+import re
+import unicodedata
+from functools import cache, lru_cache
+
+# Destinations of the travel guide and the department each one belongs to.
+# Departments map to themselves so a chunk about "the Beni" is found too.
+CITY_DEPARTMENTS = {
+    "La Paz": "La Paz",
+    "El Alto": "La Paz",
+    "Copacabana": "La Paz",
+    "Coroico": "La Paz",
+    "Sorata": "La Paz",
+    "Tiwanaku": "La Paz",
+    "Chulumani": "La Paz",
+    "Rurrenabaque": "Beni",
+    "Trinidad": "Beni",
+    "Riberalta": "Beni",
+    "Guayaramerín": "Beni",
+    "Beni": "Beni",
+    "Cobija": "Pando",
+    "Pando": "Pando",
+    "Santa Cruz": "Santa Cruz",
+    "Samaipata": "Santa Cruz",
+    "Concepción": "Santa Cruz",
+    "San Ignacio de Velasco": "Santa Cruz",
+    "San José de Chiquitos": "Santa Cruz",
+    "Vallegrande": "Santa Cruz",
+    "Cochabamba": "Cochabamba",
+    "Villa Tunari": "Cochabamba",
+    "Torotoro": "Potosí",
+    "Potosí": "Potosí",
+    "Uyuni": "Potosí",
+    "Tupiza": "Potosí",
+    "Villazón": "Potosí",
+    "Sucre": "Chuquisaca",
+    "Chuquisaca": "Chuquisaca",
+    "Oruro": "Oruro",
+    "Sajama": "Oruro",
+    "Tarija": "Tarija",
+    "Yacuiba": "Tarija",
+}
+
+
+@lru_cache(maxsize=4096)  # a store names a few hundred places, over and over
+def normalize_city(name: str) -> str:
+    """Casefold and strip accents, so "POTOSI" and "Potosí" compare equal."""
+    decomposed = unicodedata.normalize("NFKD", name.casefold())
+    return " ".join("".join(c for c in decomposed if not unicodedata.combining(c)).split())
+
+
+@cache
+def _city_pattern() -> re.Pattern:
+    # Longest names first so "San Ignacio de Velasco" wins over a shorter prefix.
+    names = sorted({normalize_city(city) for city in CITY_DEPARTMENTS}, key=len, reverse=True)
+    return re.compile(r"\b(" + "|".join(re.escape(name) for name in names) + r")\b")
+
+
+@cache
+def _canonical() -> dict[str, str]:
+    return {normalize_city(city): city for city in CITY_DEPARTMENTS}
+
+
+def canonical_city(name: str | None) -> str | None:
+    """The guide's spelling of a known city or department, or None if unknown."""
+    return _canonical().get(normalize_city(name)) if name else None
+
+
+def extract_cities(text: str, with_departments: bool = True) -> list[str]:
+    """Known cities mentioned in `text` (plus their departments), in order of first mention."""
+    found: dict[str, None] = {}
+    for match in _city_pattern().finditer(normalize_city(text)):
+        city = _canonical()[match.group(1)]
+        found[city] = None
+        if with_departments:
+            found[CITY_DEPARTMENTS[city]] = None
+    return list(found)
@@ -7,10 +7,49 @@ class AgentSettings(BaseSettings):
 
     openai_model: str = "gpt4o-mini"
     hf_embeddings_model: str = "intfloat/multilingual-e5-base"
+    llm_provider: str = "openai"  # "openai" or "stub" (deterministic, offline)
+    embed_provider: str = "huggingface"  # "huggingface" or "stub" (hashed bag of words)
+    stub_latency_ms: float = 0.0
+    stub_latency_ms_per_1k_tokens: float = 0.0  # stub LLM prompt processing time
     travel_guide_store_path: str = "travel_guide_store"
     travel_guide_data_path: str = "data"
+    store_check_interval: float = 5.0  # how often queries check the store for a re-ingest by another process
+    vector_store_backend: str = "numpy"  # "numpy" (memory-mapped .npy) or "simple" (llama-index JSON)
+    vector_index: str = "exact"  # "exact" or "ivf" (approximate, numpy backend only)
+    ivf_nlist: int = 0  # inverted lists; 0 picks ~sqrt(chunks)
+    ivf_nprobe: int = 8  # lists scanned per query: higher is slower and closer to exact
+    context_token_budget: int = 1000  # retrieved context tokens per synthesis; 0 keeps the chunks as retrieved
+    context_filter_sentences: bool = True  # drop context sentences not mentioning the query's terms or cities
+    embed_batch_size: int = 32
+    ingestion_workers: int = 1
+    embedding_cache_path: str = "embedding_cache.sqlite"
+    query_embedding_cache_size: int = 1024
+    query_embedding_cache_persist: bool = False  # also keep query embeddings in embedding_cache_path
     openai_api_key: str = "key"
-    log_file: str = "trip.json"
+    log_file: str = "trip.jsonl"
+    log_fsync_batch: int = 16
+    log_fsync_interval: float = 1.0
+    reservation_store: str = "jsonl"  # "jsonl" or "sqlite"
+    sqlite_path: str = "trip.sqlite"
+    warm_up_on_startup: bool = True  # load the embedder and index before serving, not on the first query
+    agent_pool_size: int = 4
+    agent_pool_timeout: float = 30.0
+    max_concurrent_agent_calls: int = 4
+    agent_timeout: float = 120.0
+    structured_mode: str = "direct"  # recommendations and /report: "direct" (one tool call) or "agent" (ReAct loop)
+    response_cache_enabled: bool = True
+    response_cache_max_entries: int = 1024
+    response_cache_ttl: float = 3600.0
+    response_cache_similarity: float = 0.95
+    singleflight_enabled: bool = True  # identical in-flight recommendations/reports share one run
+    singleflight_timeout: float = 120.0  # how long a coalesced request waits for the one it joined
+    snapshot_path: str = "recommendation_snapshot.json"  # written by python -m ai_assistant.snapshots
+    snapshot_workers: int = 4
+    snapshot_auto_refresh: bool = True  # regenerate an existing snapshot at startup when the store changed
+    session_token_limit: int = 3000  # older turns are summarized past this
+    session_idle_timeout: float = 1800.0
+    max_sessions: int = 1000
+    session_total_token_budget: int = 2_000_000
 
 
 @cache
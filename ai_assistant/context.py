@@ -0,0 +1,136 @@
+import re
+from typing import NamedTuple
+from llama_index.core.postprocessor.types import BaseNodePostprocessor
+from llama_index.core.schema import NodeWithScore, QueryBundle
+from llama_index.core.utils import get_tokenizer
+from ai_assistant.cities import extract_cities, normalize_city
+from ai_assistant.metrics import get_metrics
+
+METRICS = get_metrics()
+
+# Line breaks of PDF text fall mid-sentence: split at punctuation only.
+SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+WORD = re.compile(r"\w+")
+# Words of the endpoint queries ("recommend hotels in X with the following
+# notes: ...") and common English/Spanish words that say nothing about a sentence.
+STOPWORDS = {
+    "recommend", "following", "notes", "specific", "with", "about", "what", "which", "where", "when",
+    "there", "their", "this", "that", "from", "into", "some", "give", "bolivia", "para", "como", "donde",
+    "recomienda", "recomendar", "sobre", "entre", "desde", "hasta", "have", "near",
+}
+
+
+class ContextReport(NamedTuple):
+    chunks_before: int
+    chunks_after: int
+    tokens_before: int
+    tokens_after: int
+
+
+def _stem(word: str) -> str:
+    # "hotels", "hoteles" and "hotel" all match
+    return word[:5] if len(word) > 5 else word
+
+
+def truncate(text: str, token_budget: int, tokenizer) -> str:
+    """The longest run of `text`'s leading words that fits in `token_budget` tokens."""
+    words = text.split()
+    lo, hi = 0, len(words)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if len(tokenizer(" ".join(words[:mid]))) <= token_budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    return " ".join(words[:lo])
+
+
+def query_terms(query: str, city: str | None = None) -> set[str]:
+    """Stems of the query's meaningful words and of the cities it is about."""
+    words = [word for word in WORD.findall(normalize_city(query)) if len(word) > 3 and word not in STOPWORDS]
+    cities = extract_cities(query) + ([city] if city else [])
+    words += [word for name in cities for word in WORD.findall(normalize_city(name))]
+    return {_stem(word) for word in words}
+
+
+class ContextBudgetPostprocessor(BaseNodePostprocessor):
+    """
+    Fits the retrieved chunks into `token_budget` tokens before synthesis.
+
+    Sentences already seen in a higher-ranked chunk (the overlap between
+    neighbouring chunks, or duplicated pages) are dropped, then, with
+    `filter_sentences`, those mentioning none of the query's terms or cities
+    (unless that would leave no context at all). What is left is kept in rank
+    order up to the budget; the sentence that crosses it is cut at the last
+    word that fits, so a top chunk of unpunctuated text (tables, PDF lists)
+    still gives some context. Every call counts the context tokens before and
+    after in the `context_tokens` metric, and adds its ContextReport to the
+    request's timings breakdown as a `context` entry.
+    """
+
+    token_budget: int
+    filter_sentences: bool = True
+    city: str | None = None
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "ContextBudgetPostprocessor"
+
+    def compress(self, nodes: list[NodeWithScore], query: str) -> tuple[list[NodeWithScore], ContextReport]:
+        tokenizer = get_tokenizer()
+        terms = query_terms(query, self.city) if self.filter_sentences else set()
+        seen: set[str] = set()
+        chunks: list[tuple[NodeWithScore, list[str]]] = []
+        for node in nodes:
+            sentences = []
+            for sentence in SENTENCE_END.split(" ".join(node.node.get_content().split())):
+                key = normalize_city(sentence)
+                if key and key not in seen:
+                    seen.add(key)
+                    sentences.append(sentence)
+            chunks.append((node, sentences))
+
+        if terms:
+            filtered = [
+                (node, [s for s in sentences if terms & {_stem(w) for w in WORD.findall(normalize_city(s))}])
+                for node, sentences in chunks
+            ]
+            if any(sentences for _, sentences in filtered):
+                chunks = filtered
+
+        kept: list[NodeWithScore] = []
+        tokens_after = 0
+        full = False
+        for node, sentences in chunks:
+            text = []
+            for sentence in sentences:
+                tokens = len(tokenizer(sentence))
+                if tokens_after + tokens > self.token_budget:
+                    sentence = truncate(sentence, self.token_budget - tokens_after, tokenizer)
+                    if sentence:
+                        text.append(sentence)
+                        tokens_after += len(tokenizer(sentence))
+                    full = True
+                    break
+                text.append(sentence)
+                tokens_after += tokens
+            if text:
+                compressed = node.node.model_copy()
+                compressed.set_content(" ".join(text))
+                kept.append(NodeWithScore(node=compressed, score=node.score))
+            if full:
+                break
+
+        tokens_before = sum(len(tokenizer(node.node.get_content())) for node in nodes)
+        return kept, ContextReport(len(nodes), len(kept), tokens_before, tokens_after)
+
+    def _postprocess_nodes(
+        self, nodes: list[NodeWithScore], query_bundle: QueryBundle | None = None
+    ) -> list[NodeWithScore]:
+        if not nodes or query_bundle is None:
+            return nodes
+        kept, report = self.compress(nodes, query_bundle.query_str)
+        METRICS.inc("context_tokens", report.tokens_before, kind="retrieved")
+        METRICS.inc("context_tokens", report.tokens_after, kind="kept")
+        METRICS.report("context", **report._asdict())
+        return kept
@@ -0,0 +1,136 @@
+from datetime import date, datetime
+
+DATE_FORMATS = ("%d/%m/%Y", "%m-%d-%Y", "%Y/%m/%d", "%Y-%m-%d")
+DATETIME_FORMATS = ("%d/%m/%Y %H:%M", "%m-%d-%Y %H:%M", "%Y/%m/%d %H:%M", "%Y-%m-%dT%H:%M:%S")
+
+INVALID_DATE = "Invalid date format. Please provide the date in one of the following formats: DD/MM/YYYY, MM-DD-YYYY, YYYY/MM/DD, or YYYY-MM-DD."
+INVALID_DATETIME = "Invalid datetime format. Please provide the datetime in one of the following formats: DD/MM/YYYY HH:MM, MM-DD-YYYY HH:MM, YYYY/MM/DD HH:MM, or YYYY-MM-DDTHH:MM:SS."
+
+ISO_FORMATS = {"%Y-%m-%d", "%Y-%m-%dT%H:%M:%S"}
+
+
+def _layout(fmt: str) -> tuple[int, dict[str, tuple[int, int]], list[tuple[int, str]]]:
+    """Length, field slices and separator positions of `fmt` for zero-padded input."""
+    position, fields, separators = 0, {}, []
+    i = 0
+    while i < len(fmt):
+        if fmt[i] == "%":
+            width = 4 if fmt[i + 1] == "Y" else 2
+            fields[fmt[i + 1]] = (position, position + width)
+            position += width
+            i += 2
+        else:
+            separators.append((position, fmt[i]))
+            position += 1
+            i += 1
+    return position, fields, separators
+
+
+LAYOUTS = {fmt: _layout(fmt) for fmt in DATE_FORMATS + DATETIME_FORMATS}
+
+
+def _fast_parse(value: str, fmt: str) -> datetime | None:
+    """
+    Parse `value` if it has exactly the zero-padded shape of `fmt`, by slicing
+    instead of strptime; None if the shape doesn't match or the date is invalid.
+    """
+    length, fields, separators = LAYOUTS[fmt]
+    if len(value) != length or not value.isascii():
+        return None
+    for position, separator in separators:
+        if value[position] != separator:
+            return None
+    if fmt in ISO_FORMATS:
+        try:
+            return datetime.fromisoformat(value)
+        except ValueError:
+            return None
+    parts = {}
+    for code, (start, end) in fields.items():
+        part = value[start:end]
+        if not part.isdigit():
+            return None
+        parts[code] = int(part)
+    try:
+        return datetime(parts["Y"], parts["m"], parts["d"], parts.get("H", 0), parts.get("M", 0))
+    except ValueError:
+        return None
+
+
+class DateParser:
+    """
+    Date/datetime parser for the formats the reservation tools accept.
+
+    Zero-padded input is recognized by its shape (length and separator
+    positions) and parsed by slicing; anything else falls back to strptime
+    over every format. The last format that worked is tried first and the
+    batch methods parse each repeated string once, so a caller parsing many
+    values (a bulk import, an itinerary) makes a parser for that batch. A
+    parser is not shared between threads.
+    """
+
+    def __init__(self):
+        self._last_date = DATE_FORMATS[-1]
+        self._last_datetime = DATETIME_FORMATS[-1]
+        self._dates: dict[str, date] = {}
+        self._datetimes: dict[str, datetime] = {}
+
+    def _parse(self, value: str, formats: tuple[str, ...], last: str) -> tuple[datetime, str] | None:
+        parsed = _fast_parse(value, last)
+        if parsed is not None:
+            return parsed, last
+        for fmt in formats:
+            if fmt != last:
+                parsed = _fast_parse(value, fmt)
+                if parsed is not None:
+                    return parsed, fmt
+        for fmt in formats:
+            try:
+                return datetime.strptime(value, fmt), fmt
+            except ValueError:
+                continue
+        return None
+
+    def parse_date(self, value: str) -> date:
+        result = self._parse(value, DATE_FORMATS, self._last_date)
+        if result is None:
+            raise ValueError(INVALID_DATE)
+        parsed, self._last_date = result
+        return parsed.date()
+
+    def parse_datetime(self, value: str) -> datetime:
+        result = self._parse(value, DATETIME_FORMATS, self._last_datetime)
+        if result is None:
+            raise ValueError(INVALID_DATETIME)
+        parsed, self._last_datetime = result
+        return parsed
+
+    def parse_dates(self, values: list[str]) -> list[date]:
+        """Parse a batch of dates; strings this parser has seen before are not parsed again."""
+        parsed = self._dates
+        return [parsed[value] if value in parsed else parsed.setdefault(value, self.parse_date(value)) for value in values]
+
+    def parse_datetimes(self, values: list[str]) -> list[datetime]:
+        parsed = self._datetimes
+        return [
+            parsed[value] if value in parsed else parsed.setdefault(value, self.parse_datetime(value))
+            for value in values
+        ]
+
+
+# A single value gains nothing from a parser's memory, and a parser shared
+# by every request would have threads racing on it: each call gets its own.
+def parse_date(value: str) -> date:
+    return DateParser().parse_date(value)
+
+
+def parse_datetime(value: str) -> datetime:
+    return DateParser().parse_datetime(value)
+
+
+def parse_dates(values: list[str]) -> list[date]:
+    return DateParser().parse_dates(values)
+
+
+def parse_datetimes(values: list[str]) -> list[datetime]:
+    return DateParser().parse_datetimes(values)
@@ -0,0 +1,184 @@
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+from typing import Any, Sequence
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding, Embedding
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode, MetadataMode, TransformComponent
+
+
+def embedding_key(model_name: str, text: str) -> str:
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    On-disk embedding cache keyed by (model name, text hash), stored as float32
+    blobs in a SQLite file so it survives rebuilds of the travel guide store.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL;")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get_many(self, keys: Sequence[str]) -> dict[str, list[float]]:
+        found = {}
+        with self._lock:
+            # Stay well under SQLite's bound-parameter limit.
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, vector FROM embeddings WHERE key IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                ).fetchall()
+                for key, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=np.float32).tolist()
+        return found
+
+    def put_many(self, items: dict[str, list[float]]):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                [(key, np.asarray(vector, dtype=np.float32).tobytes()) for key, vector in items.items()],
+            )
+            self._conn.commit()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class CachedEmbedder(TransformComponent):
+    """
+    Ingestion step that embeds nodes in batches of `batch_size`, looking every
+    chunk up in `cache` first so unchanged chunks are never re-embedded.
+    """
+
+    embed_model: BaseEmbedding
+    cache: Any = None
+    batch_size: int = 32
+
+    def __call__(self, nodes: Sequence[BaseNode], **kwargs: Any) -> Sequence[BaseNode]:
+        pending = [node for node in nodes if node.embedding is None]
+        texts = [node.get_content(metadata_mode=MetadataMode.EMBED) for node in pending]
+        keys = [embedding_key(self.embed_model.model_name, text) for text in texts]
+        cached = self.cache.get_many(keys) if self.cache is not None else {}
+
+        missing = [i for i, key in enumerate(keys) if key not in cached]
+        computed = {}
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            vectors = self.embed_model.get_text_embedding_batch([texts[i] for i in batch])
+            computed.update({keys[i]: vector for i, vector in zip(batch, vectors)})
+        if computed and self.cache is not None:
+            self.cache.put_many(computed)
+
+        for node, key in zip(pending, keys):
+            node.embedding = cached.get(key) or computed[key]
+        return nodes
+
+
+class CachedEmbedding(BaseEmbedding):
+    """
+    Wraps an embedding model with an in-memory LRU of query embeddings
+    (`max_entries` queries), backed by the on-disk `cache` when one is given.
+    Text embeddings pass straight through to `embed_model`.
+    """
+
+    embed_model: BaseEmbedding
+    max_entries: int = 1024
+    cache: Any = None
+
+    _entries: OrderedDict = PrivateAttr(default_factory=OrderedDict)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+    _stats: dict = PrivateAttr(default_factory=dict)
+
+    def __init__(self, embed_model: BaseEmbedding, **kwargs: Any):
+        kwargs.setdefault("model_name", embed_model.model_name)
+        kwargs.setdefault("embed_batch_size", embed_model.embed_batch_size)
+        super().__init__(embed_model=embed_model, **kwargs)
+        self._stats = {"hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "CachedEmbedding"
+
+    def _key(self, query: str) -> str:
+        # Query and text embeddings differ for instruction models such as e5.
+        return embedding_key(f"{self.model_name}:query", query)
+
+    def _lookup(self, key: str) -> Embedding | None:
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self._stats["hits"] += 1
+                return self._entries[key]
+        if self.cache is not None:
+            stored = self.cache.get_many([key]).get(key)
+            if stored is not None:
+                self._store(key, stored)
+                with self._lock:
+                    self._stats["disk_hits"] += 1
+                return stored
+        with self._lock:
+            self._stats["misses"] += 1
+        return None
+
+    def _store(self, key: str, embedding: Embedding):
+        with self._lock:
+            self._entries[key] = embedding
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def _remember(self, key: str, embedding: Embedding):
+        self._store(key, embedding)
+        if self.cache is not None:
+            self.cache.put_many({key: embedding})
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        key = self._key(query)
+        embedding = self._lookup(key)
+        if embedding is None:
+            embedding = self.embed_model.get_query_embedding(query)
+            self._remember(key, embedding)
+        return embedding
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        key = self._key(query)
+        embedding = self._lookup(key)
+        if embedding is None:
+            embedding = await self.embed_model.aget_query_embedding(query)
+            self._remember(key, embedding)
+        return embedding
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        return self.embed_model._get_text_embedding(text)
+
+    async def _aget_text_embedding(self, text: str) -> Embedding:
+        return await self.embed_model._aget_text_embedding(text)
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[Embedding]:
+        return self.embed_model._get_text_embeddings(texts)
+
+    async def _aget_text_embeddings(self, texts: list[str]) -> list[Embedding]:
+        return await self.embed_model._aget_text_embeddings(texts)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["disk_hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hit_rate": (lookups - self._stats["misses"]) / lookups if lookups else 0.0,
+            }
@@ -0,0 +1,36 @@
+import sys
+import argparse
+from ai_assistant.config import get_agent_settings
+from ai_assistant.prompts import travel_guide_qa_tpl
+from ai_assistant.rags import TravelGuideRAG
+
+SETTINGS = get_agent_settings()
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        description="Incrementally (re)ingest the travel guide: only new or changed files are embedded."
+    )
+    parser.add_argument("--data-dir", default=SETTINGS.travel_guide_data_path)
+    parser.add_argument("--store-path", default=SETTINGS.travel_guide_store_path)
+    args = parser.parse_args(argv)
+
+    rag = TravelGuideRAG(
+        store_path=args.store_path,
+        data_dir=args.data_dir,
+        qa_prompt_tpl=travel_guide_qa_tpl,
+    )
+    report = rag.refresh(args.data_dir)
+
+    for label, doc_ids in (("added", report.added), ("updated", report.updated), ("deleted", report.deleted)):
+        for doc_id in doc_ids:
+            print(f"{label}: {doc_id}")
+    print(
+        f"{len(report.added)} added, {len(report.updated)} updated, "
+        f"{len(report.deleted)} deleted, {report.unchanged} unchanged "
+        f"in {report.seconds:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+import time
+import threading
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import cache, wraps
+from typing import Any, Callable, Iterator
+from llama_index.core.instrumentation import get_dispatcher
+from llama_index.core.instrumentation.event_handlers import BaseEventHandler
+from llama_index.core.instrumentation.events import BaseEvent
+from llama_index.core.instrumentation.events.agent import AgentRunStepStartEvent, AgentRunStepEndEvent
+from llama_index.core.instrumentation.events.embedding import EmbeddingStartEvent, EmbeddingEndEvent
+from llama_index.core.instrumentation.events.llm import (
+    LLMChatStartEvent,
+    LLMChatEndEvent,
+    LLMCompletionStartEvent,
+    LLMCompletionEndEvent,
+)
+from llama_index.core.instrumentation.events.retrieval import RetrievalStartEvent, RetrievalEndEvent
+from llama_index.core.instrumentation.events.synthesis import SynthesizeStartEvent, SynthesizeEndEvent
+from llama_index.core.utils import get_tokenizer
+
+PREFIX = "ai_assistant"
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Stage of each pair of llama-index start/end events.
+EVENT_STAGES = {
+    LLMChatStartEvent: "llm",
+    LLMChatEndEvent: "llm",
+    LLMCompletionStartEvent: "llm",
+    LLMCompletionEndEvent: "llm",
+    EmbeddingStartEvent: "embedding",
+    EmbeddingEndEvent: "embedding",
+    RetrievalStartEvent: "retrieval",
+    RetrievalEndEvent: "retrieval",
+    SynthesizeStartEvent: "synthesis",
+    SynthesizeEndEvent: "synthesis",
+    AgentRunStepStartEvent: "agent_step",
+    AgentRunStepEndEvent: "agent_step",
+}
+END_EVENTS = (LLMChatEndEvent, LLMCompletionEndEvent, EmbeddingEndEvent, RetrievalEndEvent, SynthesizeEndEvent, AgentRunStepEndEvent)
+
+
+@dataclass
+class RequestTimings:
+    """
+    What one request spent, per stage, plus its counters (LLM tokens, cache
+    hits) and the per-call reports of its components (e.g. the context
+    compression of each synthesis).
+    """
+
+    started: float = field(default_factory=time.perf_counter)
+    stages: dict[str, list] = field(default_factory=dict)
+    counters: dict[str, int] = field(default_factory=dict)
+    reports: dict[str, list[dict]] = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return {
+            "total_seconds": round(time.perf_counter() - self.started, 6),
+            "stages": {
+                stage: {"calls": calls, "seconds": round(seconds, 6)} for stage, (calls, seconds) in self.stages.items()
+            },
+            **self.counters,
+            **self.reports,
+        }
+
+
+# Breakdown of the request being served; None outside of one.
+request_timings: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+def track_request() -> RequestTimings:
+    """Start the breakdown of the current request; the tasks and threads it starts add to it too."""
+    timings = RequestTimings()
+    request_timings.set(timings)
+    return timings
+
+
+def _labels(labels: tuple[tuple[str, str], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{value}"' for key, value in labels) + "}"
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Metrics:
+    """
+    Process-wide counters and latency histograms, rendered in the Prometheus
+    text format.
+
+    Every stage timed with `time()` (the agent loop, each of its steps, tool
+    calls, LLM and embedding calls, retrieval, synthesis, reservation saves)
+    lands in the `stage_seconds` histogram and in the breakdown of the
+    current request, if any; counters (LLM tokens, cache lookups) too.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = BUCKETS):
+        self.buckets = buckets
+        self._counters: dict[tuple[str, tuple], float] = {}
+        self._histograms: dict[tuple[str, tuple], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+        timings = request_timings.get()
+        if timings is not None:
+            counter = "_".join([name, *labels.values()])
+            timings.counters[counter] = timings.counters.get(counter, 0) + value
+
+    def report(self, name: str, **values: Any):
+        """Add one call's `values` to the `name` reports of the current request, if any."""
+        timings = request_timings.get()
+        if timings is not None:
+            timings.reports.setdefault(name, []).append(values)
+
+    def observe(self, name: str, value: float, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(self.buckets)
+            histogram.observe(value)
+
+    def stage(self, stage: str, seconds: float):
+        self.observe("stage_seconds", seconds, stage=stage)
+        timings = request_timings.get()
+        if timings is not None:
+            calls, total = timings.stages.get(stage, (0, 0.0))
+            timings.stages[stage] = [calls + 1, total + seconds]
+
+    @contextmanager
+    def time(self, stage: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stage(stage, time.perf_counter() - start)
+
+    def instrument(self, stage: str) -> Callable:
+        """Decorator timing every call of a function as `stage`."""
+
+        def decorator(fn: Callable) -> Callable:
+            @wraps(fn)
+            def timed(*args, **kwargs):
+                with self.time(stage):
+                    return fn(*args, **kwargs)
+
+            return timed
+
+        return decorator
+
+    def render(self, gauges: dict[str, dict[str, Any]] | None = None) -> str:
+        """
+        The metrics in the Prometheus text format; `gauges` adds the current
+        stats of other components, e.g. {"response_cache": {"exact_hits": 3}}.
+        """
+        lines = []
+        with self._lock:
+            counters = sorted(self._counters.items())
+            histograms = sorted(self._histograms.items())
+        declared = set()
+        for (name, labels), value in counters:
+            metric = f"{PREFIX}_{name}_total"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_labels(labels)} {value}")
+        for (name, labels), histogram in histograms:
+            metric = f"{PREFIX}_{name}"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip((*histogram.buckets, "+Inf"), histogram.counts):
+                cumulative += count
+                lines.append(f"{metric}_bucket{_labels((*labels, ('le', str(bound))))} {cumulative}")
+            lines.append(f"{metric}_sum{_labels(labels)} {histogram.sum}")
+            lines.append(f"{metric}_count{_labels(labels)} {histogram.count}")
+        for component, stats in (gauges or {}).items():
+            for name, value in stats.items():
+                if isinstance(value, bool) or not isinstance(value, (int, float)):
+                    continue
+                metric = f"{PREFIX}_{component}_{name}"
+                lines.append(f"# TYPE {metric} gauge")
+                lines.append(f"{metric} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsEventHandler(BaseEventHandler):
+    """
+    Times llama-index's LLM, embedding, retrieval, synthesis and agent step
+    events and counts LLM tokens: the provider's usage when the response
+    reports it, else the global tokenizer's count.
+    """
+
+    metrics: Any
+    starts: dict = {}
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "MetricsEventHandler"
+
+    def handle(self, event: BaseEvent, **kwargs: Any) -> Any:
+        stage = EVENT_STAGES.get(type(event))
+        if stage is None:
+            return
+        # A start and its end are dispatched from the same span.
+        key = (event.span_id, stage)
+        if not isinstance(event, END_EVENTS):
+            if len(self.starts) > 10_000:
+                # ends lost to errors; don't let them pile up
+                self.starts.clear()
+            self.starts[key] = event.timestamp
+            return
+        started = self.starts.pop(key, None)
+        if started is not None:
+            self.metrics.stage(stage, (event.timestamp - started).total_seconds())
+        if isinstance(event, (LLMChatEndEvent, LLMCompletionEndEvent)) and event.response is not None:
+            self._count_tokens(event)
+
+    def _count_tokens(self, event: LLMChatEndEvent | LLMCompletionEndEvent):
+        raw = event.response.raw
+        usage = raw.get("usage") if isinstance(raw, dict) else getattr(raw, "usage", None)
+        if usage is not None:
+            usage = usage if isinstance(usage, dict) else vars(usage)
+            prompt_tokens, completion_tokens = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+        else:
+            tokenizer = get_tokenizer()
+            if isinstance(event, LLMChatEndEvent):
+                prompt = " ".join(str(message.content) for message in event.messages)
+                completion = str(event.response.message.content or "")
+            else:
+                prompt, completion = event.prompt, event.response.text
+            prompt_tokens, completion_tokens = len(tokenizer(prompt)), len(tokenizer(completion))
+        self.metrics.inc("llm_tokens", prompt_tokens, kind="prompt")
+        self.metrics.inc("llm_tokens", completion_tokens, kind="completion")
+
+
+@cache
+def get_metrics() -> Metrics:
+    metrics = Metrics()
+    get_dispatcher().add_event_handler(MetricsEventHandler(metrics=metrics))
+    return metrics
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, Field
 from enum import Enum
 from datetime import date, datetime
+from typing import Annotated, Literal
 
 
 class TripType(str, Enum):
@@ -32,7 +33,46 @@ class RestaurantReservation(BaseModel):
     cost: int
 
 
+class FlightLeg(BaseModel):
+    type: Literal["flight"]
+    date: str
+    departure: str
+    destination: str
+
+
+class BusLeg(BaseModel):
+    type: Literal["bus"]
+    date: str
+    departure: str
+    destination: str
+
+
+class HotelLeg(BaseModel):
+    type: Literal["hotel"]
+    checkin_date: str
+    checkout_date: str
+    hotel_name: str
+    city: str
+
+
+class RestaurantLeg(BaseModel):
+    type: Literal["restaurant"]
+    reservation_time: str
+    restaurant: str
+    city: str
+    dish: str = "not specified"
+
+
+ItineraryLeg = Annotated[FlightLeg | BusLeg | HotelLeg | RestaurantLeg, Field(discriminator="type")]
+
+
+class BatchReservationRequest(BaseModel):
+    reservations: list[ItineraryLeg] = Field(min_length=1)
+
+
 class AgentAPIResponse(BaseModel):
     status: str
     agent_response: str
+    session_id: str | None = None
     timestamp: datetime = Field(default_factory=datetime.now)
+    timings: dict | None = None  # per-stage breakdown, when requested with ?timings=true
@@ -0,0 +1,104 @@
+import time
+import threading
+from queue import Queue, Empty
+from contextlib import contextmanager
+from functools import cache
+from typing import Callable, Iterator
+from llama_index.core.agent import ReActAgent
+from ai_assistant.agent import TravelAgent
+from ai_assistant.config import get_agent_settings
+
+SETTINGS = get_agent_settings()
+
+
+class AgentPoolExhausted(Exception):
+    pass
+
+
+class AgentPool:
+    """
+    Bounded pool of pre-built ReActAgent instances.
+
+    Agents are built once by `factory` and handed out with `checkout()`. Each
+    agent's memory is reset on checkout so requests never see each other's
+    history. When every agent is busy, callers wait up to `timeout` seconds
+    before `AgentPoolExhausted` is raised.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], ReActAgent],
+        size: int,
+        timeout: float,
+    ):
+        if size < 1:
+            raise ValueError("Agent pool size must be at least 1.")
+        self.size = size
+        self.timeout = timeout
+        self._agents: Queue[ReActAgent] = Queue(maxsize=size)
+        for _ in range(size):
+            self._agents.put(factory())
+
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def acquire(self, timeout: float | None = None) -> ReActAgent:
+        timeout = self.timeout if timeout is None else timeout
+        start = time.perf_counter()
+        try:
+            agent = self._agents.get(timeout=timeout)
+        except Empty:
+            with self._lock:
+                self._timeouts += 1
+            raise AgentPoolExhausted(
+                f"No agent available after waiting {timeout} seconds."
+            )
+        waited = time.perf_counter() - start
+
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+
+        agent.reset()
+        return agent
+
+    def release(self, agent: ReActAgent):
+        with self._lock:
+            self._in_use -= 1
+        self._agents.put(agent)
+
+    @contextmanager
+    def checkout(self, timeout: float | None = None) -> Iterator[ReActAgent]:
+        agent = self.acquire(timeout)
+        try:
+            yield agent
+        finally:
+            self.release(agent)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "size": self.size,
+                "in_use": self._in_use,
+                "available": self.size - self._in_use,
+                "utilization": self._in_use / self.size,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "avg_wait_seconds": self._total_wait / self._checkouts if self._checkouts else 0.0,
+                "max_wait_seconds": self._max_wait,
+            }
+
+
+@cache
+def get_agent_pool() -> AgentPool:
+    return AgentPool(
+        factory=lambda: TravelAgent().get_agent(),
+        size=SETTINGS.agent_pool_size,
+        timeout=SETTINGS.agent_pool_timeout,
+    )
@@ -111,3 +111,10 @@ Assistant:
 
 travel_guide_qa_tpl = PromptTemplate(travel_guide_qa_str)
 agent_prompt_tpl = PromptTemplate(agent_prompt_str)
+
+# Queries of the recommendation endpoints, shared with the snapshot job.
+recommendation_prompts = {
+    "cities": "recommend cities in bolivia with the following notes: {notes}",
+    "hotels": "recommend hotels in {city} with the following notes: {notes}",
+    "activities": "recommend activities in {city} with the following notes: {notes}",
+}
@@ -1,4 +1,12 @@
 import os
+import time
+import asyncio
+import threading
+from contextvars import ContextVar
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import cache
+from typing import AsyncIterator, Callable, Sequence
 from llama_index.core import (
     VectorStoreIndex,
     StorageContext,
@@ -7,45 +15,355 @@ from llama_index.core import (
     PromptTemplate,
     Settings,
 )
+from llama_index.core.base.base_query_engine import BaseQueryEngine
+from llama_index.core.base.embeddings.base import BaseEmbedding
+from llama_index.core.base.base_retriever import BaseRetriever
+from llama_index.core.base.response.schema import RESPONSE_TYPE
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.llms import LLM
 from llama_index.core.query_engine import RetrieverQueryEngine
+from llama_index.core.schema import BaseNode, Document, NodeWithScore, QueryBundle
+from llama_index.core.vector_stores import FilterOperator, MetadataFilter, MetadataFilters
 from llama_index.llms.openai import OpenAI
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+from ai_assistant.cities import canonical_city, extract_cities
 from ai_assistant.config import get_agent_settings
+from ai_assistant.context import ContextBudgetPostprocessor
+from ai_assistant.embeddings import CachedEmbedder, CachedEmbedding, EmbeddingCache
+from ai_assistant.vector_store import NumpyVectorStore
+from ai_assistant.prompts import travel_guide_qa_tpl
+from ai_assistant.stubs import StubEmbedding, StubLLM
 
 SETTINGS = get_agent_settings()
 
-llm = OpenAI(model="gpt-4o-mini")
-embed_model = HuggingFaceEmbedding(model_name=SETTINGS.hf_embeddings_model)
-Settings.embed_model = embed_model
-Settings.llm = llm
+CITIES_KEY = "cities"
+
+# City the current request is about (e.g. the `city` query parameter of the
+# recommendation endpoints); travel guide queries made while it is set only
+# retrieve chunks about that city.
+city_scope: ContextVar[str | None] = ContextVar("city_scope", default=None)
+
+_ingest_listeners: list[Callable[[], None]] = []
+
+
+def on_ingest(listener: Callable[[], None]):
+    """
+    Register a callback to run whenever the travel guide store is (re)ingested,
+    in this process or, once a query notices it, in another one.
+    """
+    _ingest_listeners.append(listener)
+
+
+def _notify_ingest():
+    for listener in _ingest_listeners:
+        listener()
+
+
+def store_version(store_path: str) -> tuple[int, int] | None:
+    """Cheap version of a persisted store (its docstore's mtime and size); None if there is none."""
+    try:
+        stat = os.stat(os.path.join(store_path, "docstore.json"))
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@cache
+def get_llm() -> LLM:
+    if SETTINGS.llm_provider == "stub":
+        return StubLLM(
+            latency=SETTINGS.stub_latency_ms / 1000,
+            latency_per_1k_tokens=SETTINGS.stub_latency_ms_per_1k_tokens / 1000,
+        )
+    return OpenAI(model="gpt-4o-mini")
+
+
+@cache
+def get_embed_model() -> BaseEmbedding:
+    if SETTINGS.embed_provider == "stub":
+        return StubEmbedding(latency=SETTINGS.stub_latency_ms / 1000, embed_batch_size=SETTINGS.embed_batch_size)
+    # Importing the HuggingFace integration pulls in torch, and building the
+    # embedder loads the model weights: both are deferred to the first query.
+    from llama_index.embeddings.huggingface import HuggingFaceEmbedding
+
+    return HuggingFaceEmbedding(
+        model_name=SETTINGS.hf_embeddings_model,
+        embed_batch_size=SETTINGS.embed_batch_size,
+    )
+
+
+@cache
+def get_embedding_cache() -> EmbeddingCache:
+    return EmbeddingCache(SETTINGS.embedding_cache_path)
+
+
+@cache
+def get_query_embed_model() -> CachedEmbedding:
+    """The embedding model behind an LRU of query embeddings, shared by every agent in the process."""
+    return CachedEmbedding(
+        embed_model=get_embed_model(),
+        max_entries=SETTINGS.query_embedding_cache_size,
+        cache=get_embedding_cache() if SETTINGS.query_embedding_cache_persist else None,
+    )
+
+
+def configure_models():
+    Settings.llm = get_llm()
+    Settings.embed_model = get_query_embed_model()
+
+
+@dataclass
+class IngestionReport:
+    added: list[str] = field(default_factory=list)
+    updated: list[str] = field(default_factory=list)
+    deleted: list[str] = field(default_factory=list)
+    unchanged: int = 0
+    seconds: float = 0.0
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.deleted)
+
+
+def split_documents(documents: list[Document]) -> list[BaseNode]:
+    # Module-level so it can run in ingestion worker processes; each worker
+    # builds its own splitter because SentenceSplitter does not pickle cleanly.
+    return SentenceSplitter().get_nodes_from_documents(documents)
+
+
+def tag_cities(nodes: list[BaseNode]) -> list[BaseNode]:
+    """
+    Store the cities (and departments) each chunk mentions as `cities`
+    metadata, kept out of the embedded and LLM-visible text.
+    """
+    for node in nodes:
+        node.metadata[CITIES_KEY] = extract_cities(node.get_content())
+        for excluded in (node.excluded_embed_metadata_keys, node.excluded_llm_metadata_keys):
+            if CITIES_KEY not in excluded:
+                excluded.append(CITIES_KEY)
+    return nodes
+
+
+class CityScopedRetriever(BaseRetriever):
+    """
+    Retrieve only chunks tagged with any of `cities`, falling back to the
+    whole guide when none are (e.g. a store ingested before chunks were
+    tagged).
+    """
+
+    def __init__(self, index: VectorStoreIndex, cities: list[str], **kwargs):
+        super().__init__()
+        if len(cities) == 1:
+            scope = MetadataFilter(key=CITIES_KEY, value=cities[0], operator=FilterOperator.CONTAINS)
+        else:
+            scope = MetadataFilter(key=CITIES_KEY, value=cities, operator=FilterOperator.ANY)
+        filters = MetadataFilters(filters=[scope])
+        self._scoped = index.as_retriever(filters=filters, **kwargs)
+        self._unscoped = index.as_retriever(**kwargs)
+
+    def _retrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        return self._scoped.retrieve(query_bundle) or self._unscoped.retrieve(query_bundle)
+
+    async def _aretrieve(self, query_bundle: QueryBundle) -> list[NodeWithScore]:
+        return await self._scoped.aretrieve(query_bundle) or await self._unscoped.aretrieve(query_bundle)
 
 
 class TravelGuideRAG:
+    """
+    The index (and the embedding model it needs) is loaded on first access to
+    `index`, so building a TravelGuideRAG is free until it is queried.
+
+    The chunks retrieved for a query are compressed to `context_token_budget`
+    tokens before synthesis (see ai_assistant.context); 0 keeps them as
+    retrieved.
+    """
+
     def __init__(
         self,
         store_path: str,
         data_dir: str | None = None,
         qa_prompt_tpl: PromptTemplate | None = None,
+        context_token_budget: int = SETTINGS.context_token_budget,
+        filter_sentences: bool = SETTINGS.context_filter_sentences,
     ):
         self.store_path = store_path
+        self.data_dir = data_dir
+        self.qa_prompt_tpl = qa_prompt_tpl
+        self.context_token_budget = context_token_budget
+        self.filter_sentences = filter_sentences
+        self._index: VectorStoreIndex | None = None
+        self._lock = threading.Lock()
+        self._version: tuple[int, int] | None = None
+        self._checked = 0.0
 
-        if not os.path.exists(store_path) and data_dir is not None:
-            self.index = self.ingest_data(store_path, data_dir)
-        else:
-            self.index = load_index_from_storage(
-                StorageContext.from_defaults(persist_dir=store_path)
+    @property
+    def index(self) -> VectorStoreIndex:
+        if self._index is None:
+            with self._lock:
+                if self._index is None:
+                    self._index = self._load_index()
+        return self._index
+
+    @property
+    def version(self) -> tuple[int, int] | None:
+        """`store_version` of the store the loaded index was read from or last written to."""
+        return self._version
+
+    def check_store(self) -> bool:
+        """
+        Reload the index if the persisted store changed since it was loaded,
+        e.g. re-ingested by `python -m ai_assistant.ingest`, and run the
+        ingest listeners; True if it did. The store is checked at most every
+        `store_check_interval` seconds, so calling this per query is cheap.
+        """
+        now = time.monotonic()
+        if self._index is None or now - self._checked < SETTINGS.store_check_interval:
+            return False
+        self._checked = now
+        if store_version(self.store_path) == self._version:
+            return False
+        with self._lock:
+            if self._index is None or store_version(self.store_path) == self._version:
+                return False
+            self._index = self._load_index()
+        _notify_ingest()
+        return True
+
+    def _storage_context(self, persist_dir: str | None = None) -> StorageContext:
+        if SETTINGS.vector_store_backend == "numpy":
+            options = {"index": SETTINGS.vector_index, "nlist": SETTINGS.ivf_nlist, "nprobe": SETTINGS.ivf_nprobe}
+            vector_store = (
+                NumpyVectorStore.from_persist_dir(persist_dir, **options)
+                if persist_dir
+                else NumpyVectorStore(**options)
             )
+            return StorageContext.from_defaults(persist_dir=persist_dir, vector_store=vector_store)
+        return StorageContext.from_defaults(persist_dir=persist_dir)
 
-        self.qa_prompt_tpl = qa_prompt_tpl
+    def _load_index(self) -> VectorStoreIndex:
+        configure_models()
+        if not os.path.exists(self.store_path) and self.data_dir is not None:
+            return self.ingest_data(self.store_path, self.data_dir)
+        # Taken before reading, so a write racing the load is noticed later.
+        self._version = store_version(self.store_path)
+        return load_index_from_storage(self._storage_context(self.store_path))
+
+    def _load_documents(self, data_dir: str) -> list[Document]:
+        # File-based ids keep a guide's ref doc id stable across ingestions,
+        # which is what lets `refresh` match documents to their stored hash.
+        return SimpleDirectoryReader(data_dir, filename_as_id=True).load_data()
+
+    def _build_nodes(self, documents: list[Document]) -> list[BaseNode]:
+        """
+        Chunk documents (in a process pool when ingestion_workers > 1), tag the
+        chunks with the cities they mention and embed them in batches, skipping
+        chunks already in the embedding cache.
+        """
+        workers = SETTINGS.ingestion_workers
+        if workers > 1 and len(documents) > 1:
+            batches = [documents[i::workers] for i in range(workers)]
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                nodes = [node for chunked in executor.map(split_documents, batches) for node in chunked]
+        else:
+            nodes = split_documents(documents)
+        tag_cities(nodes)
+
+        embedder = CachedEmbedder(
+            embed_model=Settings.embed_model,
+            cache=get_embedding_cache(),
+            batch_size=SETTINGS.embed_batch_size,
+        )
+        return list(embedder(nodes))
+
+    def _set_document_hashes(self, index: VectorStoreIndex, documents: list[Document]):
+        for document in documents:
+            index.docstore.set_document_hash(document.doc_id, document.hash)
 
     def ingest_data(self, store_path: str, data_dir: str) -> VectorStoreIndex:
-        documents = SimpleDirectoryReader(data_dir).load_data()
-        index = VectorStoreIndex.from_documents(documents, show_progress=True)
+        documents = self._load_documents(data_dir)
+        index = VectorStoreIndex(
+            self._build_nodes(documents),
+            storage_context=self._storage_context(),
+            show_progress=True,
+        )
+        self._set_document_hashes(index, documents)
         index.storage_context.persist(persist_dir=store_path)
+        if store_path == self.store_path:
+            self._version = store_version(store_path)
+        _notify_ingest()
         return index
 
-    def get_query_engine(self) -> RetrieverQueryEngine:
-        query_engine = self.index.as_query_engine()
+    def refresh(self, data_dir: str | None = None) -> IngestionReport:
+        """
+        Incrementally sync the store with `data_dir`. The docstore keeps a
+        content hash per document: only new or changed documents are
+        re-embedded, and nodes of documents that no longer exist are deleted.
+        """
+        start = time.perf_counter()
+        report = IngestionReport()
+        data_dir = data_dir or self.data_dir
+        if self._index is None and not os.path.exists(self.store_path):
+            configure_models()
+            self._index = self.ingest_data(self.store_path, data_dir)
+            report.added = list(self._index.docstore.get_all_ref_doc_info() or {})
+            report.seconds = time.perf_counter() - start
+            return report
+
+        documents = self._load_documents(data_dir)
+        index = self.index
+        docstore = index.docstore
+
+        changed = []
+        current_ids = {document.doc_id for document in documents}
+        for ref_doc_id in list(docstore.get_all_ref_doc_info() or {}):
+            if ref_doc_id not in current_ids:
+                index.delete_ref_doc(ref_doc_id, delete_from_docstore=True)
+                report.deleted.append(ref_doc_id)
+
+        for document in documents:
+            stored_hash = docstore.get_document_hash(document.doc_id)
+            if stored_hash == document.hash:
+                report.unchanged += 1
+                continue
+            if stored_hash is None:
+                report.added.append(document.doc_id)
+            else:
+                index.delete_ref_doc(document.doc_id, delete_from_docstore=True)
+                report.updated.append(document.doc_id)
+            changed.append(document)
+
+        if changed:
+            index.insert_nodes(self._build_nodes(changed))
+            self._set_document_hashes(index, changed)
+        if report.changed:
+            index.storage_context.persist(persist_dir=self.store_path)
+            self._version = store_version(self.store_path)
+            _notify_ingest()
+        report.seconds = time.perf_counter() - start
+        return report
+
+    def get_query_engine(
+        self, city: str | None = None, cities: Sequence[str] = (), streaming: bool = False
+    ) -> RetrieverQueryEngine:
+        """
+        Query engine over the whole guide, prefiltered to `city` when it is a
+        known city, or else to the chunks about any of the known `cities`.
+        A `streaming` engine answers with the LLM's tokens as they arrive.
+        """
+        city = canonical_city(city)
+        scope = [city] if city else list(dict.fromkeys(filter(None, map(canonical_city, cities))))
+        postprocessors = []
+        if self.context_token_budget > 0:
+            postprocessors.append(
+                ContextBudgetPostprocessor(
+                    token_budget=self.context_token_budget, filter_sentences=self.filter_sentences, city=city
+                )
+            )
+        if not scope:
+            query_engine = self.index.as_query_engine(node_postprocessors=postprocessors, streaming=streaming)
+        else:
+            query_engine = RetrieverQueryEngine.from_args(
+                CityScopedRetriever(self.index, scope), node_postprocessors=postprocessors, streaming=streaming
+            )
 
         if self.qa_prompt_tpl is not None:
             query_engine.update_prompts(
@@ -53,3 +371,89 @@ class TravelGuideRAG:
             )
 
         return query_engine
+
+    def warm_up(self):
+        self.get_query_engine()
+
+
+class LazyQueryEngine(BaseQueryEngine):
+    """
+    Query engine proxy that builds the real engine on the first query.
+
+    Each query is scoped to the request's `city_scope` when an endpoint set
+    one, or else to the chunks about any of the known cities the query
+    mentions (the whole guide if it mentions none); engines are built once
+    per scope, and rebuilt after `rag` reloads or re-ingests its index.
+
+    Async queries build the engine (which may load the embedding model and
+    the index) and retrieve (query embedding, vector search, context
+    compression) in a worker thread, so they never block the event loop;
+    only synthesis, the LLM call, runs on it. `astream` does the same with a
+    streaming engine and yields the answer token by token.
+    """
+
+    def __init__(self, rag: TravelGuideRAG):
+        super().__init__(callback_manager=None)
+        self._rag = rag
+        self._engines: dict[tuple[str | None, tuple[str, ...], bool], RetrieverQueryEngine] = {}
+        # Reentrant: building the first engine may ingest the guide, and the
+        # ingest calls clear() on this same thread.
+        self._lock = threading.RLock()
+        on_ingest(self.clear)
+
+    def engine(
+        self, city: str | None = None, cities: Sequence[str] = (), streaming: bool = False
+    ) -> RetrieverQueryEngine:
+        self._rag.check_store()
+        city = canonical_city(city)
+        key = (city, () if city else tuple(sorted(filter(None, map(canonical_city, cities)))), streaming)
+        engine = self._engines.get(key)
+        if engine is None:
+            with self._lock:
+                engine = self._engines.get(key)
+                if engine is None:
+                    engine = self._engines[key] = self._rag.get_query_engine(*key)
+        return engine
+
+    def clear(self):
+        # the engines retrieve from the index they were built with
+        with self._lock:
+            self._engines = {}
+
+    def _scope(self, query_bundle: QueryBundle) -> tuple[str | None, list[str]]:
+        city = city_scope.get()
+        return city, [] if city else extract_cities(query_bundle.query_str, with_departments=False)
+
+    def _get_prompt_modules(self) -> dict:
+        return {}
+
+    def _query(self, query_bundle: QueryBundle) -> RESPONSE_TYPE:
+        return self.engine(*self._scope(query_bundle)).query(query_bundle)
+
+    async def _aquery(self, query_bundle: QueryBundle) -> RESPONSE_TYPE:
+        engine = await asyncio.to_thread(self.engine, *self._scope(query_bundle))
+        nodes = await asyncio.to_thread(engine.retrieve, query_bundle)
+        return await engine.asynthesize(query_bundle, nodes)
+
+    async def astream(self, query: str) -> AsyncIterator[str]:
+        """Answer `query` with the synthesis LLM's tokens, as it produces them."""
+        query_bundle = QueryBundle(query)
+        engine = await asyncio.to_thread(self.engine, *self._scope(query_bundle), streaming=True)
+        nodes = await asyncio.to_thread(engine.retrieve, query_bundle)
+        response = await engine.asynthesize(query_bundle, nodes)
+        async for token in response.async_response_gen():
+            yield token
+
+
+@cache
+def get_travel_guide_rag() -> TravelGuideRAG:
+    return TravelGuideRAG(
+        store_path=SETTINGS.travel_guide_store_path,
+        data_dir=SETTINGS.travel_guide_data_path,
+        qa_prompt_tpl=travel_guide_qa_tpl,
+    )
+
+
+def warm_up():
+    """Load the embedding model and the travel guide index ahead of the first request."""
+    get_travel_guide_rag().warm_up()
@@ -0,0 +1,210 @@
+import math
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import date
+from functools import cache
+from itertools import accumulate
+from typing import Any, NamedTuple
+from ai_assistant.cities import normalize_city
+from ai_assistant.storage import (
+    RESERVATION_MODELS,
+    ReservationStore,
+    get_reservation_store,
+    record_city,
+    record_date,
+    record_type,
+)
+
+
+class DateIndex:
+    """
+    (date, position) keys of some reservations in date order, with their
+    costs alongside and the prefix sums of those, so the total cost of any
+    span is the difference of two of them.
+    """
+
+    def __init__(self):
+        self.keys: list[tuple[str, int]] = []
+        self.costs: list[int] = []
+        self._prefix: list[int] = [0]  # _prefix[i] == sum(costs[:i]), up to _stale_from
+        self._stale_from: int | None = None
+
+    @classmethod
+    def build(cls, entries: list[tuple[tuple[str, int], int]]) -> "DateIndex":
+        """
+        An index of (key, cost) `entries`, listed in booking order: one sort
+        and one pass for the prefix sums.
+        """
+        entries.sort(key=lambda entry: entry[0][0])  # stable: booking order within a date
+        index = cls()
+        index.keys = [key for key, _ in entries]
+        index.costs = [cost for _, cost in entries]
+        index._prefix = list(accumulate(index.costs, initial=0))
+        return index
+
+    def add(self, key: tuple[str, int], cost: int):
+        # For records stored after the index was built. Reservations are
+        # mostly booked for upcoming dates, so this is usually an append,
+        # which extends the prefix sums too; otherwise a memmove of the tail,
+        # and the prefix sums from there are rebuilt by the next `cost` (once
+        # for a whole batch of inserts).
+        i = bisect_right(self.keys, key)
+        self.keys.insert(i, key)
+        self.costs.insert(i, cost)
+        if self._stale_from is None and i == len(self._prefix) - 1:
+            self._prefix.append(self._prefix[-1] + cost)
+        else:
+            self._stale_from = i if self._stale_from is None else min(self._stale_from, i)
+
+    def cost(self, lo: int, hi: int) -> int:
+        """Total cost of the keys in the slice [lo, hi)."""
+        if self._stale_from is not None:
+            start = self._stale_from
+            self._prefix[start:] = accumulate(self.costs[start:], initial=self._prefix[start])
+            self._stale_from = None
+        return self._prefix[hi] - self._prefix[lo]
+
+    def span(self, start: str, end: str | None) -> tuple[int, int]:
+        """Slice of the keys dated from `start` through `end` (inclusive)."""
+        lo = bisect_left(self.keys, (start,))
+        hi = len(self.keys) if end is None else bisect_right(self.keys, (end, math.inf))
+        return lo, max(lo, hi)
+
+
+class ReservationPage(NamedTuple):
+    reservations: list[dict]
+    next_cursor: str | None  # pass back as `cursor` for the next page; None on the last one
+    count: int  # reservations matching the filters, over every page
+    total_cost: int
+    by_type: dict[str, dict[str, int]]
+
+
+class ReservationIndex:
+    """
+    In-memory secondary indexes over the reservation store, for filtered,
+    paginated reads without scanning the store.
+
+    Every reservation is numbered in booking order and indexed by date, in
+    one date index per (type, city) combination, either of which may be
+    "any". A query bisects the index of its filters for the date range, so a
+    page costs O(log n + page size); the range's count is the size of that
+    slice and its total cost the difference of two prefix sums. Pages are in
+    date order, then booking order. The indexes hold where each reservation
+    is stored (a log offset or row id), not the reservation: a page's
+    reservations are fetched from the store.
+
+    Like TripSummary, `refresh` folds in only the records stored since the
+    last call. The first one, and any that reads the store from the start
+    (e.g. a compacted log), builds the indexes with one sort each; cursors
+    handed out before then no longer apply. Until then `built` is False.
+    """
+
+    def __init__(self, store: ReservationStore):
+        self.store = store
+        self._lock = threading.Lock()
+        self._cursor: Any = None
+        self.built = False
+        self._locations: list = []
+        self._indexes: dict[tuple[str | None, str | None], DateIndex] = {}
+
+    @staticmethod
+    def _entries(record: dict, position: int):
+        key = (record_date(record) or "", position)
+        kind, city = record_type(record), record_city(record)
+        city = normalize_city(city) if city else None
+        for index_key in {(None, None), (kind, None), (None, city), (kind, city)}:
+            yield index_key, key, record.get("cost", 0)
+
+    def _build(self, records: list[dict], locations: list):
+        entries: dict[tuple[str | None, str | None], list] = {}
+        for position, record in enumerate(records):
+            for index_key, key, cost in self._entries(record, position):
+                entries.setdefault(index_key, []).append((key, cost))
+        self._locations = list(locations)
+        self._indexes = {index_key: DateIndex.build(index_entries) for index_key, index_entries in entries.items()}
+
+    def add(self, record: dict, location):
+        position = len(self._locations)
+        self._locations.append(location)
+        for index_key, key, cost in self._entries(record, position):
+            index = self._indexes.get(index_key)
+            if index is None:
+                index = self._indexes[index_key] = DateIndex()
+            index.add(key, cost)
+
+    def refresh(self):
+        with self._lock:
+            changes = self.store.records_since(self._cursor)
+            self._cursor = changes.cursor
+            if changes.restarted:
+                self._build(changes.records, changes.locations)
+            else:
+                for record, location in zip(changes.records, changes.locations):
+                    self.add(record, location)
+            self.built = True
+
+    def query(
+        self,
+        reservation_type: str | None = None,
+        city: str | None = None,
+        start_date: date | None = None,
+        end_date: date | None = None,
+        cursor: str | None = None,
+        limit: int = 50,
+    ) -> ReservationPage:
+        """
+        One page of the reservations matching the filters (an inclusive date
+        range, a type, a city compared ignoring case and accents), starting
+        after `cursor`, with the count and costs of all matching reservations.
+        Raises ValueError for a malformed cursor.
+        """
+        city = normalize_city(city) if city else None
+        # Undated reservations sort first (""); any date filter leaves them out.
+        start = start_date.isoformat() if start_date else ("0" if end_date else "")
+        end = end_date.isoformat() if end_date else None
+        after = parse_cursor(cursor) if cursor else None
+        types = [reservation_type] if reservation_type else list(RESERVATION_MODELS)
+
+        with self._lock:
+            index = self._indexes.get((reservation_type, city), DateIndex())
+            lo, hi = index.span(start, end)
+            first = max(lo, bisect_right(index.keys, after)) if after else lo
+            keys = index.keys[first:min(hi, first + limit)]
+            locations = [self._locations[position] for _, position in keys]
+            by_type = {}
+            for kind in types:
+                typed = self._indexes.get((kind, city))
+                if typed is None:
+                    continue
+                typed_lo, typed_hi = typed.span(start, end)
+                if typed_hi > typed_lo:
+                    by_type[kind] = {"count": typed_hi - typed_lo, "total_cost": typed.cost(typed_lo, typed_hi)}
+
+        reservations = self.store.fetch(locations)
+        next_cursor = format_cursor(keys[-1]) if keys and first + len(keys) < hi else None
+        return ReservationPage(
+            reservations=reservations,
+            next_cursor=next_cursor,
+            count=hi - lo,
+            total_cost=sum(kind["total_cost"] for kind in by_type.values()),
+            by_type=by_type,
+        )
+
+    def __len__(self) -> int:
+        return len(self._locations)
+
+
+def format_cursor(key: tuple[str, int]) -> str:
+    return f"{key[0]}:{key[1]}"
+
+
+def parse_cursor(cursor: str) -> tuple[str, int]:
+    day, _, position = cursor.rpartition(":")
+    if not position.isdigit():
+        raise ValueError(f"Invalid cursor: {cursor!r}")
+    return day, int(position)
+
+
+@cache
+def get_reservation_index() -> ReservationIndex:
+    return ReservationIndex(get_reservation_store())
@@ -0,0 +1,338 @@
+import os
+import sys
+import json
+import time
+import atexit
+import argparse
+import threading
+from functools import cache
+from typing import Iterator
+from ai_assistant.config import get_agent_settings
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the in-process lock is available
+    fcntl = None
+
+SETTINGS = get_agent_settings()
+
+
+class ReservationLog:
+    """
+    Append-only JSON-Lines reservation log.
+
+    Every reservation is a single line appended under an exclusive file lock,
+    so concurrent writers (threads or uvicorn workers) never lose records and
+    each write costs O(1) regardless of the size of the trip. Durability is
+    batched: the file is fsync'ed every `fsync_batch` appends, and appends
+    not synced by then are synced at most `fsync_interval` seconds later by a
+    background timer, even if no other append follows.
+    """
+
+    def __init__(self, path: str, fsync_batch: int = 16, fsync_interval: float = 1.0):
+        self.path = path
+        self.fsync_batch = fsync_batch
+        self.fsync_interval = fsync_interval
+        self._lock = threading.Lock()
+        self._fd: int | None = None
+        self._pending = 0
+        self._last_sync = time.monotonic()
+        self._timer: threading.Timer | None = None
+
+    def _open(self) -> int:
+        if self._fd is None:
+            if is_legacy_array(self.path):
+                raise ValueError(
+                    f"{self.path} is a JSON array log. Convert it first with "
+                    f"`python -m ai_assistant.reservation_log migrate {self.path} <output>.jsonl`."
+                )
+            self._fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            atexit.register(self.close)
+        return self._fd
+
+    def append(self, record: dict):
+        self.append_many([record])
+
+    def append_many(self, records: list[dict]):
+        """
+        Append `records` with a single write under the file lock. If the write
+        fails part-way the log is truncated back, so either every record is
+        in the log or none is.
+        """
+        if not records:
+            return
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode("utf-8")
+        with self._lock:
+            fd = self._open()
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            try:
+                size = os.fstat(fd).st_size
+                try:
+                    if os.write(fd, data) != len(data):
+                        raise OSError(f"short write to {self.path}")
+                except OSError:
+                    os.ftruncate(fd, size)
+                    raise
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_UN)
+            self._pending += len(records)
+            if (
+                self._pending >= self.fsync_batch
+                or time.monotonic() - self._last_sync >= self.fsync_interval
+            ):
+                self._sync()
+            elif self._timer is None:
+                self._timer = threading.Timer(
+                    max(0.0, self.fsync_interval - (time.monotonic() - self._last_sync)), self._timed_sync
+                )
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _timed_sync(self):
+        with self._lock:
+            self._timer = None
+            self._sync()
+
+    def _sync(self):
+        if self._fd is not None and self._pending:
+            os.fsync(self._fd)
+        self._pending = 0
+        self._last_sync = time.monotonic()
+
+    def flush(self):
+        with self._lock:
+            self._sync()
+
+    def close(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._fd is not None:
+                self._sync()
+                os.close(self._fd)
+                self._fd = None
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter_records(self.path)
+
+
+def is_legacy_array(path: str) -> bool:
+    if not os.path.exists(path):
+        return False
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            stripped = line.lstrip()
+            if stripped:
+                return stripped.startswith("[")
+    return False
+
+
+# What may follow a complete element of a JSON array.
+VALUE_END = frozenset(" \t\r\n,]")
+
+
+def iter_json_array(file, chunk_size: int = 1 << 16) -> Iterator:
+    """
+    Yield the elements of the JSON array in text `file` one at a time, reading
+    it `chunk_size` characters at a time instead of loading it whole.
+    """
+    decoder = json.JSONDecoder()
+    buffer, pos, eof, started = "", 0, False, False
+    empty = True  # nothing read since the "[": it may close right away
+    after_value = False  # an element was read: a "," or the closing "]" comes next
+    while True:
+        while pos < len(buffer) and buffer[pos].isspace():
+            pos += 1
+        if pos < len(buffer):
+            if not started:
+                if buffer[pos] != "[":
+                    raise ValueError("not a JSON array")
+                started, pos = True, pos + 1
+                continue
+            if buffer[pos] == "]" and (after_value or empty):
+                return
+            if after_value:
+                if buffer[pos] != ",":
+                    raise ValueError(f"expected ',' or ']' in JSON array, got {buffer[pos]!r}")
+                after_value, pos = False, pos + 1
+                continue
+            empty = False
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            else:
+                # A number may be cut short by the chunk boundary ("2" of "2.5"):
+                # accept a value only once what follows it shows it ended.
+                if eof or (end < len(buffer) and buffer[end] in VALUE_END):
+                    yield value
+                    pos, after_value = end, True
+                    continue
+        if eof:
+            if started:
+                raise ValueError("unterminated JSON array")
+            return
+        chunk = file.read(chunk_size)
+        eof = not chunk
+        buffer, pos = buffer[pos:] + chunk, 0
+
+
+def iter_records(path: str, needles: tuple[str, ...] = ()) -> Iterator[dict]:
+    """
+    Stream the records of a reservation log one at a time.
+    JSON-Lines logs are read line by line; a torn trailing line left by a
+    crashed writer is skipped, and lines missing any of `needles` are
+    skipped without being parsed. Legacy `trip.json` arrays are parsed
+    incrementally.
+    """
+    if not os.path.exists(path):
+        return
+    if is_legacy_array(path):
+        with open(path, "r", encoding="utf-8") as file:
+            yield from iter_json_array(file)
+        return
+
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            if not line.strip():
+                continue
+            if needles and not all(needle in line for needle in needles):
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                print(f"skipping corrupt reservation log line: {line!r}")
+
+
+def read_from(
+    path: str, cursor: tuple[int, int] | None = None, offsets: list[int] | None = None
+) -> tuple[list[dict], tuple[int, int] | None, bool]:
+    """
+    Records appended to a JSON-Lines log since `cursor` (an (inode, byte
+    offset) pair returned by a previous call; None reads from the start), the
+    cursor to resume from, and whether the log was read from the start.
+    Only complete lines are consumed, so a record being written right now is
+    picked up by the next call. A compacted or truncated log is read again
+    from the start; legacy arrays are always read whole.
+    If `offsets` is given, the byte offset of each record's line (its
+    position, in a legacy array) is appended to it, for `read_at`.
+    """
+    if not os.path.exists(path):
+        return [], None, True
+    if is_legacy_array(path):
+        records = list(iter_records(path))
+        if offsets is not None:
+            offsets.extend(range(len(records)))
+        return records, None, True
+
+    records = []
+    with open(path, "rb") as file:
+        stat = os.fstat(file.fileno())
+        offset = cursor[1] if cursor is not None and cursor[0] == stat.st_ino else 0
+        if offset > stat.st_size:
+            offset = 0
+        restarted = offset == 0
+        file.seek(offset)
+        for line in file:
+            if not line.endswith(b"\n"):
+                break
+            start, offset = offset, offset + len(line)
+            if not line.strip():
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                print(f"skipping corrupt reservation log line: {line!r}")
+                continue
+            if offsets is not None:
+                offsets.append(start)
+    return records, (stat.st_ino, offset), restarted
+
+
+def read_at(path: str, offsets: list[int]) -> list[dict]:
+    """The records at `offsets` (as filled in by `read_from`), in that order."""
+    if not offsets:
+        return []
+    if is_legacy_array(path):
+        wanted = set(offsets)
+        found = {position: record for position, record in enumerate(iter_records(path)) if position in wanted}
+        return [found[position] for position in offsets]
+    records = []
+    with open(path, "rb") as file:
+        for offset in offsets:
+            file.seek(offset)
+            records.append(json.loads(file.readline()))
+    return records
+
+
+def migrate(source: str, target: str) -> int:
+    """Convert a JSON array log (the old trip.json format) into a JSON-Lines log."""
+    count = 0
+    tmp_path = f"{target}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as out:
+        for record in iter_records(source):
+            out.write(json.dumps(record, ensure_ascii=False) + "\n")
+            count += 1
+        out.flush()
+        os.fsync(out.fileno())
+    os.replace(tmp_path, target)
+    return count
+
+
+def compact(path: str) -> int:
+    """
+    Rewrite a JSON-Lines log dropping blank and corrupt lines.
+    Run it with the API stopped: writers that already hold the old file open
+    would keep appending to the replaced inode.
+    """
+    count = 0
+    tmp_path = f"{path}.tmp"
+    with open(path, "a", encoding="utf-8") as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            for record in iter_records(path):
+                out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                count += 1
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, path)
+    return count
+
+
+@cache
+def get_reservation_log(path: str) -> ReservationLog:
+    """The process's writer for the log at `path`, shared by every store on it."""
+    return ReservationLog(
+        path,
+        fsync_batch=SETTINGS.log_fsync_batch,
+        fsync_interval=SETTINGS.log_fsync_interval,
+    )
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Reservation log maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    migrate_cmd = commands.add_parser("migrate", help="convert a trip.json array into a JSON-Lines log")
+    migrate_cmd.add_argument("source")
+    migrate_cmd.add_argument("target")
+
+    compact_cmd = commands.add_parser("compact", help="drop blank and corrupt lines from a JSON-Lines log")
+    compact_cmd.add_argument("path", nargs="?", default=SETTINGS.log_file)
+
+    args = parser.parse_args(argv)
+    if args.command == "migrate":
+        count = migrate(args.source, args.target)
+        print(f"migrated {count} reservations from {args.source} to {args.target}")
+    else:
+        count = compact(args.path)
+        print(f"compacted {args.path}: {count} reservations")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+import time
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import cache
+from typing import Iterator
+from llama_index.core.agent import ReActAgent
+from llama_index.core.memory import ChatSummaryMemoryBuffer
+from ai_assistant.config import get_agent_settings
+from ai_assistant.rags import get_llm
+
+SETTINGS = get_agent_settings()
+
+
+@dataclass
+class Session:
+    memory: ChatSummaryMemoryBuffer
+    last_used: float = field(default_factory=time.monotonic)
+    tokens: int = 0
+
+
+class SessionManager:
+    """
+    Per-session conversation memory for pooled agents.
+
+    Each session keeps a ChatSummaryMemoryBuffer: once its history passes
+    `token_limit` tokens, the oldest turns are summarized by the LLM, so the
+    prompt of every turn stays bounded. Sessions idle for `idle_timeout`
+    seconds are dropped, and the least recently used ones are evicted when
+    there are more than `max_sessions` or their histories add up to more than
+    `total_token_budget` tokens.
+    """
+
+    def __init__(self, token_limit: int, idle_timeout: float, max_sessions: int, total_token_budget: int):
+        self.token_limit = token_limit
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.total_token_budget = total_token_budget
+        self._sessions: OrderedDict[str, Session] = OrderedDict()
+        self._lock = threading.Lock()
+        self._total_tokens = 0
+        self._evictions = 0
+
+    def _evict(self, keep: str | None = None):
+        now = time.monotonic()
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            over_limit = (
+                len(self._sessions) > self.max_sessions
+                or self._total_tokens > self.total_token_budget
+                or now - session.last_used > self.idle_timeout
+            )
+            if not over_limit or session_id == keep:
+                break
+            del self._sessions[session_id]
+            self._total_tokens -= session.tokens
+            self._evictions += 1
+
+    def get(self, session_id: str) -> Session:
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is None:
+                memory = ChatSummaryMemoryBuffer.from_defaults(llm=get_llm(), token_limit=self.token_limit)
+                session = self._sessions[session_id] = Session(memory)
+            session.last_used = time.monotonic()
+            self._sessions.move_to_end(session_id)
+            self._evict(keep=session_id)
+            return session
+
+    def _account(self, session_id: str, session: Session):
+        messages = session.memory.get_all()
+        text = " ".join(str(message.content) for message in messages)
+        tokens = len(session.memory.tokenizer_fn(text)) if text else 0
+        with self._lock:
+            if self._sessions.get(session_id) is session:
+                self._total_tokens += tokens - session.tokens
+                session.tokens = tokens
+                session.last_used = time.monotonic()
+                self._evict(keep=session_id)
+
+    @contextmanager
+    def attach(self, agent: ReActAgent, session_id: str) -> Iterator[Session]:
+        """Run `agent` with the session's memory, restoring the agent's own memory afterwards."""
+        session = self.get(session_id)
+        own_memory = agent.memory
+        agent.memory = session.memory
+        try:
+            yield session
+        finally:
+            # The pool resets the agent's memory on checkout; that must never
+            # be the session's.
+            agent.memory = own_memory
+            self._account(session_id, session)
+
+    def drop(self, session_id: str):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is not None:
+                self._total_tokens -= session.tokens
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "sessions": len(self._sessions),
+                "max_sessions": self.max_sessions,
+                "total_tokens": self._total_tokens,
+                "total_token_budget": self.total_token_budget,
+                "evictions": self._evictions,
+            }
+
+
+@cache
+def get_session_manager() -> SessionManager:
+    return SessionManager(
+        token_limit=SETTINGS.session_token_limit,
+        idle_timeout=SETTINGS.session_idle_timeout,
+        max_sessions=SETTINGS.max_sessions,
+        total_token_budget=SETTINGS.session_total_token_budget,
+    )
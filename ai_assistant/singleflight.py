@@ -0,0 +1,89 @@
+import asyncio
+from functools import cache
+from typing import Awaitable, Callable, Hashable, TypeVar
+from ai_assistant.config import get_agent_settings
+
+SETTINGS = get_agent_settings()
+
+T = TypeVar("T")
+
+
+class LeaderCancelled(Exception):
+    """The call followers were waiting on was cancelled (its client went away)."""
+
+
+def _retrieve(future: asyncio.Future):
+    # A failed flight nobody followed must not log "exception never retrieved".
+    if not future.cancelled():
+        future.exception()
+
+
+class SingleFlight:
+    """
+    Coalesces identical in-flight calls within one event loop.
+
+    The first caller of a key (the leader) runs the call; callers of the same
+    key arriving while it runs (followers) wait for the leader's result, or
+    get its exception, instead of running it again. Followers wait at most
+    `timeout` seconds (per call, overridable per key). If the leader is
+    cancelled, its followers retry and one of them leads the next flight.
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self._flights: dict[Hashable, asyncio.Future] = {}
+        self._leaders = 0
+        self._coalesced = 0
+        self._errors = 0
+        self._timeouts = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]], timeout: float | None = None) -> T:
+        while True:
+            future = self._flights.get(key)
+            if future is None:
+                return await self._lead(key, fn)
+            self._coalesced += 1
+            try:
+                return await asyncio.wait_for(asyncio.shield(future), timeout or self.timeout)
+            except LeaderCancelled:
+                continue
+            except TimeoutError:
+                if not future.done():
+                    self._timeouts += 1
+                raise
+
+    async def _lead(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        future = asyncio.get_running_loop().create_future()
+        future.add_done_callback(_retrieve)
+        self._flights[key] = future
+        self._leaders += 1
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.set_exception(LeaderCancelled())
+            raise
+        except Exception as e:
+            self._errors += 1
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._flights[key]
+
+    def stats(self) -> dict:
+        calls = self._leaders + self._coalesced
+        return {
+            "in_flight": len(self._flights),
+            "leaders": self._leaders,
+            "coalesced": self._coalesced,
+            "errors": self._errors,
+            "timeouts": self._timeouts,
+            "coalesced_rate": self._coalesced / calls if calls else 0.0,
+        }
+
+
+@cache
+def get_singleflight() -> SingleFlight:
+    return SingleFlight(timeout=SETTINGS.singleflight_timeout)
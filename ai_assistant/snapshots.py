@@ -0,0 +1,220 @@
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+from dataclasses import dataclass, field
+from functools import cache
+from llama_index.core.schema import QueryBundle
+from llama_index.core.storage.docstore import BaseDocumentStore, SimpleDocumentStore
+from ai_assistant.cities import canonical_city, extract_cities
+from ai_assistant.config import get_agent_settings
+from ai_assistant.prompts import recommendation_prompts, travel_guide_qa_tpl
+from ai_assistant.rags import CITIES_KEY, TravelGuideRAG, get_travel_guide_rag, on_ingest, store_version
+
+SETTINGS = get_agent_settings()
+
+SNAPSHOT_VERSION = 1
+CITY_ENDPOINTS = ("hotels", "activities")
+OVERVIEW = ""  # key of the /recommendations/cities answer, which has no city
+
+
+def _docstore(store_path: str) -> SimpleDocumentStore | None:
+    if not os.path.exists(os.path.join(store_path, "docstore.json")):
+        return None
+    return SimpleDocumentStore.from_persist_dir(store_path)
+
+
+def content_hash(docstore: BaseDocumentStore) -> str:
+    """Hash of the guide documents in the store (their ids and content hashes)."""
+    digest = hashlib.sha256()
+    for doc_id, doc_hash in sorted((doc_id, doc_hash) for doc_hash, doc_id in docstore.get_all_document_hashes().items()):
+        digest.update(f"{doc_id}\0{doc_hash}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def store_content_hash(store_path: str) -> str | None:
+    docstore = _docstore(store_path)
+    return content_hash(docstore) if docstore is not None else None
+
+
+def guide_cities(docstore: BaseDocumentStore) -> list[str]:
+    """Cities (and departments) the chunks in the store are about, in guide order."""
+    found: dict[str, None] = {}
+    for node in docstore.docs.values():
+        cities = node.metadata.get(CITIES_KEY)
+        if cities is None:
+            # chunk stored before chunks were tagged
+            cities = extract_cities(node.get_content())
+        found.update(dict.fromkeys(cities))
+    return list(found)
+
+
+@dataclass
+class Snapshot:
+    """Recommendations without notes, per endpoint and city, for one version of the store."""
+
+    store_hash: str
+    recommendations: dict[str, dict[str, str]]
+    created_at: float = field(default_factory=time.time)
+
+    def get(self, endpoint: str, city: str | None) -> str | None:
+        key = OVERVIEW if city is None else canonical_city(city)
+        if key is None:
+            return None
+        return self.recommendations.get(endpoint, {}).get(key)
+
+    def save(self, path: str):
+        snapshot = {
+            "version": SNAPSHOT_VERSION,
+            "store_hash": self.store_hash,
+            "created_at": self.created_at,
+            "recommendations": self.recommendations,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(snapshot, file, ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> "Snapshot | None":
+        """The snapshot at `path`, or None if there is none or it has another format version."""
+        try:
+            with open(path, "r", encoding="utf-8") as file:
+                snapshot = json.load(file)
+        except FileNotFoundError:
+            return None
+        if snapshot.get("version") != SNAPSHOT_VERSION:
+            return None
+        return cls(snapshot["store_hash"], snapshot["recommendations"], snapshot["created_at"])
+
+
+async def generate(rag: TravelGuideRAG, workers: int) -> Snapshot:
+    """
+    Answer every recommendation endpoint without notes (the overview of
+    cities, then hotels and activities per city in the store) the way the
+    endpoints' direct mode does, running up to `workers` queries at once.
+    Like LazyQueryEngine's async queries, each builds its engine and
+    retrieves in a worker thread and only synthesizes on the event loop, so
+    a refresh inside the API doesn't stall the requests it is serving.
+    """
+    index = await asyncio.to_thread(lambda: rag.index)  # loads (or ingests) the store
+    docstore = index.docstore
+    cities = guide_cities(docstore)
+    limiter = asyncio.Semaphore(workers)
+
+    async def answer(endpoint: str, city: str | None) -> tuple[str, str, str]:
+        prompt = recommendation_prompts[endpoint].format(city=city, notes="no specific notes")
+        query_bundle = QueryBundle(prompt)
+        async with limiter:
+            engine = await asyncio.to_thread(rag.get_query_engine, city)
+            nodes = await asyncio.to_thread(engine.retrieve, query_bundle)
+            response = await engine.asynthesize(query_bundle, nodes)
+        return endpoint, city or OVERVIEW, str(response)
+
+    jobs = [answer("cities", None)] + [answer(endpoint, city) for city in cities for endpoint in CITY_ENDPOINTS]
+    recommendations: dict[str, dict[str, str]] = {}
+    for endpoint, city, text in await asyncio.gather(*jobs):
+        recommendations.setdefault(endpoint, {})[city] = text
+    return Snapshot(content_hash(docstore), recommendations)
+
+
+class SnapshotStore:
+    """
+    The snapshot the API serves. `refresh()` regenerates it when the store's
+    content hash no longer matches (e.g. after `ai_assistant.ingest`).
+
+    The snapshot is checked against the store's content hash when it is
+    loaded and when it is written, and only served while the store's
+    `store_version` (the docstore's mtime and size, one stat() per lookup)
+    is the one that check saw: after a re-ingest, by this process or another,
+    nothing is served until `refresh()` has caught up with the store.
+    """
+
+    def __init__(self, path: str, rag: TravelGuideRAG, workers: int):
+        self.path = path
+        self.rag = rag
+        self.workers = workers
+        self._verified: tuple[int, int] | None = None
+        self.snapshot = Snapshot.load(path)
+        self.verify()
+        on_ingest(self.invalidate)
+
+    def get(self, endpoint: str, city: str | None) -> str | None:
+        snapshot = self.snapshot
+        if snapshot is None or store_version(self.rag.store_path) != self._verified:
+            return None
+        return snapshot.get(endpoint, city)
+
+    def invalidate(self):
+        self.snapshot = None
+
+    def verify(self) -> bool:
+        """
+        True if the snapshot matches the store's content hash, and remember
+        the store version that was; otherwise drop the snapshot.
+        """
+        snapshot = self.snapshot
+        # taken before hashing, so a write racing the hash changes it again
+        version = store_version(self.rag.store_path)
+        if snapshot is not None and snapshot.store_hash == store_content_hash(self.rag.store_path):
+            self._verified = version
+            return True
+        self.snapshot = None
+        return False
+
+    def stale(self) -> bool:
+        return not self.verify()
+
+    async def refresh(self, force: bool = False) -> bool:
+        """Regenerate and save the snapshot if it is missing or stale; True if it was."""
+        if not force and not await asyncio.to_thread(self.stale):
+            return False
+        self.snapshot = None
+        snapshot = await generate(self.rag, self.workers)
+        await asyncio.to_thread(snapshot.save, self.path)
+        self.snapshot = snapshot
+        # not served if the store changed while the snapshot was generated
+        await asyncio.to_thread(self.verify)
+        return True
+
+    def stats(self) -> dict:
+        snapshot = self.snapshot
+        return {
+            "loaded": snapshot is not None,
+            "store_hash": snapshot.store_hash if snapshot else None,
+            "created_at": snapshot.created_at if snapshot else None,
+            "answers": sum(len(answers) for answers in snapshot.recommendations.values()) if snapshot else 0,
+        }
+
+
+@cache
+def get_snapshot_store() -> SnapshotStore:
+    return SnapshotStore(SETTINGS.snapshot_path, get_travel_guide_rag(), SETTINGS.snapshot_workers)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(
+        description="Precompute the recommendations without notes for every city in the travel guide store."
+    )
+    parser.add_argument("--store-path", default=SETTINGS.travel_guide_store_path)
+    parser.add_argument("--data-dir", default=SETTINGS.travel_guide_data_path)
+    parser.add_argument("--output", default=SETTINGS.snapshot_path)
+    parser.add_argument("--workers", type=int, default=SETTINGS.snapshot_workers, help="queries run at once")
+    parser.add_argument("--if-stale", action="store_true", help="only regenerate when the store's content changed")
+    args = parser.parse_args(argv)
+
+    rag = TravelGuideRAG(store_path=args.store_path, data_dir=args.data_dir, qa_prompt_tpl=travel_guide_qa_tpl)
+    store = SnapshotStore(args.output, rag, args.workers)
+    start = time.perf_counter()
+    if not asyncio.run(store.refresh(force=not args.if_stale)):
+        print(f"{args.output} is up to date with {args.store_path}")
+        return
+    stats = store.stats()
+    print(f"wrote {stats['answers']} recommendations to {args.output} in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
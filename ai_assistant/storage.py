@@ -0,0 +1,301 @@
+import sys
+import heapq
+import argparse
+from abc import ABC, abstractmethod
+from datetime import date, datetime, time, timedelta
+from functools import cache
+from typing import Any, Iterator, NamedTuple
+from ai_assistant.cities import normalize_city
+from ai_assistant.config import get_agent_settings
+from ai_assistant.models import (
+    RestaurantReservation,
+    TripReservation,
+    HotelReservation,
+)
+from ai_assistant.reservation_log import get_reservation_log, iter_records, read_at, read_from
+from ai_assistant.tables import DB, TripReservationTable, RESERVATION_TABLES
+
+SETTINGS = get_agent_settings()
+
+Reservation = TripReservation | HotelReservation | RestaurantReservation
+
+RESERVATION_MODELS: dict[str, type[Reservation]] = {
+    "TripReservation": TripReservation,
+    "HotelReservation": HotelReservation,
+    "RestaurantReservation": RestaurantReservation,
+}
+
+# A key only records of that type have (older logs may lack `reservation_type`).
+TYPE_KEYS = {
+    "TripReservation": "trip_type",
+    "HotelReservation": "checkin_date",
+    "RestaurantReservation": "reservation_time",
+}
+
+
+def to_record(reservation: Reservation) -> dict:
+    record = reservation.model_dump(mode="json")
+    record["reservation_type"] = reservation.__class__.__name__
+    return record
+
+
+def record_type(record: dict) -> str:
+    if record.get("reservation_type"):
+        return record["reservation_type"]
+    if record.get("trip_type"):
+        return "TripReservation"
+    return "HotelReservation" if record.get("checkin_date") else "RestaurantReservation"
+
+
+def record_city(record: dict) -> str | None:
+    if record.get("reservation_type") == "TripReservation" or record.get("trip_type"):
+        return record.get("destination")
+    return record.get("city")
+
+
+def record_date(record: dict) -> str | None:
+    value = record.get("date") or record.get("checkin_date") or record.get("reservation_time")
+    return value.split("T")[0] if value else None
+
+
+def matches(
+    record: dict,
+    reservation_type: str | None = None,
+    city: str | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> bool:
+    if reservation_type is not None and record_type(record) != reservation_type:
+        return False
+    if city is not None and normalize_city(record_city(record) or "") != normalize_city(city):
+        return False
+    if start_date is not None or end_date is not None:
+        day = record_date(record)
+        if day is None:
+            return False
+        if start_date is not None and day < start_date.isoformat():
+            return False
+        if end_date is not None and day > end_date.isoformat():
+            return False
+    return True
+
+
+class StoreChanges(NamedTuple):
+    records: list[dict]
+    cursor: Any
+    restarted: bool  # `records` is the whole store rather than what followed the cursor
+    locations: list  # where each record is stored, for `fetch`
+
+
+class ReservationStore(ABC):
+    @abstractmethod
+    def save(self, reservation: Reservation):
+        pass
+
+    @abstractmethod
+    def save_many(self, reservations: list[Reservation]):
+        """Persist `reservations` in one write: either all of them are stored or none is."""
+
+    @abstractmethod
+    def iter_records(
+        self,
+        reservation_type: str | None = None,
+        city: str | None = None,
+        start_date: date | None = None,
+        end_date: date | None = None,
+    ) -> Iterator[dict]:
+        """
+        Yield stored reservations as log records (dicts with a `reservation_type`
+        key), optionally filtered by type, city and an inclusive date range.
+        The city of a trip is its destination; cities match ignoring case and accents.
+        """
+
+    @abstractmethod
+    def records_since(self, cursor: Any = None) -> StoreChanges:
+        """
+        Records stored after `cursor` (every record when it is None) in booking
+        order, and the cursor to pass next time to get only newer records.
+        """
+
+    @abstractmethod
+    def fetch(self, locations: list) -> list[dict]:
+        """The records at `locations` (from `records_since`), in that order."""
+
+
+class JsonLinesStore(ReservationStore):
+    def __init__(self, path: str):
+        self.path = path
+        self.log = get_reservation_log(path)
+
+    def save(self, reservation: Reservation):
+        self.log.append(to_record(reservation))
+
+    def save_many(self, reservations: list[Reservation]):
+        self.log.append_many([to_record(reservation) for reservation in reservations])
+
+    def iter_records(self, reservation_type=None, city=None, start_date=None, end_date=None):
+        # A cheap substring check on the raw line skips records of other
+        # types before they are parsed; `matches` then decides exactly. There
+        # is no city needle: cities match ignoring case and accents.
+        needles = (f'"{TYPE_KEYS[reservation_type]}"',) if reservation_type is not None else ()
+        for record in iter_records(self.path, needles):
+            if matches(record, reservation_type, city, start_date, end_date):
+                yield record
+
+    def records_since(self, cursor=None):
+        # locations are byte offsets in the log
+        offsets: list[int] = []
+        return StoreChanges(*read_from(self.path, cursor, offsets), offsets)
+
+    def fetch(self, locations):
+        return read_at(self.path, locations)
+
+
+class SQLiteStore(ReservationStore):
+    """
+    Reservation store backed by the piccolo tables in `ai_assistant.tables`.
+    City, date and trip type are indexed, so filtered reads are index lookups,
+    and the database runs in WAL mode so several workers can write at once.
+    Reads fetch `batch_size` rows at a time, resuming after the last
+    (booked_at, id) seen, so they stream in constant memory.
+    """
+
+    def __init__(self, batch_size: int = 500):
+        self.tables = RESERVATION_TABLES
+        self.batch_size = batch_size
+        TripReservationTable.raw("PRAGMA journal_mode=WAL;").run_sync()
+        for table in self.tables.values():
+            table.create_table(if_not_exists=True).run_sync()
+
+    def save(self, reservation: Reservation):
+        table = self.tables[reservation.__class__.__name__]
+        table.insert(table(**reservation.model_dump())).run_sync()
+
+    def save_many(self, reservations: list[Reservation]):
+        rows: dict[str, list] = {}
+        for reservation in reservations:
+            name = reservation.__class__.__name__
+            rows.setdefault(name, []).append(self.tables[name](**reservation.model_dump()))
+        if not rows:
+            return
+        transaction = DB.atomic()
+        transaction.add(*[self.tables[name].insert(*table_rows) for name, table_rows in rows.items()])
+        transaction.run_sync()
+
+    def _spellings(self, table, city_column, city: str) -> list[str]:
+        # Stored names equal to `city` ignoring case and accents; the column
+        # is indexed, so listing its distinct values is cheap.
+        target = normalize_city(city)
+        names = table.select(city_column).distinct().output(as_list=True).run_sync()
+        return [name for name in names if name and normalize_city(name) == target]
+
+    def _query(self, reservation_type: str, city, start_date, end_date, after_id: int = 0):
+        table = self.tables[reservation_type]
+        city_column = table.destination if reservation_type == "TripReservation" else table.city
+        date_column = {
+            "TripReservation": "date",
+            "HotelReservation": "checkin_date",
+            "RestaurantReservation": "reservation_time",
+        }[reservation_type]
+        date_column = getattr(table, date_column)
+        spellings = self._spellings(table, city_column, city) if city is not None else None
+        if spellings == []:
+            return
+        if start_date is not None and reservation_type == "RestaurantReservation":
+            start_date = datetime.combine(start_date, time.min)
+
+        def batch(last: tuple | None):
+            # piccolo's where() adds to the query in place: build a fresh one per batch
+            query = table.select(exclude_secrets=True).order_by(table.booked_at, table.id).limit(self.batch_size)
+            if last is not None:
+                booked_at, row_id = last
+                query = query.where(
+                    (table.booked_at > booked_at) | ((table.booked_at == booked_at) & (table.id > row_id))
+                )
+            if after_id:
+                query = query.where(table.id > after_id)
+            if spellings is not None:
+                query = query.where(city_column.is_in(spellings))
+            if start_date is not None:
+                query = query.where(date_column >= start_date)
+            if end_date is not None:
+                if reservation_type == "RestaurantReservation":
+                    query = query.where(date_column < datetime.combine(end_date + timedelta(days=1), time.min))
+                else:
+                    query = query.where(date_column <= end_date)
+            return query.run_sync()
+
+        model = RESERVATION_MODELS[reservation_type]
+        last = None
+        while True:
+            rows = batch(last)
+            for row in rows:
+                record = to_record(model.model_validate(row))
+                yield row["booked_at"], row["id"], record
+            if len(rows) < self.batch_size:
+                return
+            last = rows[-1]["booked_at"], rows[-1]["id"]
+
+    def iter_records(self, reservation_type=None, city=None, start_date=None, end_date=None):
+        types = [reservation_type] if reservation_type else list(self.tables)
+        streams = [self._query(name, city, start_date, end_date) for name in types]
+        for _, _, record in heapq.merge(*streams, key=lambda item: (item[0], item[1])):
+            yield record
+
+    def records_since(self, cursor=None):
+        # The cursor is the last row id seen in each table; locations are
+        # (table, row id) pairs.
+        restarted = not cursor
+        cursor = dict(cursor or {})
+        streams = []
+        for name in self.tables:
+            rows = [
+                (booked_at, row_id, record, (name, row_id))
+                for booked_at, row_id, record in self._query(name, None, None, None, after_id=cursor.get(name, 0))
+            ]
+            if rows:
+                cursor[name] = max(row_id for _, row_id, _, _ in rows)
+            streams.append(rows)
+        merged = list(heapq.merge(*streams, key=lambda item: (item[0], item[1])))
+        return StoreChanges(
+            [record for _, _, record, _ in merged], cursor, restarted, [location for *_, location in merged]
+        )
+
+    def fetch(self, locations):
+        ids: dict[str, list[int]] = {}
+        for name, row_id in locations:
+            ids.setdefault(name, []).append(row_id)
+        found = {}
+        for name, row_ids in ids.items():
+            table, model = self.tables[name], RESERVATION_MODELS[name]
+            for row in table.select(exclude_secrets=True).where(table.id.is_in(row_ids)).run_sync():
+                found[name, row["id"]] = to_record(model.model_validate(row))
+        return [found[location] for location in locations]
+
+
+@cache
+def get_reservation_store() -> ReservationStore:
+    if SETTINGS.reservation_store == "sqlite":
+        return SQLiteStore()
+    if SETTINGS.reservation_store == "jsonl":
+        return JsonLinesStore(SETTINGS.log_file)
+    raise ValueError(f"Unknown reservation store: {SETTINGS.reservation_store}")
+
+
+def import_log(path: str, store: ReservationStore) -> int:
+    """Copy every reservation of a JSON-Lines/JSON log into `store`, in one write."""
+    reservations = [RESERVATION_MODELS[record_type(record)].model_validate(record) for record in iter_records(path)]
+    store.save_many(reservations)
+    return len(reservations)
+
+
+def main(argv: list[str] | None = None):
+    parser = argparse.ArgumentParser(description="Import a reservation log into the configured store")
+    parser.add_argument("path", nargs="?", default=SETTINGS.log_file)
+    args = parser.parse_args(argv)
+    count = import_log(args.path, get_reservation_store())
+    print(f"imported {count} reservations from {args.path} into the {SETTINGS.reservation_store} store")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
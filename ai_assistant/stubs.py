@@ -0,0 +1,210 @@
+import re
+import json
+import time
+import asyncio
+import hashlib
+from typing import Any, Sequence
+import numpy as np
+from llama_index.core.base.embeddings.base import BaseEmbedding, Embedding
+from llama_index.core.llms import (
+    ChatMessage,
+    ChatResponse,
+    ChatResponseAsyncGen,
+    ChatResponseGen,
+    CompletionResponse,
+    CompletionResponseGen,
+    CustomLLM,
+    LLMMetadata,
+    MessageRole,
+)
+from llama_index.core.llms.callbacks import llm_chat_callback, llm_completion_callback
+from llama_index.core.utils import get_tokenizer
+from ai_assistant.cities import extract_cities
+
+DATE_PATTERN = re.compile(r"\d{4}-\d{2}-\d{2}")
+WORD_PATTERN = re.compile(r"\w+")
+
+
+class StubLLM(CustomLLM):
+    """
+    Deterministic offline LLM for benchmarks and local runs.
+
+    Every call waits `latency` seconds, plus `latency_per_1k_tokens` per
+    thousand prompt tokens (asynchronously in the async methods).
+    In a ReAct loop it picks the tool a request needs from keywords in the
+    user's message (travel guide, reservations, trip summary), calls it with
+    arguments taken from the message, and answers from the tool's observation
+    on the next step; with `use_tools=False` it answers right away. Plain
+    completions (RAG synthesis, memory summaries) echo the start of the prompt
+    context.
+    """
+
+    latency: float = 0.0
+    latency_per_1k_tokens: float = 0.0
+    use_tools: bool = True
+    answer: str = "Visit the Salar de Uyuni and stay in a salt hotel."
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return LLMMetadata(model_name="stub", is_chat_model=True)
+
+    # ReAct policy
+    def _action(self, question: str) -> tuple[str, dict] | None:
+        text = question.lower()
+        cities = extract_cities(question, with_departments=False) or ["La Paz", "Uyuni"]
+        dates = DATE_PATTERN.findall(question) or ["2024-11-01", "2024-11-03"]
+        if any(word in text for word in ("summary", "report", "resumen")):
+            return "generate_trip_summary", {}
+        if any(word in text for word in ("reserve", "book", "reserva")):
+            if "flight" in text or "vuelo" in text:
+                return "reserve_flight", {"date_str": dates[0], "departure": cities[0], "destination": cities[-1]}
+            if "bus" in text:
+                return "reserve_bus", {"date_str": dates[0], "departure": cities[0], "destination": cities[-1]}
+            if "hotel" in text:
+                return "reserve_hotel", {
+                    "checkin_date": dates[0],
+                    "checkout_date": dates[-1],
+                    "hotel_name": "Hotel Stub",
+                    "city": cities[-1],
+                }
+            if "restaurant" in text:
+                return "reserve_restaurant", {
+                    "reservation_time": f"{dates[0]}T20:00:00",
+                    "restaurant": "Restaurante Stub",
+                    "city": cities[-1],
+                }
+        return "travel_guide", {"input": question}
+
+    def _react(self, messages: Sequence[ChatMessage]) -> str:
+        last = messages[-1]
+        if last.role == MessageRole.USER and str(last.content).startswith("Observation:"):
+            observation = " ".join(str(last.content)[len("Observation:"):].split())
+            return f"Thought: I can answer without using any more tools.\nAnswer: {observation[:400]}"
+        action = self._action(str(last.content)) if self.use_tools else None
+        if action is None:
+            return f"Thought: I can answer without using any more tools.\nAnswer: {self.answer}"
+        tool, arguments = action
+        return (
+            "Thought: The current language of the user is: English. I need to use a tool to help me answer the question.\n"
+            f"Action: {tool}\nAction Input: {json.dumps(arguments, ensure_ascii=False)}"
+        )
+
+    def _text(self, prompt: str) -> str:
+        context = prompt.split("---------------------", 2)
+        body = context[1] if len(context) > 1 else prompt
+        return " ".join(body.split())[:400] or self.answer
+
+    @staticmethod
+    def _prompt(messages: Sequence[ChatMessage]) -> str:
+        return " ".join(str(message.content) for message in messages)
+
+    def _respond(self, messages: Sequence[ChatMessage]) -> str:
+        system = str(messages[0].content) if messages and messages[0].role == MessageRole.SYSTEM else ""
+        if "Action Input" in system:
+            return self._react(messages)
+        return self._text(self._prompt(messages))
+
+    def _delay(self, prompt: str) -> float:
+        if not self.latency_per_1k_tokens:
+            return self.latency
+        return self.latency + len(get_tokenizer()(prompt)) / 1000 * self.latency_per_1k_tokens
+
+    @staticmethod
+    def _deltas(text: str):
+        for i, word in enumerate(text.split(" ")):
+            yield word if i == 0 else f" {word}"
+
+    # CustomLLM interface
+    @llm_completion_callback()
+    def complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        time.sleep(self._delay(prompt))
+        return CompletionResponse(text=self._text(prompt))
+
+    @llm_completion_callback()
+    def stream_complete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponseGen:
+        time.sleep(self._delay(prompt))
+        text = ""
+        for delta in self._deltas(self._text(prompt)):
+            text += delta
+            yield CompletionResponse(text=text, delta=delta)
+
+    @llm_completion_callback()
+    async def acomplete(self, prompt: str, formatted: bool = False, **kwargs: Any) -> CompletionResponse:
+        await asyncio.sleep(self._delay(prompt))
+        return CompletionResponse(text=self._text(prompt))
+
+    @llm_chat_callback()
+    def chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        time.sleep(self._delay(self._prompt(messages)))
+        return ChatResponse(message=ChatMessage(role=MessageRole.ASSISTANT, content=self._respond(messages)))
+
+    @llm_chat_callback()
+    async def achat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        await asyncio.sleep(self._delay(self._prompt(messages)))
+        return ChatResponse(message=ChatMessage(role=MessageRole.ASSISTANT, content=self._respond(messages)))
+
+    @llm_chat_callback()
+    def stream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponseGen:
+        time.sleep(self._delay(self._prompt(messages)))
+        text = ""
+        for delta in self._deltas(self._respond(messages)):
+            text += delta
+            yield ChatResponse(message=ChatMessage(role=MessageRole.ASSISTANT, content=text), delta=delta)
+
+    @llm_chat_callback()
+    async def astream_chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponseAsyncGen:
+        await asyncio.sleep(self._delay(self._prompt(messages)))
+        response = self._respond(messages)
+
+        async def gen() -> ChatResponseAsyncGen:
+            text = ""
+            for delta in self._deltas(response):
+                text += delta
+                yield ChatResponse(message=ChatMessage(role=MessageRole.ASSISTANT, content=text), delta=delta)
+
+        return gen()
+
+
+class StubEmbedding(BaseEmbedding):
+    """
+    Deterministic offline embedding: a hashed bag of words (signed feature
+    hashing into `dim` buckets, L2-normalized), so texts sharing words are
+    close and no model has to be downloaded.
+    """
+
+    dim: int = 384
+    latency: float = 0.0
+
+    def __init__(self, **kwargs: Any):
+        kwargs.setdefault("model_name", f"stub-bow-{kwargs.get('dim', 384)}")
+        super().__init__(**kwargs)
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "StubEmbedding"
+
+    def _embed(self, text: str) -> Embedding:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for word in WORD_PATTERN.findall(text.casefold()):
+            digest = hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return (vector / norm if norm else vector).tolist()
+
+    def _get_query_embedding(self, query: str) -> Embedding:
+        time.sleep(self.latency)
+        return self._embed(query)
+
+    async def _aget_query_embedding(self, query: str) -> Embedding:
+        await asyncio.sleep(self.latency)
+        return self._embed(query)
+
+    def _get_text_embedding(self, text: str) -> Embedding:
+        time.sleep(self.latency)
+        return self._embed(text)
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[Embedding]:
+        # One latency per batch, like a real model's forward pass.
+        time.sleep(self.latency)
+        return [self._embed(text) for text in texts]
@@ -0,0 +1,98 @@
+import threading
+from functools import cache
+from typing import Any
+from ai_assistant.storage import ReservationStore, get_reservation_store, record_city, record_date
+
+
+def activity_line(activity: dict) -> str:
+    activity_type = activity.get("trip_type") or activity.get("reservation_type")
+    if activity_type in ["FLIGHT", "BUS"]:
+        details = f"from {activity.get('departure')} to {activity.get('destination')}, Cost: {activity.get('cost')} Bs."
+    elif activity_type == "HotelReservation":
+        details = f"Hotel: {activity.get('hotel_name')}, Check-in: {activity.get('checkin_date')}, Check-out: {activity.get('checkout_date')}, Cost: {activity.get('cost')} Bs."
+    elif activity_type == "RestaurantReservation":
+        details = f"Restaurant: {activity.get('restaurant')}, Reservation Time: {activity.get('reservation_time')}, Dish: {activity.get('dish')}, Cost: {activity.get('cost')} Bs."
+    else:
+        details = ""
+    return f"    - {activity_type}: {details}"
+
+
+class TripSummary:
+    """
+    Running aggregate of the reservation store: activities grouped by city and
+    date (in first-booked order) with per-city and total costs.
+
+    `refresh` folds in only the records stored since the last call (the
+    store's cursor), so keeping the summary current costs O(new reservations)
+    and rendering it costs O(output) instead of a rescan of the whole log.
+    The first `refresh` reads the whole store; until then `built` is False.
+    Without a store it summarizes whatever records are passed to `add`.
+    """
+
+    def __init__(self, store: ReservationStore | None = None):
+        self.store = store
+        self._lock = threading.Lock()
+        self._cursor: Any = None
+        self.built = False
+        self._cities: dict[str, dict[str, list[dict]]] = {}
+        self._city_costs: dict[str, int] = {}
+        self._total_cost = 0
+        self._count = 0
+
+    def _reset(self):
+        self._cities, self._city_costs = {}, {}
+        self._total_cost = self._count = 0
+
+    def add(self, record: dict):
+        city, day = record_city(record), record_date(record)
+        if not city or not day:
+            return
+        self._cities.setdefault(city, {}).setdefault(day, []).append(record)
+        cost = record.get("cost", 0)
+        self._city_costs[city] = self._city_costs.get(city, 0) + cost
+        self._total_cost += cost
+        self._count += 1
+
+    def refresh(self):
+        with self._lock:
+            changes = self.store.records_since(self._cursor)
+            if changes.restarted:
+                self._reset()
+            self._cursor = changes.cursor
+            for record in changes.records:
+                self.add(record)
+            self.built = True
+
+    def render(self) -> str:
+        with self._lock:
+            lines = ["Trip Summary Report:"]
+            for city, dates in self._cities.items():
+                lines.append(f"\nCity: {city}")
+                for day, activities in dates.items():
+                    lines.append(f"  Date: {day}")
+                    lines.extend(activity_line(activity) for activity in activities)
+            lines.append(f"\nTotal Trip Cost: {self._total_cost} Bs.\n")
+            return "\n".join(lines)
+
+    def as_dict(self) -> dict:
+        with self._lock:
+            return {
+                "reservations": self._count,
+                "total_cost": self._total_cost,
+                "cities": [
+                    {
+                        "city": city,
+                        "total_cost": self._city_costs[city],
+                        "dates": [
+                            {"date": day, "activities": list(activities)}
+                            for day, activities in dates.items()
+                        ],
+                    }
+                    for city, dates in self._cities.items()
+                ],
+            }
+
+
+@cache
+def get_trip_summary() -> TripSummary:
+    return TripSummary(get_reservation_store())
@@ -0,0 +1,44 @@
+from piccolo.table import Table
+from piccolo.engine.sqlite import SQLiteEngine
+from piccolo.columns import Varchar, Date, Timestamp, Integer
+from piccolo.columns.defaults.timestamp import TimestampNow
+from ai_assistant.config import get_agent_settings
+
+SETTINGS = get_agent_settings()
+
+DB = SQLiteEngine(path=SETTINGS.sqlite_path, timeout=30)
+
+
+class TripReservationTable(Table, tablename="trip_reservation", db=DB):
+    trip_type = Varchar(length=10, index=True)
+    date = Date(index=True)
+    departure = Varchar()
+    destination = Varchar(index=True)
+    cost = Integer()
+    booked_at = Timestamp(default=TimestampNow(), index=True)
+
+
+class HotelReservationTable(Table, tablename="hotel_reservation", db=DB):
+    checkin_date = Date(index=True)
+    checkout_date = Date()
+    hotel_name = Varchar()
+    city = Varchar(index=True)
+    cost = Integer()
+    booked_at = Timestamp(default=TimestampNow(), index=True)
+
+
+class RestaurantReservationTable(Table, tablename="restaurant_reservation", db=DB):
+    reservation_time = Timestamp(index=True)
+    restaurant = Varchar()
+    city = Varchar(index=True)
+    dish = Varchar()
+    cost = Integer()
+    booked_at = Timestamp(default=TimestampNow(), index=True)
+
+
+# Keyed by the `reservation_type` stored with every reservation record.
+RESERVATION_TABLES: dict[str, type[Table]] = {
+    "TripReservation": TripReservationTable,
+    "HotelReservation": HotelReservationTable,
+    "RestaurantReservation": RestaurantReservationTable,
+}
@@ -1,20 +1,24 @@
+import asyncio
 from random import randint
+from typing import Callable
 from datetime import date, datetime, time
 from llama_index.core.tools import QueryEngineTool, FunctionTool, ToolMetadata
-from ai_assistant.rags import TravelGuideRAG
-from ai_assistant.prompts import travel_guide_qa_tpl, travel_guide_description
+from ai_assistant import dates
+from ai_assistant.rags import LazyQueryEngine, get_travel_guide_rag
+from ai_assistant.prompts import travel_guide_description
 from ai_assistant.config import get_agent_settings
+from ai_assistant.metrics import get_metrics
+from pydantic import TypeAdapter
 from ai_assistant.models import (
     TripReservation,
     TripType,
     HotelReservation,
     RestaurantReservation,
+    ItineraryLeg,
 )
-from ai_assistant.utils import save_reservation
-from datetime import datetime
-import json
-from datetime import datetime
-from ai_assistant.utils import load_trip_data
+from ai_assistant.storage import to_record
+from ai_assistant.summary import TripSummary, get_trip_summary
+from ai_assistant.utils import iter_reservations, save_reservation, save_reservations
 
 def parse_date(date_str: str) -> date:
     """
@@ -25,12 +29,7 @@ def parse_date(date_str: str) -> date:
     - YYYY/MM/DD
     - YYYY-MM-DD (ISO format)
     """
-    for fmt in ("%d/%m/%Y", "%m-%d-%Y", "%Y/%m/%d", "%Y-%m-%d"):
-        try:
-            return datetime.strptime(date_str, fmt).date()
-        except ValueError:
-            continue
-    raise ValueError("Invalid date format. Please provide the date in one of the following formats: DD/MM/YYYY, MM-DD-YYYY, YYYY/MM/DD, or YYYY-MM-DD.")
+    return dates.parse_date(date_str)
 
 def parse_datetime(datetime_str: str) -> datetime:
     """
@@ -41,30 +40,128 @@ def parse_datetime(datetime_str: str) -> datetime:
     - YYYY/MM/DD HH:MM
     - YYYY-MM-DDTHH:MM:SS (ISO format)
     """
-    for fmt in ("%d/%m/%Y %H:%M", "%m-%d-%Y %H:%M", "%Y/%m/%d %H:%M", "%Y-%m-%dT%H:%M:%S"):
-        try:
-            return datetime.strptime(datetime_str, fmt)
-        except ValueError:
-            continue
-    raise ValueError("Invalid datetime format. Please provide the datetime in one of the following formats: DD/MM/YYYY HH:MM, MM-DD-YYYY HH:MM, YYYY/MM/DD HH:MM, or YYYY-MM-DDTHH:MM:SS.")
+    return dates.parse_datetime(datetime_str)
 
 
 
 
 SETTINGS = get_agent_settings()
+METRICS = get_metrics()
+
+ITINERARY_ADAPTER = TypeAdapter(list[ItineraryLeg])
+
+
+class TimedQueryEngineTool(QueryEngineTool):
+    """QueryEngineTool whose calls are timed as the `tool.<name>` stage."""
+
+    def call(self, *args, **kwargs):
+        with METRICS.time(f"tool.{self.metadata.name}"):
+            return super().call(*args, **kwargs)
+
+    async def acall(self, *args, **kwargs):
+        with METRICS.time(f"tool.{self.metadata.name}"):
+            return await super().acall(*args, **kwargs)
+
+
+def function_tool(fn: Callable, return_direct: bool = True) -> FunctionTool:
+    """
+    FunctionTool timed as the `tool.<name>` stage. The agent's async calls run
+    it with asyncio.to_thread, which (unlike FunctionTool's default executor)
+    keeps the request's context, so the call shows up in its breakdown.
+    """
+    timed_fn = METRICS.instrument(f"tool.{fn.__name__}")(fn)
+
+    async def async_fn(*args, **kwargs):
+        return await asyncio.to_thread(timed_fn, *args, **kwargs)
+
+    return FunctionTool.from_defaults(fn=timed_fn, async_fn=async_fn, return_direct=return_direct)
+
 
-travel_guide_tool = QueryEngineTool(
-    query_engine=TravelGuideRAG(
-        store_path=SETTINGS.travel_guide_store_path,
-        data_dir=SETTINGS.travel_guide_data_path,
-        qa_prompt_tpl=travel_guide_qa_tpl,
-    ).get_query_engine(),
+travel_guide_tool = TimedQueryEngineTool(
+    query_engine=LazyQueryEngine(get_travel_guide_rag()),
     metadata=ToolMetadata(
         name="travel_guide", description=travel_guide_description, return_direct=False
     ),
 )
 
 
+# Reservation builders: price a reservation from parsed dates without saving it
+def flight_reservation(reservation_date: date, departure: str, destination: str) -> TripReservation:
+    print(f"Making flight reservation from {departure} to {destination} on date: {reservation_date}")
+    return TripReservation(
+        trip_type=TripType.flight,
+        departure=departure,
+        destination=destination,
+        date=reservation_date,
+        cost=randint(200, 700),
+    )
+
+
+def hotel_reservation(checkin: date, checkout: date, hotel_name: str, city: str) -> HotelReservation:
+    print(f"Making hotel reservation at {hotel_name} in {city} from {checkin} to {checkout}")
+    return HotelReservation(
+        checkin_date=checkin,
+        checkout_date=checkout,
+        hotel_name=hotel_name,
+        city=city,
+        cost=randint(300, 1500),
+    )
+
+
+def bus_reservation(reservation_date: date, departure: str, destination: str) -> TripReservation:
+    print(f"Making bus reservation from {departure} to {destination} on date: {reservation_date}")
+    return TripReservation(
+        trip_type=TripType.bus,
+        departure=departure,
+        destination=destination,
+        date=reservation_date,
+        cost=randint(50, 300),
+    )
+
+
+def restaurant_reservation(
+    reservation_datetime: datetime, restaurant: str, city: str, dish: str = "not specified"
+) -> RestaurantReservation:
+    print(f"Making restaurant reservation at {restaurant} in {city} at {reservation_datetime}")
+    return RestaurantReservation(
+        reservation_time=reservation_datetime,
+        restaurant=restaurant,
+        city=city,
+        dish=dish,
+        cost=randint(20, 200),
+    )
+
+
+def build_reservation(
+    leg: ItineraryLeg, parser: dates.DateParser
+) -> TripReservation | HotelReservation | RestaurantReservation:
+    if leg.type in ("flight", "bus"):
+        (reservation_date,) = parser.parse_dates([leg.date])
+        builder = flight_reservation if leg.type == "flight" else bus_reservation
+        return builder(reservation_date, leg.departure, leg.destination)
+    if leg.type == "hotel":
+        checkin, checkout = parser.parse_dates([leg.checkin_date, leg.checkout_date])
+        return hotel_reservation(checkin, checkout, leg.hotel_name, leg.city)
+    (reservation_datetime,) = parser.parse_datetimes([leg.reservation_time])
+    return restaurant_reservation(reservation_datetime, leg.restaurant, leg.city, leg.dish)
+
+
+def build_reservations(legs: list[ItineraryLeg]) -> list[TripReservation | HotelReservation | RestaurantReservation]:
+    """
+    Build every leg before anything is saved; raises ValueError naming the first invalid leg.
+    The dates of the batch go through a parser of its own, so it learns the
+    batch's formats and parses each repeated date once.
+    """
+    parser = dates.DateParser()
+    reservations = []
+    for position, leg in enumerate(legs, start=1):
+        try:
+            reservations.append(build_reservation(leg, parser))
+        except ValueError as e:
+            raise ValueError(f"Leg {position} ({leg.type}): {e}")
+    return reservations
+
+
 # Tool functions
 def reserve_flight(date_str: str, departure: str, destination: str) -> TripReservation:
     """
@@ -77,20 +174,7 @@ def reserve_flight(date_str: str, departure: str, destination: str) -> TripReser
     Returns:
     - TripReservation: The reservation details including trip type, date, departure, destination, and cost.
     """
-    try:
-        reservation_date = parse_date(date_str)
-    except ValueError as e:
-        raise ValueError(str(e))
-    
-    print(f"Making flight reservation from {departure} to {destination} on date: {reservation_date}")
-    reservation = TripReservation(
-        trip_type=TripType.flight,
-        departure=departure,
-        destination=destination,
-        date=reservation_date,
-        cost=randint(200, 700),
-    )
-
+    reservation = flight_reservation(parse_date(date_str), departure, destination)
     save_reservation(reservation)
     return reservation
 
@@ -107,20 +191,7 @@ def reserve_hotel(checkin_date: str, checkout_date: str, hotel_name: str, city:
     Returns:
     - HotelReservation: The reservation details including check-in, check-out dates, hotel name, city, and cost.
     """
-    try:
-        checkin = parse_date(checkin_date)
-        checkout = parse_date(checkout_date)
-    except ValueError as e:
-        raise ValueError(str(e))
-    
-    print(f"Making hotel reservation at {hotel_name} in {city} from {checkin} to {checkout}")
-    reservation = HotelReservation(
-        checkin_date=checkin,
-        checkout_date=checkout,
-        hotel_name=hotel_name,
-        city=city,
-        cost=randint(300, 1500),
-    )
+    reservation = hotel_reservation(parse_date(checkin_date), parse_date(checkout_date), hotel_name, city)
     save_reservation(reservation)
     return reservation
 
@@ -137,20 +208,7 @@ def reserve_bus(date_str: str, departure: str, destination: str) -> TripReservat
     Returns:
     - TripReservation: The reservation details including trip type, date, departure, destination, and cost.
     """
-    try:
-        reservation_date = parse_date(date_str)
-    except ValueError as e:
-        raise ValueError(str(e))
-    
-    print(f"Making bus reservation from {departure} to {destination} on date: {reservation_date}")
-    reservation = TripReservation(
-        trip_type=TripType.bus,
-        departure=departure,
-        destination=destination,
-        date=reservation_date,
-        cost=randint(50, 300),
-    )
-
+    reservation = bus_reservation(parse_date(date_str), departure, destination)
     save_reservation(reservation)
     return reservation
 
@@ -168,86 +226,69 @@ def reserve_restaurant(reservation_time: str, restaurant: str, city: str, dish:
     Returns:
     - RestaurantReservation: The reservation details including time, restaurant name, city, dish, and cost.
     """
-    try:
-        reservation_datetime = parse_datetime(reservation_time)
-    except ValueError as e:
-        raise ValueError(str(e))
-    
-    print(f"Making restaurant reservation at {restaurant} in {city} at {reservation_datetime}")
-    reservation = RestaurantReservation(
-        reservation_time=reservation_datetime,
-        restaurant=restaurant,
-        city=city,
-        dish=dish,
-        cost=randint(20, 200),
-    )
-
+    reservation = restaurant_reservation(parse_datetime(reservation_time), restaurant, city, dish)
     save_reservation(reservation)
     return reservation
 
 
+def reserve_itinerary(legs: list[dict]) -> list[TripReservation | HotelReservation | RestaurantReservation]:
+    """
+    Reserve a whole multi-leg trip (flights, buses, hotels and restaurants) in one call.
+    Every leg is validated first and then all of them are saved together: if any leg is invalid, nothing is booked.
+    Parameters:
+    - legs (list[dict]): The legs in trip order. Each leg has a "type" and that type's fields:
+      - "flight" or "bus": "date", "departure", "destination".
+      - "hotel": "checkin_date", "checkout_date", "hotel_name", "city".
+      - "restaurant": "reservation_time", "restaurant", "city" and optionally "dish".
+      Dates and times accept the same formats as the single reservation tools.
+    Returns:
+    - list: The reservation details of every leg, in the given order.
+    """
+    reservations = build_reservations(ITINERARY_ADAPTER.validate_python(legs))
+    save_reservations(reservations)
+    return reservations
+
+
 
 
-def generate_trip_summary() -> str:
+def generate_trip_summary(city: str | None = None, start_date: str | None = None, end_date: str | None = None) -> str:
     """
-    Generate a detailed summary of the trip based on activities recorded in the trip log (trip.json).
-    This function reads the trip data, organizes activities by date and place, and returns a detailed report.
+    Generate a detailed summary of the trip based on activities recorded in the trip log.
+    Activities are organized by place and date; the summary can be narrowed to a city and/or a date range.
+    Parameters:
+    - city (str, optional): Only summarize activities in this city.
+    - start_date (str, optional): Only activities on or after this date (flexible format: DD/MM/YYYY, MM-DD-YYYY, YYYY/MM/DD, or YYYY-MM-DD).
+    - end_date (str, optional): Only activities on or before this date (same formats).
     Returns:
     - str: A formatted report of the trip activities, including all booked activities organized by place and date,
            total budget summary, and comments on the places and activities.
     """
     try:
-        trip_data = load_trip_data()
-        organized_data = {}
-
-        for entry in trip_data:
-            city = entry.get("destination") if entry.get("trip_type") in ["FLIGHT", "BUS"] else entry.get("city")
-            date_str = entry.get("date") or entry.get("checkin_date") or entry.get("reservation_time")
-
-            if not city or not date_str:
-                continue
-
-            date_obj = datetime.fromisoformat(date_str.split("T")[0])
-            formatted_date = date_obj.strftime("%Y-%m-%d")
-
-            if city not in organized_data:
-                organized_data[city] = {}
-
-            if formatted_date not in organized_data[city]:
-                organized_data[city][formatted_date] = []
-
-            organized_data[city][formatted_date].append(entry)
-
-        report = "Trip Summary Report:\n"
-        total_cost = 0
-
-        for city, dates in organized_data.items():
-            report += f"\nCity: {city}\n"
-            for date, activities in dates.items():
-                report += f"  Date: {date}\n"
-                for activity in activities:
-                    activity_type = activity.get("trip_type") or activity.get("reservation_type")
-                    activity_details = f"    - {activity_type}: "
-
-                    if activity_type in ["FLIGHT", "BUS"]:
-                        activity_details += f"from {activity.get('departure')} to {activity.get('destination')}, Cost: {activity.get('cost')} Bs."
-                    elif activity_type == "HotelReservation":
-                        activity_details += f"Hotel: {activity.get('hotel_name')}, Check-in: {activity.get('checkin_date')}, Check-out: {activity.get('checkout_date')}, Cost: {activity.get('cost')} Bs."
-                    elif activity_type == "RestaurantReservation":
-                        activity_details += f"Restaurant: {activity.get('restaurant')}, Reservation Time: {activity.get('reservation_time')}, Dish: {activity.get('dish')}, Cost: {activity.get('cost')} Bs."
-
-                    report += activity_details + "\n"
-                    total_cost += activity.get("cost", 0)
-
-        report += f"\nTotal Trip Cost: {total_cost} Bs.\n"
-        return report
+        return filtered_trip_summary(city, start_date, end_date).render()
 
     except Exception as e:
         return f"Error generating trip summary: {str(e)}"
 
 
-trip_summary_tool = FunctionTool.from_defaults(fn=generate_trip_summary, return_direct=True)
-flight_tool = FunctionTool.from_defaults(fn=reserve_flight, return_direct=True)
-hotel_tool = FunctionTool.from_defaults(fn=reserve_hotel, return_direct=True)
-bus_tool = FunctionTool.from_defaults(fn=reserve_bus, return_direct=True)
-restaurant_tool = FunctionTool.from_defaults(fn=reserve_restaurant, return_direct=True)
+def filtered_trip_summary(city: str | None = None, start_date: str | None = None, end_date: str | None = None) -> TripSummary:
+    if city is None and start_date is None and end_date is None:
+        trip_summary = get_trip_summary()
+        trip_summary.refresh()
+        return trip_summary
+
+    trip_summary = TripSummary()
+    for reservation in iter_reservations(
+        city=city,
+        start_date=parse_date(start_date) if start_date else None,
+        end_date=parse_date(end_date) if end_date else None,
+    ):
+        trip_summary.add(to_record(reservation))
+    return trip_summary
+
+
+trip_summary_tool = function_tool(generate_trip_summary)
+flight_tool = function_tool(reserve_flight)
+hotel_tool = function_tool(reserve_hotel)
+bus_tool = function_tool(reserve_bus)
+restaurant_tool = function_tool(reserve_restaurant)
+itinerary_tool = function_tool(reserve_itinerary)
@@ -1,15 +1,25 @@
-import os
-import json
 from datetime import date, datetime
+from typing import Iterator
 from ai_assistant.models import (
     RestaurantReservation,
     TripReservation,
     HotelReservation,
-    TripType,
 )
 from ai_assistant.config import get_agent_settings
+from ai_assistant.metrics import get_metrics
+from ai_assistant.reservation_index import get_reservation_index
+from ai_assistant.reservation_log import iter_records
+from ai_assistant.storage import (
+    Reservation,
+    RESERVATION_MODELS,
+    JsonLinesStore,
+    get_reservation_store,
+    record_type,
+)
+from ai_assistant.summary import get_trip_summary
 
 SETTINGS = get_agent_settings()
+METRICS = get_metrics()
 
 
 def custom_serializer(obj):
@@ -18,35 +28,78 @@ def custom_serializer(obj):
     raise TypeError(f"Object of type {type(obj)} is not JSON serializable")
 
 
+def refresh_built_aggregates():
+    # Fold a booking into the trip summary and the reservation index only
+    # once a read has built them: the first build reads the whole store,
+    # which a booking shouldn't wait on.
+    for aggregate in (get_trip_summary(), get_reservation_index()):
+        if aggregate.built:
+            aggregate.refresh()
+
+
+@METRICS.instrument("save_reservation")
 def save_reservation(
     reservation: RestaurantReservation | TripReservation | HotelReservation,
 ):
-    reservation_dict = reservation.model_dump()
-    print(f"saving reservation: {reservation_dict}")
-    reservations = []
-    if os.path.exists(SETTINGS.log_file) and os.path.getsize(SETTINGS.log_file) > 0:
-        with open(SETTINGS.log_file, "r") as file:
-            try:
-                reservations = json.load(file)
-            except json.JSONDecodeError:
-                reservation = []
-    else:
-        reservations = []
-    reservation_dict["reservation_type"] = reservation.__class__.__name__
-    reservations.append(reservation_dict)
-
-    with open(SETTINGS.log_file, "w") as file:
-        json.dump(reservations, file, indent=4, default=custom_serializer)
-
+    print(f"saving reservation: {reservation.model_dump(mode='json')}")
+    get_reservation_store().save(reservation)
+    refresh_built_aggregates()
     print(f"saved reservation!")
 
-def load_trip_data(file_path: str = "trip.json") -> list:
+
+@METRICS.instrument("save_reservations")
+def save_reservations(
+    reservations: list[RestaurantReservation | TripReservation | HotelReservation],
+):
+    print(f"saving {len(reservations)} reservations")
+    get_reservation_store().save_many(reservations)
+    refresh_built_aggregates()
+    print(f"saved reservations!")
+
+
+def iter_trip_data(file_path: str | None = None) -> Iterator[dict]:
+    """
+    Stream trip data from the reservation store, one activity at a time.
+    Parameters:
+    - file_path (str, optional): Read this JSON-Lines/JSON log instead of the configured store.
+    Returns:
+    - Iterator[dict]: The trip activities in booking order.
+    """
+    if file_path is not None:
+        return iter_records(file_path)
+    return get_reservation_store().iter_records()
+
+
+def iter_reservations(
+    file_path: str | None = None,
+    reservation_type: str | None = None,
+    city: str | None = None,
+    start_date: date | None = None,
+    end_date: date | None = None,
+) -> Iterator[Reservation]:
+    """
+    Lazily stream trip activities as typed reservation models, in constant memory.
+    The filters are pushed down to the store: SQLite turns them into indexed
+    queries, and JSON-Lines logs skip non-matching lines before parsing them.
+    Parameters:
+    - file_path (str, optional): Read this JSON-Lines/JSON log instead of the configured store.
+    - reservation_type (str, optional): "TripReservation", "HotelReservation" or "RestaurantReservation".
+    - city (str, optional): Only activities in this city, ignoring case and accents (a trip's city is its destination).
+    - start_date, end_date (date, optional): Only activities in this inclusive date range.
+    Returns:
+    - Iterator[Reservation]: The matching reservations in booking order.
+    """
+    store = JsonLinesStore(file_path) if file_path is not None else get_reservation_store()
+    for record in store.iter_records(reservation_type, city, start_date, end_date):
+        yield RESERVATION_MODELS[record_type(record)].model_validate(record)
+
+
+def load_trip_data(file_path: str | None = None) -> list:
     """
-    Load trip data from a JSON file.
+    Load trip data from the reservation store.
     Parameters:
-    - file_path (str): Path to the trip.json file. Defaults to 'trip.json'.
+    - file_path (str, optional): Read this JSON-Lines/JSON log instead of the configured store.
     Returns:
     - list: A list of dictionaries representing the trip activities.
     """
-    with open(file_path, "r") as f:
-        return json.load(f)
+    return list(iter_trip_data(file_path))
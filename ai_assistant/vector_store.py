@@ -0,0 +1,369 @@
+import os
+import json
+import tempfile
+from typing import IO, Any, Callable, Sequence
+import numpy as np
+from llama_index.core.bridge.pydantic import PrivateAttr
+from llama_index.core.schema import BaseNode
+from llama_index.core.vector_stores.simple import SimpleVectorStore, _build_metadata_filter_fn
+from llama_index.core.vector_stores.types import (
+    BasePydanticVectorStore,
+    FilterCondition,
+    FilterOperator,
+    MetadataFilters,
+    VectorStoreQuery,
+    VectorStoreQueryResult,
+)
+from llama_index.core.vector_stores.utils import node_to_metadata_dict
+
+NPY_SUFFIX = ".npy"
+META_SUFFIX = ".meta.json"
+IVF_SUFFIX = ".ivf.npz"
+
+
+def _normalize(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+def train_centroids(vectors: np.ndarray, nlist: int, iterations: int = 10, seed: int = 0) -> np.ndarray:
+    """Spherical k-means over (a sample of) unit vectors; returns `nlist` unit centroids."""
+    rng = np.random.default_rng(seed)
+    if len(vectors) > 256 * nlist:
+        vectors = vectors[rng.choice(len(vectors), 256 * nlist, replace=False)]
+    centroids = np.array(vectors[rng.choice(len(vectors), nlist, replace=False)], dtype=np.float32)
+    for _ in range(iterations):
+        assignments = np.argmax(vectors @ centroids.T, axis=1)
+        for cluster in range(nlist):
+            members = vectors[assignments == cluster]
+            if len(members):
+                centroids[cluster] = members.sum(axis=0)
+            else:
+                # Re-seed empty clusters so no list stays unused.
+                centroids[cluster] = vectors[rng.integers(len(vectors))]
+        centroids = _normalize(centroids)
+    return centroids
+
+
+def _replace(path: str, mode: str, write: Callable[[IO], Any]):
+    """Write `path` through a uniquely named temporary file next to it, then swap it in."""
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or ".", prefix=os.path.basename(path), suffix=".tmp")
+    try:
+        os.fchmod(fd, 0o644)  # mkstemp's 0600 would hide the store from other users
+        with open(fd, mode, **({} if "b" in mode else {"encoding": "utf-8"})) as file:
+            write(file)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class NumpyVectorStore(BasePydanticVectorStore):
+    """
+    Vector store keeping every embedding in one float32 matrix.
+
+    Rows are L2-normalized on insert, so cosine similarity is a single
+    matrix-vector product and top-k is an `argpartition`. The matrix is
+    persisted as `.npy` and memory-mapped read-only on load, so uvicorn workers
+    share its pages instead of each parsing a JSON list of floats. Node ids,
+    ref doc ids and metadata live in a compact JSON sidecar.
+
+    With `index="ivf"` queries are approximate: rows are clustered into
+    `nlist` inverted lists (k-means, trained on first query) and only the
+    `nprobe` lists closest to the query are scanned. Raising `nprobe` trades
+    latency for recall; `nprobe >= nlist` is exact.
+
+    Equality/contains/in filters (AND-ed) on a metadata key are answered from
+    an inverted index of value -> rows, built on first use, so a query scoped
+    to one city only scores that city's rows.
+    """
+
+    stores_text: bool = False
+    index: str = "exact"
+    nlist: int = 0  # 0 picks ~sqrt(rows)
+    nprobe: int = 8
+
+    _embeddings: np.ndarray = PrivateAttr()
+    _pending: list[np.ndarray] = PrivateAttr(default_factory=list)
+    _ids: list[str] = PrivateAttr(default_factory=list)
+    _ref_doc_ids: list[str] = PrivateAttr(default_factory=list)
+    _metadata: list[dict] = PrivateAttr(default_factory=list)
+    _centroids: np.ndarray | None = PrivateAttr(default=None)
+    _assignments: np.ndarray | None = PrivateAttr(default=None)
+    _lists: tuple[np.ndarray, np.ndarray] | None = PrivateAttr(default=None)
+    _trained_rows: int = PrivateAttr(default=0)
+    _inverted: dict[str, dict[Any, np.ndarray]] = PrivateAttr(default_factory=dict)
+
+    def __init__(
+        self,
+        embeddings: np.ndarray | None = None,
+        ids: list[str] | None = None,
+        ref_doc_ids: list[str] | None = None,
+        metadata: list[dict] | None = None,
+        **kwargs: Any,
+    ):
+        super().__init__(**kwargs)
+        self._embeddings = embeddings if embeddings is not None else np.zeros((0, 0), dtype=np.float32)
+        self._pending = []
+        self._ids = ids or []
+        self._ref_doc_ids = ref_doc_ids or []
+        self._metadata = metadata or [{} for _ in self._ids]
+        self._centroids = None
+        self._assignments = None
+        self._lists = None
+        self._trained_rows = 0
+        self._inverted = {}
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "NumpyVectorStore"
+
+    @property
+    def client(self) -> None:
+        return None
+
+    @property
+    def embeddings(self) -> np.ndarray:
+        if self._pending:
+            parts = [self._embeddings, *self._pending] if len(self._embeddings) else self._pending
+            self._embeddings = np.vstack(parts).astype(np.float32, copy=False)
+            self._pending = []
+        return self._embeddings
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __bool__(self) -> bool:
+        # StorageContext.from_defaults tests `if vector_store:`; an empty store
+        # must not be swapped for a SimpleVectorStore.
+        return True
+
+    def add(self, nodes: Sequence[BaseNode], **add_kwargs: Any) -> list[str]:
+        if not nodes:
+            return []
+        vectors = _normalize(np.asarray([node.get_embedding() for node in nodes], dtype=np.float32))
+        self._pending.append(vectors)
+        if self._centroids is not None:
+            # New rows join their nearest existing list until the next retraining.
+            assignments = np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+            self._assignments = np.concatenate([self._assignments, assignments])
+            self._lists = None
+        self._inverted = {}
+        for node in nodes:
+            self._ids.append(node.node_id)
+            self._ref_doc_ids.append(node.ref_doc_id or "None")
+            metadata = node_to_metadata_dict(node, remove_text=True, flat_metadata=False)
+            metadata.pop("_node_content", None)
+            self._metadata.append(metadata)
+        return [node.node_id for node in nodes]
+
+    def _drop(self, keep: np.ndarray):
+        self._embeddings = np.ascontiguousarray(self.embeddings[keep])
+        self._ids = [self._ids[i] for i in np.flatnonzero(keep)]
+        self._ref_doc_ids = [self._ref_doc_ids[i] for i in np.flatnonzero(keep)]
+        self._metadata = [self._metadata[i] for i in np.flatnonzero(keep)]
+        self._inverted = {}
+        if self._assignments is not None:
+            self._assignments = self._assignments[keep]
+            self._lists = None
+
+    def delete(self, ref_doc_id: str, **delete_kwargs: Any) -> None:
+        keep = np.array([ref != ref_doc_id for ref in self._ref_doc_ids], dtype=bool)
+        if not keep.all():
+            self._drop(keep)
+
+    def clear(self) -> None:
+        self._embeddings = np.zeros((0, 0), dtype=np.float32)
+        self._pending = []
+        self._ids, self._ref_doc_ids, self._metadata = [], [], []
+        self._inverted = {}
+        self._reset_ivf()
+
+    def _reset_ivf(self):
+        self._centroids = self._assignments = self._lists = None
+        self._trained_rows = 0
+
+    def _train_ivf(self):
+        embeddings = self.embeddings
+        nlist = self.nlist or int(np.sqrt(len(embeddings)))
+        nlist = max(1, min(nlist, len(embeddings)))
+        self._centroids = train_centroids(embeddings, nlist)
+        self._assignments = np.argmax(embeddings @ self._centroids.T, axis=1).astype(np.int32)
+        self._trained_rows = len(embeddings)
+        self._lists = None
+
+    def _inverted_lists(self) -> tuple[np.ndarray, np.ndarray]:
+        """Rows grouped by list (`order`) and the offset of each list in it."""
+        # Retrain once the store has doubled or halved since the last training.
+        if self._centroids is None or not self._trained_rows / 2 <= len(self._ids) <= 2 * self._trained_rows:
+            self._train_ivf()
+        if self._lists is None:
+            order = np.argsort(self._assignments, kind="stable")
+            offsets = np.searchsorted(self._assignments[order], np.arange(len(self._centroids) + 1))
+            self._lists = order, offsets
+        return self._lists
+
+    def _probe(self, query_vector: np.ndarray, k: int) -> np.ndarray | None:
+        """Rows in the `nprobe` lists nearest to the query (None = scan everything)."""
+        order, offsets = self._inverted_lists()
+        if self.nprobe >= len(self._centroids):
+            return None
+        scores = self._centroids @ query_vector
+        probed = np.argpartition(-scores, self.nprobe - 1)[: self.nprobe]
+        rows = np.concatenate([order[offsets[i]:offsets[i + 1]] for i in probed])
+        return rows if len(rows) >= k else None
+
+    def _inverted_index(self, key: str) -> dict[Any, np.ndarray]:
+        if key not in self._inverted:
+            postings: dict[Any, list[int]] = {}
+            for row, metadata in enumerate(self._metadata):
+                values = metadata.get(key)
+                for value in values if isinstance(values, list) else [values]:
+                    if value is not None:
+                        postings.setdefault(value, []).append(row)
+            self._inverted[key] = {value: np.array(rows, dtype=np.int64) for value, rows in postings.items()}
+        return self._inverted[key]
+
+    def _prefilter(self, filters: MetadataFilters) -> tuple[np.ndarray | None, MetadataFilters | None]:
+        """
+        Answer the EQ/CONTAINS/IN/ANY filters of an AND condition from the inverted
+        index; returns the matching rows and the filters still left to check.
+        """
+        if filters.condition != FilterCondition.AND and len(filters.filters) > 1:
+            return None, filters
+        rows, rest = None, []
+        for metadata_filter in filters.filters:
+            if isinstance(metadata_filter, MetadataFilters) or metadata_filter.operator not in (
+                FilterOperator.EQ, FilterOperator.CONTAINS, FilterOperator.IN, FilterOperator.ANY
+            ):
+                rest.append(metadata_filter)
+                continue
+            postings = self._inverted_index(metadata_filter.key)
+            values = (
+                metadata_filter.value
+                if metadata_filter.operator in (FilterOperator.IN, FilterOperator.ANY)
+                else [metadata_filter.value]
+            )
+            matched = np.unique(np.concatenate([postings.get(value, np.zeros(0, dtype=np.int64)) for value in values]))
+            rows = matched if rows is None else np.intersect1d(rows, matched)
+        remaining = MetadataFilters(filters=rest, condition=FilterCondition.AND) if rest else None
+        return rows, remaining
+
+    def _candidates(self, query: VectorStoreQuery) -> np.ndarray | None:
+        """Row indices allowed by the query's node ids and metadata filters (None = all rows)."""
+        if query.node_ids is None and not (query.filters and query.filters.filters):
+            return None
+        rows, filters = self._prefilter(query.filters) if query.filters else (None, None)
+        if query.node_ids is None and filters is None:
+            return rows
+        allowed = set(query.node_ids) if query.node_ids is not None else None
+        filter_fn = _build_metadata_filter_fn(lambda row: self._metadata[row], filters)
+        return np.array(
+            [
+                row
+                for row in (rows if rows is not None else range(len(self._ids)))
+                if (allowed is None or self._ids[row] in allowed) and filter_fn(row)
+            ],
+            dtype=np.int64,
+        )
+
+    def _top_k(self, rows: np.ndarray | None, query_vector: np.ndarray, k: int) -> tuple[np.ndarray, np.ndarray]:
+        matrix = self.embeddings if rows is None else self.embeddings[rows]
+        if len(matrix) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+        scores = matrix @ query_vector
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return (top if rows is None else rows[top]), scores[top]
+
+    def query(self, query: VectorStoreQuery, **kwargs: Any) -> VectorStoreQueryResult:
+        if query.query_embedding is None:
+            raise ValueError("NumpyVectorStore only supports embedding queries.")
+        query_vector = _normalize(np.asarray(query.query_embedding, dtype=np.float32))
+        rows = self._candidates(query)
+        # Filtered queries already scan a subset, so they stay exact.
+        if rows is None and self.index == "ivf" and len(self._ids):
+            rows = self._probe(query_vector, query.similarity_top_k)
+        rows, scores = self._top_k(rows, query_vector, query.similarity_top_k)
+        return VectorStoreQueryResult(
+            ids=[self._ids[row] for row in rows],
+            similarities=scores.tolist(),
+        )
+
+    def persist(self, persist_path: str, fs: Any = None) -> None:
+        base = os.path.splitext(persist_path)[0]
+        os.makedirs(os.path.dirname(base) or ".", exist_ok=True)
+        # Write to temporary files and swap them in: other processes may have
+        # the current .npy memory-mapped, or be converting the same store.
+        embeddings = np.ascontiguousarray(self.embeddings, dtype=np.float32)
+        _replace(base + NPY_SUFFIX, "wb", lambda file: np.save(file, embeddings))
+        _replace(
+            base + META_SUFFIX,
+            "w",
+            lambda file: json.dump(
+                {"ids": self._ids, "ref_doc_ids": self._ref_doc_ids, "metadata": self._metadata},
+                file,
+                separators=(",", ":"),
+                ensure_ascii=False,
+            ),
+        )
+        if self._centroids is not None:
+            # Saves every worker from re-training the same lists on load.
+            _replace(
+                base + IVF_SUFFIX,
+                "wb",
+                lambda file: np.savez(
+                    file,
+                    centroids=self._centroids,
+                    assignments=self._assignments,
+                    trained_rows=self._trained_rows,
+                ),
+            )
+        elif os.path.exists(base + IVF_SUFFIX):
+            os.remove(base + IVF_SUFFIX)
+
+    @classmethod
+    def from_persist_path(cls, persist_path: str, mmap: bool = True, **kwargs: Any) -> "NumpyVectorStore":
+        base = os.path.splitext(persist_path)[0]
+        embeddings = np.load(base + NPY_SUFFIX, mmap_mode="r" if mmap else None)
+        with open(base + META_SUFFIX, "r", encoding="utf-8") as file:
+            sidecar = json.load(file)
+        store = cls(embeddings, sidecar["ids"], sidecar["ref_doc_ids"], sidecar["metadata"], **kwargs)
+        if os.path.exists(base + IVF_SUFFIX):
+            with np.load(base + IVF_SUFFIX) as ivf:
+                if len(ivf["assignments"]) == len(store) and (not store.nlist or store.nlist == len(ivf["centroids"])):
+                    store._centroids = ivf["centroids"]
+                    store._assignments = ivf["assignments"]
+                    store._trained_rows = int(ivf["trained_rows"])
+        return store
+
+    @classmethod
+    def from_simple(cls, store: SimpleVectorStore, **kwargs: Any) -> "NumpyVectorStore":
+        data = store.data
+        ids = list(data.embedding_dict)
+        embeddings = np.asarray([data.embedding_dict[node_id] for node_id in ids], dtype=np.float32)
+        return cls(
+            _normalize(embeddings) if len(ids) else None,
+            ids,
+            [data.text_id_to_ref_doc_id.get(node_id, "None") for node_id in ids],
+            [(data.metadata_dict or {}).get(node_id, {}) for node_id in ids],
+            **kwargs,
+        )
+
+    @classmethod
+    def from_persist_dir(cls, persist_dir: str, namespace: str = "default", **kwargs: Any) -> "NumpyVectorStore":
+        """
+        Load `<namespace>__vector_store.npy` from `persist_dir`, converting a
+        JSON SimpleVectorStore persisted there on first use; empty if neither exists.
+        """
+        persist_path = os.path.join(persist_dir, f"{namespace}__vector_store.json")
+        base = os.path.splitext(persist_path)[0]
+        if os.path.exists(base + NPY_SUFFIX):
+            return cls.from_persist_path(persist_path, **kwargs)
+        if os.path.exists(persist_path):
+            store = cls.from_simple(SimpleVectorStore.from_persist_path(persist_path))
+            store.persist(persist_path)
+            return cls.from_persist_path(persist_path, **kwargs)
+        return cls(**kwargs)
@@ -0,0 +1,98 @@
+"""
+Recall-vs-exact benchmark for the IVF index of NumpyVectorStore.
+
+The corpus is the travel guide: chunk embeddings come from the persisted
+store (or are computed from the docstore chunks with the configured embedding
+model and the embedding cache), optionally replicated with small noise to
+simulate a larger guide. Queries are the first sentence of random chunks,
+embedded as queries. For each nprobe, reports recall@k against exact search
+and the p50/p95 query latency.
+
+Usage: python -m benchmarks.ann [--scale 1] [--queries 100] [--top-k 2] [--nlist 0] [--nprobe 1 2 4 8 16]
+"""
+import os
+import time
+import argparse
+import numpy as np
+from llama_index.core.schema import TextNode
+from llama_index.core.storage.docstore import SimpleDocumentStore
+from llama_index.core.vector_stores.types import VectorStoreQuery
+from ai_assistant.config import get_agent_settings
+from ai_assistant.embeddings import CachedEmbedder
+from ai_assistant.rags import get_embed_model, get_embedding_cache
+from ai_assistant.vector_store import NumpyVectorStore
+
+SETTINGS = get_agent_settings()
+
+
+def load_corpus() -> tuple[list[str], np.ndarray]:
+    store_path = SETTINGS.travel_guide_store_path
+    docstore = SimpleDocumentStore.from_persist_path(os.path.join(store_path, "docstore.json"))
+    nodes = list(docstore.docs.values())
+    texts = [node.get_content() for node in nodes]
+    stored = NumpyVectorStore.from_persist_dir(store_path)
+    if len(stored):
+        return texts, np.asarray(stored.embeddings)
+    chunks = [TextNode(text=text) for text in texts]
+    CachedEmbedder(embed_model=get_embed_model(), cache=get_embedding_cache())(chunks)
+    return texts, np.asarray([chunk.embedding for chunk in chunks], dtype=np.float32)
+
+
+def run(store: NumpyVectorStore, queries: np.ndarray, top_k: int) -> tuple[list[set[str]], list[float]]:
+    results, timings = [], []
+    for vector in queries:
+        start = time.perf_counter()
+        result = store.query(VectorStoreQuery(query_embedding=vector.tolist(), similarity_top_k=top_k))
+        timings.append(time.perf_counter() - start)
+        results.append(set(result.ids))
+    return results, sorted(timings)
+
+
+def percentile(timings: list[float], q: float) -> float:
+    return timings[min(len(timings) - 1, int(len(timings) * q))] * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", type=int, default=1, help="replicate the corpus this many times")
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--top-k", type=int, default=2)
+    parser.add_argument("--nlist", type=int, default=SETTINGS.ivf_nlist)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    texts, vectors = load_corpus()
+    vectors = np.concatenate(
+        [vectors] + [vectors + 0.05 * rng.standard_normal(vectors.shape).astype(np.float32) for _ in range(args.scale - 1)]
+    )
+    nodes = [TextNode(id_=str(i), text="", embedding=vector.tolist()) for i, vector in enumerate(vectors)]
+    sample = rng.choice(len(texts), min(args.queries, len(texts)), replace=False)
+    embed_model = get_embed_model()
+    queries = np.asarray(
+        [embed_model.get_query_embedding(texts[i].split(".")[0]) for i in sample], dtype=np.float32
+    )
+
+    exact = NumpyVectorStore()
+    exact.add(nodes)
+    truth, timings = run(exact, queries, args.top_k)
+    print(f"{len(nodes)} chunks, {len(queries)} queries, top {args.top_k}")
+    print(f"{'exact':>12}: recall 1.000, p50 {percentile(timings, 0.5):6.2f} ms, p95 {percentile(timings, 0.95):6.2f} ms")
+
+    ivf = NumpyVectorStore(index="ivf", nlist=args.nlist)
+    ivf.add(nodes)
+    start = time.perf_counter()
+    ivf._inverted_lists()
+    print(f"trained {len(ivf._centroids)} lists in {time.perf_counter() - start:.2f}s")
+    for nprobe in args.nprobe:
+        ivf.nprobe = nprobe
+        found, timings = run(ivf, queries, args.top_k)
+        recall = np.mean([len(hit & expected) / len(expected) for hit, expected in zip(found, truth)])
+        print(
+            f"{'nprobe ' + str(nprobe):>12}: recall {recall:.3f}, "
+            f"p50 {percentile(timings, 0.5):6.2f} ms, p95 {percentile(timings, 0.95):6.2f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Context budget benchmark: retrieved context tokens and end-to-end latency of
+travel guide queries with the chunks as retrieved against compressed to each
+`--budgets` token budget (deduplicated and trimmed, then also filtered to the
+sentences mentioning the query's terms or cities).
+
+The corpus is the guide chunks of the persisted store (`--store-path`),
+re-indexed with the stub embeddings; answers come from the stub LLM, which
+waits `--latency-ms` per call plus `--ms-per-1k-tokens` per thousand prompt
+tokens to stand in for a provider's prompt processing time. Queries are the
+hotel and activity recommendation prompts for each benchmark city.
+
+Usage: python -m benchmarks.context_budget [--budgets 500 1000 2000] [--latency-ms 100] [--ms-per-1k-tokens 100]
+"""
+import os
+import time
+import argparse
+import tempfile
+import statistics
+from benchmarks.e2e import CITIES, percentile, stub_environment
+
+
+def build_store(source: str, store_path: str):
+    """Index the guide chunks of the store at `source` with the configured models and vector store."""
+    from llama_index.core import StorageContext, VectorStoreIndex
+    from llama_index.core.schema import TextNode
+    from llama_index.core.storage.docstore import SimpleDocumentStore
+    from ai_assistant.config import get_agent_settings
+    from ai_assistant.rags import configure_models, tag_cities
+    from ai_assistant.vector_store import NumpyVectorStore
+
+    configure_models()
+    docstore = SimpleDocumentStore.from_persist_path(os.path.join(source, "docstore.json"))
+    nodes = [TextNode(id_=node.node_id, text=node.get_content()) for node in docstore.docs.values()]
+    tag_cities(nodes)
+    numpy = get_agent_settings().vector_store_backend == "numpy"
+    storage_context = StorageContext.from_defaults(vector_store=NumpyVectorStore() if numpy else None)
+    VectorStoreIndex(nodes, storage_context=storage_context).storage_context.persist(persist_dir=store_path)
+    return len(nodes)
+
+
+def measure(rag, queries: list[tuple[str, str]]) -> dict:
+    from llama_index.core.utils import get_tokenizer
+    from ai_assistant.metrics import track_request
+
+    tokenizer = get_tokenizer()
+    latencies, retrieved, kept, prompt_tokens = [], [], [], []
+    for city, prompt in queries:
+        engine = rag.get_query_engine(city)
+        timings = track_request()
+        start = time.perf_counter()
+        response = engine.query(prompt)
+        latencies.append(time.perf_counter() - start)
+        counters = timings.counters
+        kept.append(sum(len(tokenizer(node.node.get_content())) for node in response.source_nodes))
+        # without a budget nothing counts the context before synthesis
+        retrieved.append(counters.get("context_tokens_retrieved", kept[-1]))
+        prompt_tokens.append(counters.get("llm_tokens_prompt", 0))
+    return {
+        "retrieved": statistics.mean(retrieved),
+        "kept": statistics.mean(kept),
+        "prompt_tokens": statistics.mean(prompt_tokens),
+        "p50_ms": percentile(sorted(latencies), 0.5),
+    }
+
+
+def run(args, store_path: str):
+    from ai_assistant.prompts import recommendation_prompts, travel_guide_qa_tpl
+    from ai_assistant.rags import TravelGuideRAG
+
+    print(f"{build_store(args.store_path, store_path)} chunks from {args.store_path}")
+    queries = [
+        (city, recommendation_prompts[endpoint].format(city=city, notes="no specific notes"))
+        for city in CITIES
+        for endpoint in ("hotels", "activities")
+    ]
+    configs = [("as retrieved", 0, False)]
+    for budget in args.budgets:
+        configs += [(f"{budget}", budget, False), (f"{budget} + filter", budget, True)]
+
+    print(f"{'budget':>14} {'retrieved':>10} {'kept':>7} {'reduction':>10} {'prompt tokens':>14} {'p50 ms':>9}")
+    for name, budget, filter_sentences in configs:
+        rag = TravelGuideRAG(
+            store_path=store_path,
+            qa_prompt_tpl=travel_guide_qa_tpl,
+            context_token_budget=budget,
+            filter_sentences=filter_sentences,
+        )
+        result = measure(rag, queries)
+        reduction = 1 - result["kept"] / result["retrieved"] if result["retrieved"] else 0.0
+        print(
+            f"{name:>14} {result['retrieved']:10.0f} {result['kept']:7.0f} {reduction:10.1%} "
+            f"{result['prompt_tokens']:14.0f} {result['p50_ms']:9.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--store-path", default="travel_guide_store", help="store whose chunks make up the corpus")
+    parser.add_argument("--budgets", type=int, nargs="+", default=[500, 1000, 2000])
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="stub latency per LLM/embedding call")
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=100.0, help="stub LLM latency per 1k prompt tokens")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store_path = os.path.join(tmp, "corpus")
+        stub_environment(
+            tmp,
+            args.latency_ms,
+            vector_store_backend="simple",
+            stub_latency_ms_per_1k_tokens=str(args.ms_per_1k_tokens),
+        )
+        run(args, store_path)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Date parsing micro-benchmark: the previous strptime loop against
+ai_assistant.dates, for each of the four supported date and datetime formats.
+
+Reports microseconds per value for the strptime loop, a single-value parse
+(`parse_date`/`parse_datetime`) and the bulk `parse_dates`/`parse_datetimes`
+on a batch with the repetition typical of an itinerary import.
+
+Usage: python -m benchmarks.dates [--values 20000] [--distinct 365]
+"""
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+from ai_assistant import dates
+
+
+def strptime_loop(value: str, formats: tuple[str, ...]) -> datetime:
+    for fmt in formats:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    raise ValueError(value)
+
+
+def per_value(fn, values: list[str]) -> float:
+    start = time.perf_counter()
+    fn(values)
+    return (time.perf_counter() - start) / len(values) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--values", type=int, default=20000)
+    parser.add_argument("--distinct", type=int, default=365, help="distinct dates among the values")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    base = datetime(2024, 1, 1, 8, 0)
+    moments = [base + timedelta(days=rng.randrange(args.distinct), minutes=15 * rng.randrange(48)) for _ in range(args.values)]
+
+    print(f"{args.values} values, {args.distinct} distinct days (us/value)")
+    print(f"{'format':>20} {'strptime loop':>14} {'parse one':>10} {'bulk':>8}")
+    for formats, one, bulk in (
+        (dates.DATE_FORMATS, dates.parse_date, dates.parse_dates),
+        (dates.DATETIME_FORMATS, dates.parse_datetime, dates.parse_datetimes),
+    ):
+        for fmt in formats:
+            values = [moment.strftime(fmt) for moment in moments]
+            old = per_value(lambda batch: [strptime_loop(value, formats) for value in batch], values)
+            new = per_value(lambda batch: [one(value) for value in batch], values)
+            batched = per_value(bulk, values)
+            print(f"{fmt:>20} {old:14.2f} {new:10.2f} {batched:8.2f}")
+
+
+if __name__ == "__main__":
+    main()
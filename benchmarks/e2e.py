@@ -0,0 +1,209 @@
+"""
+End-to-end benchmark of the FastAPI app with the deterministic stub LLM and
+embeddings (`LLM_PROVIDER=stub`, `EMBED_PROVIDER=stub`).
+
+A synthetic travel guide is ingested into a temporary store and every
+reservation goes to a temporary log, so the run is offline and leaves the
+working tree untouched. Each scenario drives one endpoint through httpx's
+ASGI transport: the tools (travel guide RAG, reservations, trip summary)
+are real, called directly or by the agent's ReAct loop (`--mode`), and
+only the model calls are stubbed, at `--latency-ms` each. Reports
+p50/p95/p99 latency, throughput and RSS per scenario.
+
+As a regression gate, `--output` saves the results as JSON, and
+`--baseline` compares a run against saved results, exiting with status 1
+when a scenario's p95 or throughput is more than `--tolerance` worse.
+
+Usage: python -m benchmarks.e2e [--clients 10] [--requests 50] [--latency-ms 20] [--mode direct|agent]
+                                [--output results.json] [--baseline baseline.json] [--tolerance 0.25]
+"""
+import os
+import sys
+import json
+import time
+import asyncio
+import argparse
+import resource
+import tempfile
+import statistics
+
+CITIES = ["La Paz", "Uyuni", "Sucre", "Potosí", "Cochabamba", "Santa Cruz", "Copacabana", "Rurrenabaque"]
+
+GUIDE = """{city}
+
+Hotels in {city}: Hotel Central {n} offers rooms from {price} Bs. a night, close to the main square.
+Activities in {city}: walking tours of the old town, the local market and day trips to nearby viewpoints.
+Restaurants in {city}: try salteñas for breakfast and a set lunch (almuerzo) for about 25 Bs.
+Transport to {city}: buses leave from the main terminal several times a day.
+"""
+
+
+def write_guide(data_dir: str):
+    os.makedirs(data_dir, exist_ok=True)
+    for n, city in enumerate(CITIES):
+        with open(os.path.join(data_dir, f"{n:02d}.txt"), "w", encoding="utf-8") as file:
+            file.write(GUIDE.format(city=city, n=n, price=150 + 40 * n))
+
+
+def stub_environment(tmp: str, latency_ms: float, **settings: str):
+    """
+    Point the app at the stub models, a synthetic guide and a trip log in
+    `tmp`; must run before ai_assistant is imported (settings are read once).
+    """
+    data_dir = os.path.join(tmp, "guide")
+    write_guide(data_dir)
+    os.environ.update({
+        "LLM_PROVIDER": "stub",
+        "EMBED_PROVIDER": "stub",
+        "STUB_LATENCY_MS": str(latency_ms),
+        "TRAVEL_GUIDE_DATA_PATH": data_dir,
+        "TRAVEL_GUIDE_STORE_PATH": os.path.join(tmp, "store"),
+        "EMBEDDING_CACHE_PATH": os.path.join(tmp, "embeddings.sqlite"),
+        "LOG_FILE": os.path.join(tmp, "trip.jsonl"),
+        "SQLITE_PATH": os.path.join(tmp, "trip.sqlite"),
+        **{name.upper(): value for name, value in settings.items()},
+    })
+
+
+def scenarios() -> dict[str, callable]:
+    """Scenario name -> function building the i-th request (method, url, params, json)."""
+    city = lambda i: CITIES[i % len(CITIES)]
+    return {
+        "recommend_cities": lambda i: ("GET", "/recommendations/cities", {"notes": ["salt flats", f"budget {i}"]}, None),
+        "recommend_hotels": lambda i: ("GET", "/recommendations/hotels", {"city": city(i), "notes": ["quiet"]}, None),
+        "recommend_activities": lambda i: ("GET", "/recommendations/activities", {"city": city(i)}, None),
+        "reserve_flight": lambda i: ("POST", "/reservations/flight", {"date": "2024-11-01", "departure": "La Paz", "destination": city(i)}, None),
+        "reserve_hotel": lambda i: ("POST", "/reservations/hotel", {"checkin_date": "2024-11-01", "checkout_date": "2024-11-03", "hotel_name": f"Hotel {i}", "city": city(i)}, None),
+        "reserve_batch": lambda i: ("POST", "/reservations/batch", None, {"reservations": [
+            {"type": "bus", "date": "2024-11-04", "departure": city(i), "destination": city(i + 1)},
+            {"type": "hotel", "checkin_date": "2024-11-04", "checkout_date": "2024-11-06", "hotel_name": "Hostal Stub", "city": city(i + 1)},
+            {"type": "restaurant", "reservation_time": "2024-11-04T20:00:00", "restaurant": "Stub", "city": city(i + 1)},
+        ]}),
+        "report": lambda i: ("GET", "/report", None, None),
+        "report_summary": lambda i: ("GET", "/report/summary", None, None),
+    }
+
+
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/status", encoding="ascii") as status:
+            for line in status:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def percentile(latencies: list[float], q: float) -> float:
+    return latencies[min(len(latencies) - 1, int(len(latencies) * q))] * 1000
+
+
+async def run_scenario(client, build, clients: int, total: int) -> dict:
+    latencies, errors = [], 0
+    counter = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for i in counter:
+            method, url, params, body = build(i)
+            start = time.perf_counter()
+            response = await client.request(method, url, params=params, json=body)
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code >= 400
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": percentile(latencies, 0.95),
+        "p99_ms": percentile(latencies, 0.99),
+        "rss_mb": rss_mb(),
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    regressions = []
+    for name, result in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        if result["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{name}: p95 {result['p95_ms']:.1f} ms vs baseline {previous['p95_ms']:.1f} ms")
+        if result["throughput"] < previous["throughput"] * (1 - tolerance):
+            regressions.append(f"{name}: {result['throughput']:.1f} req/s vs baseline {previous['throughput']:.1f} req/s")
+    if "peak_rss_mb" in baseline and results["peak_rss_mb"] > baseline["peak_rss_mb"] * (1 + tolerance):
+        regressions.append(f"peak RSS {results['peak_rss_mb']:.0f} MB vs baseline {baseline['peak_rss_mb']:.0f} MB")
+    return regressions
+
+
+async def run(args) -> dict:
+    import httpx
+    from ai_assistant import api
+    from ai_assistant.rags import warm_up
+
+    warm_up()
+    results = {"config": vars(args), "scenarios": {}}
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        for name, build in scenarios().items():
+            if args.scenarios and name not in args.scenarios:
+                continue
+            result = await run_scenario(client, build, args.clients, args.requests)
+            results["scenarios"][name] = result
+            print(
+                f"{name:>20}: {result['throughput']:7.1f} req/s  p50 {result['p50_ms']:7.1f}  "
+                f"p95 {result['p95_ms']:7.1f}  p99 {result['p99_ms']:7.1f} ms  "
+                f"RSS {result['rss_mb']:6.0f} MB  errors {result['errors']}"
+            )
+    results["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return results
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=50, help="requests per scenario")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="stub latency per LLM/embedding call")
+    parser.add_argument("--mode", choices=["direct", "agent"], default="direct", help="structured_mode of the app")
+    parser.add_argument("--scenarios", nargs="+", help=f"subset of: {', '.join(scenarios())}")
+    parser.add_argument("--response-cache", action="store_true", help="keep the recommendation response cache on")
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", help="compare against results saved with --output")
+    parser.add_argument("--tolerance", type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stub_environment(
+            tmp,
+            args.latency_ms,
+            structured_mode=args.mode,
+            response_cache_enabled=str(args.response_cache),
+            agent_pool_size=str(args.clients),
+            max_concurrent_agent_calls=str(args.clients),
+        )
+        print(f"{args.clients} clients, {args.requests} requests per scenario, stub latency {args.latency_ms:.0f} ms")
+        results = asyncio.run(run(args))
+    print(f"peak RSS {results['peak_rss_mb']:.0f} MB")
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"no regressions against {args.baseline} (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,61 @@
+"""
+Embedding throughput benchmark for guide ingestion.
+
+Embeds the chunks stored in the travel guide docstore with the configured
+HuggingFace model at several batch sizes and reports chunks/sec, then shows
+a rebuild served from a warm on-disk embedding cache.
+
+Usage: python -m benchmarks.embedding_batch [--batch-sizes 1 8 32 64] [--limit 256]
+"""
+import os
+import time
+import argparse
+import tempfile
+from llama_index.core.schema import TextNode
+from llama_index.core.storage.docstore import SimpleDocumentStore
+from ai_assistant.config import get_agent_settings
+from ai_assistant.embeddings import CachedEmbedder, EmbeddingCache
+from ai_assistant.rags import get_embed_model
+
+SETTINGS = get_agent_settings()
+
+
+def load_chunks(limit: int) -> list[str]:
+    docstore = SimpleDocumentStore.from_persist_path(
+        os.path.join(SETTINGS.travel_guide_store_path, "docstore.json")
+    )
+    return [node.get_content() for node in list(docstore.docs.values())[:limit]]
+
+
+def run(embedder: CachedEmbedder, texts: list[str]) -> float:
+    nodes = [TextNode(text=text) for text in texts]
+    start = time.perf_counter()
+    embedder(nodes)
+    return len(nodes) / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 8, 32, 64])
+    parser.add_argument("--limit", type=int, default=256, help="number of guide chunks to embed")
+    args = parser.parse_args()
+
+    texts = load_chunks(args.limit)
+    embed_model = get_embed_model()
+    print(f"{len(texts)} chunks, model {embed_model.model_name}")
+
+    for batch_size in args.batch_sizes:
+        embed_model.embed_batch_size = batch_size
+        rate = run(CachedEmbedder(embed_model=embed_model, batch_size=batch_size), texts)
+        print(f"batch size {batch_size:>4}: {rate:8.1f} chunks/s")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EmbeddingCache(os.path.join(tmp, "embeddings.sqlite"))
+        embedder = CachedEmbedder(embed_model=embed_model, cache=cache, batch_size=max(args.batch_sizes))
+        cold = run(embedder, texts)
+        warm = run(embedder, texts)
+        print(f"with embedding cache: cold {cold:8.1f} chunks/s, warm rebuild {warm:8.1f} chunks/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Load benchmark for the async recommendation endpoints.
+
+Drives `ai_assistant.api.app` in-process through httpx's ASGI transport with a
+StubLLM behind the agent pool, so the numbers reflect the API's own
+concurrency (limiter, pool, event loop) rather than network or model time.
+
+Usage: python -m benchmarks.load [--clients 1 10 100] [--requests 200] [--latency 0.2]
+"""
+import os
+import time
+import asyncio
+import argparse
+import statistics
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 100])
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    parser.add_argument("--latency", type=float, default=0.2, help="stub LLM latency in seconds")
+    parser.add_argument("--pool-size", type=int, default=32)
+    return parser.parse_args()
+
+
+async def run_level(client, clients: int, total: int) -> tuple[float, list[float]]:
+    latencies = []
+    queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(None)
+
+    async def worker():
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.get("/recommendations/hotels", params={"city": "Uyuni"})
+            response.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return time.perf_counter() - start, latencies
+
+
+async def main():
+    args = parse_args()
+    os.environ["AGENT_POOL_SIZE"] = str(args.pool_size)
+    os.environ["MAX_CONCURRENT_AGENT_CALLS"] = str(args.pool_size)
+
+    import httpx
+    from ai_assistant import api
+    from ai_assistant.agent import TravelAgent
+    from ai_assistant.pool import AgentPool
+    from ai_assistant.stubs import StubLLM
+
+    # Answers straight away: this benchmark measures the API, not the tools.
+    llm = StubLLM(latency=args.latency, use_tools=False)
+    pool = AgentPool(
+        factory=lambda: TravelAgent(llm=llm, verbose=False).get_agent(),
+        size=args.pool_size,
+        timeout=60,
+    )
+    api.get_agent_pool = lambda: pool
+
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        print(f"stub latency {args.latency * 1000:.0f} ms, pool size {args.pool_size}, {args.requests} requests per level")
+        for clients in args.clients:
+            elapsed, latencies = await run_level(client, clients, args.requests)
+            latencies.sort()
+            p95 = latencies[int(len(latencies) * 0.95) - 1]
+            print(
+                f"{clients:>4} clients: {len(latencies) / elapsed:8.1f} req/s  "
+                f"p50 {statistics.median(latencies) * 1000:7.1f} ms  p95 {p95 * 1000:7.1f} ms"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
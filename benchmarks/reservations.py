@@ -0,0 +1,93 @@
+"""
+Reservation query benchmark: one page of a filtered `GET /reservations`
+query served from the in-memory ReservationIndex against filtering the
+reservation store (`iter_reservations`, as /report/summary does).
+
+Writes `--reservations` random reservations to a JSON-Lines log in a
+temporary directory, builds the index from it, then times `--queries`
+random city/type/date-range queries both ways.
+
+Usage: python -m benchmarks.reservations [--reservations 100000] [--queries 200] [--limit 50]
+"""
+import os
+import time
+import random
+import argparse
+import tempfile
+from datetime import date, datetime, timedelta
+from itertools import islice
+from benchmarks.e2e import CITIES, percentile
+
+TYPES = ["TripReservation", "HotelReservation", "RestaurantReservation"]
+
+
+def random_reservation(rng: random.Random):
+    from ai_assistant.models import HotelReservation, RestaurantReservation, TripReservation
+
+    day = date(2024, 1, 1) + timedelta(days=rng.randrange(365))
+    city = rng.choice(CITIES)
+    kind = rng.choice(TYPES)
+    if kind == "TripReservation":
+        return TripReservation(trip_type="FLIGHT", date=day, departure="La Paz", destination=city, cost=rng.randrange(300, 900))
+    if kind == "HotelReservation":
+        return HotelReservation(
+            checkin_date=day, checkout_date=day + timedelta(days=2), hotel_name="Hotel", city=city, cost=rng.randrange(200, 800)
+        )
+    return RestaurantReservation(
+        reservation_time=datetime.combine(day, datetime.min.time()).replace(hour=20),
+        restaurant="Restaurante",
+        city=city,
+        dish="salteñas",
+        cost=rng.randrange(30, 200),
+    )
+
+
+def run(args):
+    from ai_assistant.reservation_index import ReservationIndex
+    from ai_assistant.storage import get_reservation_store
+    from ai_assistant.utils import iter_reservations
+
+    rng = random.Random(0)
+    store = get_reservation_store()
+    store.save_many([random_reservation(rng) for _ in range(args.reservations)])
+
+    start = time.perf_counter()
+    index = ReservationIndex(store)
+    index.refresh()
+    print(f"indexed {len(index)} reservations in {time.perf_counter() - start:.2f}s")
+
+    queries = []
+    for _ in range(args.queries):
+        first = date(2024, 1, 1) + timedelta(days=rng.randrange(300))
+        queries.append((rng.choice(TYPES + [None]), rng.choice(CITIES), first, first + timedelta(days=rng.randrange(7, 60))))
+
+    indexed, scanned = [], []
+    for reservation_type, city, start_date, end_date in queries:
+        start = time.perf_counter()
+        index.query(reservation_type, city, start_date, end_date, limit=args.limit)
+        indexed.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        list(islice(iter_reservations(None, reservation_type, city, start_date, end_date), args.limit))
+        scanned.append(time.perf_counter() - start)
+
+    indexed.sort()
+    scanned.sort()
+    print(f"{'':>8} {'p50 ms':>9} {'p95 ms':>9}")
+    print(f"{'index':>8} {percentile(indexed, 0.5):9.3f} {percentile(indexed, 0.95):9.3f}")
+    print(f"{'scan':>8} {percentile(scanned, 0.5):9.3f} {percentile(scanned, 0.95):9.3f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reservations", type=int, default=100_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=50, help="page size")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.update({"LOG_FILE": os.path.join(tmp, "trip.jsonl"), "RESERVATION_STORE": "jsonl"})
+        run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Direct mode benchmark: LLM calls and latency of the structured endpoints
+answered by the ReAct agent (`mode=agent`) against calling their tool
+directly (`mode=direct`).
+
+Runs the app in-process with the stub LLM and embeddings (see
+benchmarks.e2e), the response cache off, and `--latency-ms` per model call
+to stand in for a real provider. Each endpoint gets `--requests` sequential
+requests per mode; LLM calls and prompt tokens come from the requests'
+timing breakdown (`?timings=true`).
+
+Usage: python -m benchmarks.router [--requests 20] [--latency-ms 100]
+"""
+import asyncio
+import argparse
+import tempfile
+import statistics
+from benchmarks.e2e import CITIES, stub_environment
+
+ENDPOINTS = {
+    "cities": ("/recommendations/cities", lambda i: {"notes": ["salt flats", f"budget {i}"]}),
+    "hotels": ("/recommendations/hotels", lambda i: {"city": CITIES[i % len(CITIES)], "notes": ["quiet"]}),
+    "activities": ("/recommendations/activities", lambda i: {"city": CITIES[i % len(CITIES)]}),
+    "report": ("/report", lambda i: {}),
+}
+
+
+async def measure(client, url: str, params, mode: str, requests: int) -> dict:
+    latencies, llm_calls, prompt_tokens = [], [], []
+    for i in range(requests):
+        response = await client.get(url, params={**params(i), "mode": mode, "timings": "true"})
+        response.raise_for_status()
+        timings = response.json()["timings"]
+        latencies.append(timings["total_seconds"] * 1000)
+        llm_calls.append(timings["stages"].get("llm", {}).get("calls", 0))
+        prompt_tokens.append(timings.get("llm_tokens_prompt", 0))
+    return {
+        "p50_ms": statistics.median(latencies),
+        "llm_calls": statistics.mean(llm_calls),
+        "prompt_tokens": statistics.mean(prompt_tokens),
+    }
+
+
+async def run(args):
+    import httpx
+    from ai_assistant import api
+    from ai_assistant.rags import warm_up
+
+    warm_up()
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=None) as client:
+        # one reservation so the report has something to summarize
+        await client.post("/reservations/flight", params={"date": "2024-11-01", "departure": "La Paz", "destination": "Uyuni"})
+        print(f"{'endpoint':>10} {'mode':>6} {'p50 ms':>9} {'LLM calls':>10} {'prompt tokens':>14}")
+        for name, (url, params) in ENDPOINTS.items():
+            results = {}
+            for mode in ("agent", "direct"):
+                results[mode] = result = await measure(client, url, params, mode, args.requests)
+                print(f"{name:>10} {mode:>6} {result['p50_ms']:9.1f} {result['llm_calls']:10.1f} {result['prompt_tokens']:14.0f}")
+            agent, direct = results["agent"], results["direct"]
+            print(
+                f"{'':>10} {'saved':>6} {agent['p50_ms'] - direct['p50_ms']:9.1f} "
+                f"{agent['llm_calls'] - direct['llm_calls']:10.1f} {agent['prompt_tokens'] - direct['prompt_tokens']:14.0f}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20, help="requests per endpoint and mode")
+    parser.add_argument("--latency-ms", type=float, default=100.0, help="stub latency per LLM/embedding call")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        stub_environment(tmp, args.latency_ms, response_cache_enabled="false")
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
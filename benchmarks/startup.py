@@ -0,0 +1,89 @@
+"""
+Startup-time benchmark for the lazy RAG initialization.
+
+Each scenario runs in a fresh interpreter so module caches don't leak between
+measurements:
+
+- lazy import: `import ai_assistant.tools`, which is all reservation-only
+  code paths (and `from ai_assistant.tools import parse_date`) pay now.
+- eager: the same import followed by `rags.warm_up()`, i.e. what every import
+  paid before the embedder, LLM and index became lazy.
+
+With `--stub` both run against the stub LLM and embeddings (no model
+download), over the chunks of the persisted guide store re-indexed with the
+stub embeddings in a temporary store, so the eager scenario times loading
+the index without the HuggingFace model.
+
+Usage: python -m benchmarks.startup [--runs 3] [--skip-warm-up] [--stub]
+"""
+import os
+import sys
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+SCENARIOS = {
+    "lazy import": "import ai_assistant.tools",
+    "import + warm_up (eager)": "import ai_assistant.tools; from ai_assistant.rags import warm_up; warm_up()",
+}
+
+TIMER = """
+import time
+start = time.perf_counter()
+{code}
+print(time.perf_counter() - start)
+"""
+
+
+def measure(code: str, runs: int) -> list[float]:
+    timings = []
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, "-c", TIMER.format(code=code)],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        timings.append(float(result.stdout.strip().splitlines()[-1]))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--skip-warm-up", action="store_true", help="only time the lazy import")
+    parser.add_argument("--stub", action="store_true", help="use the stub LLM and embeddings")
+    args = parser.parse_args()
+
+    if not args.stub:
+        run(args)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        from benchmarks.e2e import stub_environment
+
+        stub_environment(tmp, 0)  # the scenarios' interpreters inherit the environment
+        source = os.path.abspath("travel_guide_store")
+        store_path = os.environ["TRAVEL_GUIDE_STORE_PATH"]
+        setup = f"from benchmarks.context_budget import build_store; print(build_store({source!r}, {store_path!r}))"
+        result = subprocess.run([sys.executable, "-c", setup], capture_output=True, text=True, check=True)
+        print(f"stub providers, {result.stdout.strip().splitlines()[-1]} guide chunks in {store_path}")
+        run(args)
+
+
+def run(args):
+    results = {}
+    for name, code in SCENARIOS.items():
+        if args.skip_warm_up and name != "lazy import":
+            continue
+        timings = measure(code, args.runs)
+        results[name] = statistics.median(timings)
+        print(f"{name:<28} median {results[name]:.3f}s  (runs: {', '.join(f'{t:.3f}' for t in timings)})")
+
+    if len(results) == 2:
+        lazy, eager = results.values()
+        print(f"startup saved by lazy initialization: {eager - lazy:.3f}s ({eager / lazy:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
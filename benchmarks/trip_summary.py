@@ -0,0 +1,127 @@
+"""
+Trip summary benchmark: full rescan of the reservation log against the
+maintained TripSummary aggregate.
+
+Writes a synthetic JSON-Lines log of `--reservations` records, then times:
+
+- rescan: the previous generate_trip_summary (read every record, parse every
+  date, regroup, build the report with `+=`).
+- aggregate cold: the first TripSummary.refresh() + render() on the log.
+- aggregate warm: one more reservation appended, then refresh() + render(),
+  i.e. what each report costs once the aggregate is maintained.
+
+Usage: python -m benchmarks.trip_summary [--reservations 100000] [--runs 5]
+"""
+import os
+import json
+import time
+import random
+import argparse
+import tempfile
+from datetime import date, datetime, timedelta
+from ai_assistant.reservation_log import ReservationLog, iter_records
+from ai_assistant.storage import JsonLinesStore
+from ai_assistant.summary import TripSummary, activity_line
+
+CITIES = ["La Paz", "Uyuni", "Sucre", "Potosí", "Cochabamba", "Santa Cruz", "Tarija", "Oruro", "Copacabana"]
+
+
+def make_record(rng: random.Random, start: date) -> dict:
+    day = start + timedelta(days=rng.randrange(365))
+    city = rng.choice(CITIES)
+    kind = rng.randrange(3)
+    if kind == 0:
+        return {
+            "trip_type": rng.choice(["FLIGHT", "BUS"]), "date": day.isoformat(),
+            "departure": rng.choice(CITIES), "destination": city, "cost": rng.randint(50, 700),
+            "reservation_type": "TripReservation",
+        }
+    if kind == 1:
+        return {
+            "checkin_date": day.isoformat(), "checkout_date": (day + timedelta(days=2)).isoformat(),
+            "hotel_name": f"Hotel {rng.randrange(500)}", "city": city, "cost": rng.randint(300, 1500),
+            "reservation_type": "HotelReservation",
+        }
+    return {
+        "reservation_time": datetime.combine(day, datetime.min.time()).replace(hour=20).isoformat(),
+        "restaurant": f"Restaurant {rng.randrange(500)}", "city": city, "dish": "salteñas",
+        "cost": rng.randint(20, 200), "reservation_type": "RestaurantReservation",
+    }
+
+
+def rescan_report(path: str) -> str:
+    organized_data = {}
+    for entry in iter_records(path):
+        city = entry.get("destination") if entry.get("trip_type") in ["FLIGHT", "BUS"] else entry.get("city")
+        date_str = entry.get("date") or entry.get("checkin_date") or entry.get("reservation_time")
+        if not city or not date_str:
+            continue
+        formatted_date = datetime.fromisoformat(date_str.split("T")[0]).strftime("%Y-%m-%d")
+        organized_data.setdefault(city, {}).setdefault(formatted_date, []).append(entry)
+
+    report = "Trip Summary Report:\n"
+    total_cost = 0
+    for city, dates in organized_data.items():
+        report += f"\nCity: {city}\n"
+        for day, activities in dates.items():
+            report += f"  Date: {day}\n"
+            for activity in activities:
+                report += activity_line(activity) + "\n"
+                total_cost += activity.get("cost", 0)
+    report += f"\nTotal Trip Cost: {total_cost} Bs.\n"
+    return report
+
+
+def best_of(runs: int, fn) -> float:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reservations", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    start = date(2024, 1, 1)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "trip.jsonl")
+        with open(path, "w", encoding="utf-8") as file:
+            for _ in range(args.reservations):
+                file.write(json.dumps(make_record(rng, start), ensure_ascii=False) + "\n")
+        log = ReservationLog(path)
+
+        rescan = best_of(args.runs, lambda: rescan_report(path))
+
+        def cold():
+            summary = TripSummary(JsonLinesStore(path))
+            summary.refresh()
+            summary.render()
+
+        cold_time = best_of(args.runs, cold)
+
+        summary = TripSummary(JsonLinesStore(path))
+        summary.refresh()
+
+        def warm():
+            log.append(make_record(rng, start))
+            summary.refresh()
+            summary.render()
+
+        warm_time = best_of(args.runs, warm)
+        assert summary.render() == rescan_report(path)
+        log.close()
+
+    print(f"{args.reservations} reservations")
+    print(f"{'rescan':>16}: {rescan * 1000:9.1f} ms")
+    print(f"{'aggregate cold':>16}: {cold_time * 1000:9.1f} ms")
+    print(f"{'aggregate warm':>16}: {warm_time * 1000:9.1f} ms (refresh after one booking + render)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Vector store benchmark: llama-index's JSON SimpleVectorStore against the
+memory-mapped NumpyVectorStore.
+
+Builds both stores from the same synthetic normalized vectors, then loads each
+one in a fresh interpreter and reports file size, load time, the p50/p95 of
+top-k queries and the resident memory the load and queries added, split into
+private (anonymous) pages, which every worker process pays for, and
+file-backed pages, which the page cache shares between workers mapping the
+same file. `--workers` totals both for that many API workers. Reads
+/proc/self/status, so Linux only.
+
+Usage: python -m benchmarks.vector_store [--vectors 20000] [--dim 768] [--queries 200] [--workers 4]
+"""
+import os
+import sys
+import json
+import argparse
+import tempfile
+import subprocess
+import numpy as np
+from llama_index.core.schema import TextNode
+from llama_index.core.vector_stores import SimpleVectorStore
+from ai_assistant.vector_store import NumpyVectorStore
+
+LOADERS = {
+    "simple (json)": "from llama_index.core.vector_stores import SimpleVectorStore as Store; "
+    "store = Store.from_persist_path({path!r})",
+    "numpy (mmap)": "from ai_assistant.vector_store import NumpyVectorStore as Store; "
+    "store = Store.from_persist_path({path!r})",
+}
+
+PROBE = """
+import json, time
+import numpy as np
+from llama_index.core.vector_stores.types import VectorStoreQuery
+
+def rss():
+    with open("/proc/self/status") as status:
+        fields = dict(line.split(":", 1) for line in status)
+    return {{kind: int(fields[kind].split()[0]) / 1024 for kind in ("RssAnon", "RssFile")}}
+
+before = rss()
+start = time.perf_counter()
+{loader}
+load = time.perf_counter() - start
+queries = np.load({queries!r})
+timings = []
+for vector in queries:
+    start = time.perf_counter()
+    store.query(VectorStoreQuery(query_embedding=vector.tolist(), similarity_top_k={top_k}))
+    timings.append(time.perf_counter() - start)
+after = rss()
+print(json.dumps({{"load": load, "private_mb": after["RssAnon"] - before["RssAnon"],
+                  "shared_mb": after["RssFile"] - before["RssFile"], "timings": timings}}))
+"""
+
+
+def build(tmp: str, vectors: np.ndarray) -> dict[str, str]:
+    nodes = [TextNode(id_=f"node-{i}", text="", embedding=vector.tolist()) for i, vector in enumerate(vectors)]
+    paths = {
+        "simple (json)": os.path.join(tmp, "simple", "default__vector_store.json"),
+        "numpy (mmap)": os.path.join(tmp, "numpy", "default__vector_store.json"),
+    }
+    simple = SimpleVectorStore()
+    simple.add(nodes)
+    simple.persist(paths["simple (json)"])
+    compact = NumpyVectorStore()
+    compact.add(nodes)
+    compact.persist(paths["numpy (mmap)"])
+    return paths
+
+
+def disk_size(path: str) -> int:
+    base = os.path.splitext(path)[0]
+    candidates = [path, base + ".npy", base + ".meta.json"]
+    return sum(os.path.getsize(p) for p in candidates if os.path.exists(p))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vectors", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=2)
+    parser.add_argument("--workers", type=int, default=4, help="API worker processes to total the memory for")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((args.vectors, args.dim)).astype(np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = build(tmp, vectors)
+        queries_path = os.path.join(tmp, "queries.npy")
+        np.save(queries_path, rng.standard_normal((args.queries, args.dim)).astype(np.float32))
+
+        print(f"{args.vectors} vectors x {args.dim} dims, {args.queries} queries (top {args.top_k})")
+        for name, path in paths.items():
+            code = PROBE.format(
+                loader=LOADERS[name].format(path=path), queries=queries_path, top_k=args.top_k
+            )
+            result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+            stats = json.loads(result.stdout.strip().splitlines()[-1])
+            timings = sorted(stats["timings"])
+            p50 = timings[len(timings) // 2] * 1000
+            p95 = timings[int(len(timings) * 0.95)] * 1000
+            private, shared = stats["private_mb"], stats["shared_mb"]
+            print(
+                f"{name:>14}: {disk_size(path) / 2**20:7.1f} MB on disk, load {stats['load']:6.2f}s, "
+                f"query p50 {p50:7.2f} ms, p95 {p95:7.2f} ms, +RSS {private:7.1f} MB private "
+                f"{shared:7.1f} MB file-backed, {args.workers} workers {private * args.workers + shared:7.1f} MB"
+            )
+
+
+if __name__ == "__main__":
+    main()
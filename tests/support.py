@@ -0,0 +1,53 @@
+"""
+Settings for the test suite: stub models, a two-city travel guide and a
+throwaway trip log, SQLite database, guide store and snapshot. Import it
+before anything from ai_assistant, which reads its settings once, on first
+import.
+"""
+import os
+import atexit
+import shutil
+import tempfile
+
+TMP = tempfile.mkdtemp(prefix="ai_assistant_tests_")
+atexit.register(shutil.rmtree, TMP, ignore_errors=True)
+
+GUIDE = {
+    "sucre.txt": "Sucre is the constitutional capital of Bolivia. Hotel Parador Santa María la Real is a quiet "
+    "colonial hotel near the main square, and the Casa de la Libertad museum is a short walk away.",
+    "uyuni.txt": "Uyuni is the gateway to the Salar de Uyuni salt flats. Tours leave every morning and the "
+    "Palacio de Sal hotel is built entirely from salt blocks.",
+}
+os.makedirs(os.path.join(TMP, "guide"))
+for name, text in GUIDE.items():
+    with open(os.path.join(TMP, "guide", name), "w", encoding="utf-8") as file:
+        file.write(text)
+
+os.environ.update({
+    "LLM_PROVIDER": "stub",
+    "EMBED_PROVIDER": "stub",
+    "WARM_UP_ON_STARTUP": "false",
+    "TRAVEL_GUIDE_DATA_PATH": os.path.join(TMP, "guide"),
+    "TRAVEL_GUIDE_STORE_PATH": os.path.join(TMP, "store"),
+    "EMBEDDING_CACHE_PATH": os.path.join(TMP, "embeddings.sqlite"),
+    "LOG_FILE": os.path.join(TMP, "trip.jsonl"),
+    "SQLITE_PATH": os.path.join(TMP, "trip.sqlite"),
+    "SNAPSHOT_PATH": os.path.join(TMP, "snapshot.json"),
+})
+
+
+def use_store(test, name: str):
+    """Point the app at the `name` reservation store for the duration of `test`."""
+    from unittest import mock
+    from ai_assistant.config import get_agent_settings
+    from ai_assistant.reservation_index import get_reservation_index
+    from ai_assistant.storage import get_reservation_store
+    from ai_assistant.summary import get_trip_summary
+
+    patcher = mock.patch.object(get_agent_settings(), "reservation_store", name)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+    for singleton in (get_reservation_store, get_trip_summary, get_reservation_index):
+        singleton.cache_clear()
+        test.addCleanup(singleton.cache_clear)
+    return get_reservation_store()
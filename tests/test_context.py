@@ -0,0 +1,33 @@
+import support  # noqa: F401 (settings, before ai_assistant is imported)
+import unittest
+from llama_index.core.schema import NodeWithScore, TextNode
+from llama_index.core.utils import get_tokenizer
+from ai_assistant.context import ContextBudgetPostprocessor
+
+# a table pasted from a PDF: one long unpunctuated "sentence"
+TABLE = " ".join(f"Hotel {i} Sucre 3 estrellas 250 Bs" for i in range(40))
+
+
+def nodes(*texts: str) -> list[NodeWithScore]:
+    return [NodeWithScore(node=TextNode(text=text), score=1.0 - rank / 10) for rank, text in enumerate(texts)]
+
+
+class ContextBudgetTest(unittest.TestCase):
+    def test_sentence_longer_than_the_budget_is_cut(self):
+        kept, report = ContextBudgetPostprocessor(token_budget=50).compress(nodes(TABLE), "recommend hotels in Sucre")
+        (node,) = kept
+        self.assertTrue(TABLE.startswith(node.node.get_content()))
+        self.assertEqual(report.tokens_after, len(get_tokenizer()(node.node.get_content())))
+        self.assertTrue(0 < report.tokens_after <= 50)
+
+    def test_lower_ranked_chunks_stop_at_the_budget(self):
+        first = "Sucre has colonial hotels. The Parador hotel is quiet."
+        kept, report = ContextBudgetPostprocessor(token_budget=30).compress(nodes(first, TABLE, "Sucre has a new boutique hotel."), "hotels in Sucre")
+        top, cut = [node.node.get_content() for node in kept]
+        self.assertEqual(top, first)
+        self.assertTrue(cut and TABLE.startswith(cut))
+        self.assertTrue(0 < report.tokens_after <= 30)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,41 @@
+import support  # noqa: F401 (settings, before ai_assistant is imported)
+import unittest
+from datetime import date, datetime
+from ai_assistant.dates import DateParser, parse_date, parse_dates, parse_datetimes
+from ai_assistant.models import HotelLeg, RestaurantLeg
+from ai_assistant.tools import build_reservations
+
+
+class DateParserTest(unittest.TestCase):
+    def test_every_format(self):
+        for value in ("05/12/2024", "12-05-2024", "2024/12/05", "2024-12-05"):
+            with self.subTest(value=value):
+                self.assertEqual(parse_date(value), date(2024, 12, 5))
+        self.assertEqual(
+            parse_datetimes(["05/12/2024 20:30", "2024-12-05T20:30:00", "05/12/2024 20:30"]),
+            [datetime(2024, 12, 5, 20, 30), datetime(2024, 12, 5, 20, 30), datetime(2024, 12, 5, 20, 30)],
+        )
+
+    def test_batches_do_not_share_format_memory(self):
+        first, second = DateParser(), DateParser()
+        first.parse_dates(["05/12/2024"])
+        self.assertEqual(second.parse_dates(["2024-12-06"]), [date(2024, 12, 6)])
+        self.assertEqual((first._last_date, second._last_date), ("%d/%m/%Y", "%Y-%m-%d"))
+
+    def test_invalid(self):
+        for value in ("2024-02-31", "31/12/24", "tomorrow"):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                parse_dates([value])
+
+    def test_build_reservations_parses_every_leg(self):
+        legs = [
+            HotelLeg(type="hotel", checkin_date="05/12/2024", checkout_date="2024-12-08", hotel_name="Parador", city="Sucre"),
+            RestaurantLeg(type="restaurant", reservation_time="05/12/2024 20:30", restaurant="Nativa", city="Sucre"),
+        ]
+        hotel, restaurant = build_reservations(legs)
+        self.assertEqual((hotel.checkin_date, hotel.checkout_date), (date(2024, 12, 5), date(2024, 12, 8)))
+        self.assertEqual(restaurant.reservation_time, datetime(2024, 12, 5, 20, 30))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,47 @@
+import support  # noqa: F401 (settings, before ai_assistant is imported)
+import json
+import unittest
+import httpx
+from ai_assistant.api import app
+
+
+def parse_events(body: str) -> list[tuple[str, object]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+class DirectStreamTest(unittest.IsolatedAsyncioTestCase):
+    async def get(self, **params) -> httpx.Response:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.get("/recommendations/hotels", params={"city": "Sucre", "mode": "direct", **params})
+
+    async def test_tokens_are_streamed_as_synthesized(self):
+        answer = (await self.get(notes=["streamed"])).json()["agent_response"]
+        response = await self.get(notes=["streamed"], stream="true", timings="true")
+        events = parse_events(response.text)
+
+        self.assertEqual((events[0][0], events[0][1]["tool"]), ("tool", "travel_guide"))
+        self.assertEqual(events[-1][0], "done")
+        self.assertIn("direct", events[-1][1]["timings"]["stages"])
+        tokens = [data for event, data in events if event == "token"]
+        self.assertGreater(len(tokens), 1)
+        self.assertEqual("".join(tokens), answer)
+        self.assertEqual(len(events[-1][1]["timings"]["context"]), 1)
+
+    async def test_timings_report_the_context_of_each_synthesis(self):
+        timings = (await self.get(notes=["quiet"], timings="true")).json()["timings"]
+        (report,) = timings["context"]
+        self.assertEqual(
+            set(report), {"chunks_before", "chunks_after", "tokens_before", "tokens_after"}
+        )
+        self.assertGreaterEqual(report["chunks_before"], report["chunks_after"])
+        self.assertGreaterEqual(report["tokens_before"], report["tokens_after"])
+        self.assertEqual(timings["context_tokens_kept"], report["tokens_after"])
+
+
+if __name__ == "__main__":
+    unittest.main()
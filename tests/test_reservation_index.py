@@ -0,0 +1,81 @@
+import support  # noqa: F401 (settings, before ai_assistant is imported)
+import unittest
+from datetime import date, timedelta
+import httpx
+from ai_assistant.api import app
+from ai_assistant.cities import normalize_city
+from ai_assistant.models import HotelReservation, TripReservation
+from ai_assistant.reservation_index import DateIndex, ReservationIndex, get_reservation_index
+from ai_assistant.storage import record_city, record_date
+from ai_assistant.utils import save_reservation, save_reservations
+
+TRIPS = [TripReservation(trip_type="FLIGHT", date=date(2024, 11, 2), departure="La Paz", destination="Uyuni", cost=400)]
+
+
+class DateIndexTest(unittest.TestCase):
+    def test_cost_after_out_of_order_inserts(self):
+        index, booked = DateIndex(), []
+        days = ["2024-03-01", "2024-03-05", "2024-01-10", "", "2024-03-05", "2024-12-31", "2024-02-01"]
+        for position, day in enumerate(days):
+            index.add((day, position), 10 * position + 1)
+            booked.append(((day, position), 10 * position + 1))
+            costs = [cost for _, cost in sorted(booked)]
+            for lo in range(len(costs) + 1):
+                for hi in range(lo, len(costs) + 1):
+                    self.assertEqual(index.cost(lo, hi), sum(costs[lo:hi]), (position, lo, hi))
+
+
+class ReservationIndexTest:
+    """Incremental and cold-built indexes agree with the store, on each reservation store."""
+
+    store_name: str
+
+    def setUp(self):
+        self.store = support.use_store(self, self.store_name)
+
+    def expected(self, start: str, end: str) -> list[dict]:
+        records = [r for r in self.store.iter_records() if normalize_city(record_city(r)) == "uyuni"]
+        return sorted((r for r in records if start <= record_date(r) <= end), key=record_date)
+
+    def test_follows_new_bookings(self):
+        index = ReservationIndex(self.store)
+        first = date(2024, 12, 10)
+        for offset in (5, 1, 3, 0):
+            self.store.save_many([
+                TripReservation(trip_type="BUS", date=first + timedelta(days=offset), departure="Potosí", destination="Uyuni", cost=50 + offset),
+                HotelReservation(
+                    checkin_date=first + timedelta(days=offset),
+                    checkout_date=first + timedelta(days=offset + 1),
+                    hotel_name="Palacio de Sal",
+                    city="Uyuni",
+                    cost=300 + offset,
+                ),
+            ])
+            index.refresh()
+            expected = self.expected("2024-12-11", "2024-12-14")
+            for built in (index, ReservationIndex(self.store)):
+                built.refresh()
+                page = built.query(city="uyuni", start_date=first + timedelta(days=1), end_date=first + timedelta(days=4), limit=500)
+                self.assertEqual(page.reservations, expected)
+                self.assertEqual((page.count, page.total_cost), (len(expected), sum(r["cost"] for r in expected)))
+
+    async def test_built_by_its_first_read(self):
+        save_reservations(TRIPS)
+        self.assertFalse(get_reservation_index().built)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/reservations", params={"city": "uyuni", "limit": 500})
+        self.assertEqual(response.json()["reservations"], self.expected("", "9999"))
+        save_reservation(TRIPS[0])
+        self.assertEqual(len(get_reservation_index()), len(list(self.store.iter_records())))
+
+
+class JsonLinesReservationIndexTest(ReservationIndexTest, unittest.IsolatedAsyncioTestCase):
+    store_name = "jsonl"
+
+
+class SQLiteReservationIndexTest(ReservationIndexTest, unittest.IsolatedAsyncioTestCase):
+    store_name = "sqlite"
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,88 @@
+import support  # noqa: F401 (settings, before ai_assistant is imported)
+import io
+import os
+import json
+import time
+import tempfile
+import unittest
+from unittest import mock
+from ai_assistant.reservation_log import ReservationLog, iter_json_array, iter_records, read_from
+
+ARRAYS = [
+    "[]",
+    "[2.5]",
+    "[1, -2.25e3, 3]",
+    '[{"cost": 120, "city": "Potosí"}, 7, "a, ]", [1, [2]], true, null]',
+    ' \n [ 10 ,\n 200.75 ] \n',
+]
+
+
+class IterJsonArrayTest(unittest.TestCase):
+    def test_every_chunk_size(self):
+        for text in ARRAYS:
+            for chunk_size in range(1, len(text) + 2):
+                with self.subTest(text=text, chunk_size=chunk_size):
+                    self.assertEqual(list(iter_json_array(io.StringIO(text), chunk_size)), json.loads(text))
+
+    def test_errors(self):
+        for text in ("[1, 2", '{"a": 1}', "[1 2]"):
+            for chunk_size in (1, 3, 1 << 16):
+                with self.subTest(text=text, chunk_size=chunk_size), self.assertRaises(ValueError):
+                    list(iter_json_array(io.StringIO(text), chunk_size))
+
+
+class TornLineTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, "trip.jsonl")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, text: str, mode: str = "w"):
+        with open(self.path, mode, encoding="utf-8") as file:
+            file.write(text)
+
+    def test_iter_records_skips_torn_and_corrupt_lines(self):
+        self.write('{"cost": 1}\n\nnot json\n{"cost": 2}\n{"cost": ')
+        self.assertEqual(list(iter_records(self.path)), [{"cost": 1}, {"cost": 2}])
+
+    def test_read_from_waits_for_the_rest_of_a_torn_line(self):
+        self.write('{"cost": 1}\n{"cost": ')
+        records, cursor, restarted = read_from(self.path)
+        self.assertEqual((records, restarted), ([{"cost": 1}], True))
+
+        self.write('2}\n{"cost": 3}\n', mode="a")
+        records, cursor, restarted = read_from(self.path, cursor)
+        self.assertEqual((records, restarted), ([{"cost": 2}, {"cost": 3}], False))
+        self.assertEqual(read_from(self.path, cursor)[0], [])
+
+    def test_legacy_array(self):
+        self.write('[{"cost": 1}, {"cost": 2.5}]')
+        self.assertEqual(list(iter_records(self.path)), [{"cost": 1}, {"cost": 2.5}])
+        self.assertEqual(read_from(self.path), ([{"cost": 1}, {"cost": 2.5}], None, True))
+
+
+class FsyncTest(unittest.TestCase):
+    def test_interval_bounds_unsynced_appends(self):
+        with tempfile.TemporaryDirectory() as tmp, mock.patch("ai_assistant.reservation_log.os.fsync") as fsync:
+            log = ReservationLog(os.path.join(tmp, "trip.jsonl"), fsync_batch=100, fsync_interval=0.05)
+            log.append({"cost": 1})
+            self.assertEqual(fsync.call_count, 0)
+            time.sleep(0.3)
+            self.assertEqual(fsync.call_count, 1)
+            log.close()
+            self.assertEqual(list(log), [{"cost": 1}])
+
+    def test_batch(self):
+        with tempfile.TemporaryDirectory() as tmp, mock.patch("ai_assistant.reservation_log.os.fsync") as fsync:
+            log = ReservationLog(os.path.join(tmp, "trip.jsonl"), fsync_batch=3, fsync_interval=60)
+            log.append_many([{"cost": 1}, {"cost": 2}])
+            self.assertEqual(fsync.call_count, 0)
+            log.append({"cost": 3})
+            self.assertEqual(fsync.call_count, 1)
+            log.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
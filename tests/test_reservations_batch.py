@@ -0,0 +1,94 @@
+import support  # noqa: F401 (settings, before ai_assistant is imported)
+import os
+import unittest
+from unittest import mock
+import httpx
+from ai_assistant.api import app
+from ai_assistant.config import get_agent_settings
+from ai_assistant.tables import HotelReservationTable
+from ai_assistant.tools import reserve_itinerary
+
+SETTINGS = get_agent_settings()
+
+LEGS = [
+    {"type": "flight", "date": "2024-12-05", "departure": "La Paz", "destination": "Sucre"},
+    {"type": "hotel", "checkin_date": "2024-12-05", "checkout_date": "2024-12-08", "hotel_name": "Parador", "city": "Sucre"},
+    {"type": "restaurant", "reservation_time": "2024-12-06T20:00:00", "restaurant": "Nativa", "city": "Sucre"},
+]
+BAD_LEG = {"type": "hotel", "checkin_date": "2024-02-31", "checkout_date": "2024-03-02", "hotel_name": "Parador", "city": "Sucre"}
+
+
+class BatchTest:
+    """All-or-nothing batch bookings, run against each reservation store."""
+
+    store_name: str
+
+    def setUp(self):
+        self.store = support.use_store(self, self.store_name)
+
+    def stored(self) -> list[dict]:
+        return list(self.store.iter_records())
+
+    async def post_batch(self, legs: list[dict]) -> httpx.Response:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/reservations/batch", json={"reservations": legs})
+
+    async def test_batch_books_every_leg(self):
+        before = self.stored()
+        response = await self.post_batch(LEGS)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()["reservations"]), len(LEGS))
+        self.assertEqual(len(self.stored()), len(before) + len(LEGS))
+
+    async def test_bad_leg_is_422_and_books_nothing(self):
+        before = self.stored()
+        response = await self.post_batch(LEGS + [BAD_LEG])
+        self.assertEqual(response.status_code, 422)
+        self.assertIn("Leg 4 (hotel)", response.json()["detail"])
+        self.assertEqual(self.stored(), before)
+
+    def test_itinerary_with_a_bad_leg_books_nothing(self):
+        before = self.stored()
+        with self.assertRaises(ValueError):
+            reserve_itinerary([BAD_LEG] + LEGS)
+        self.assertEqual(self.stored(), before)
+
+
+class JsonLinesBatchTest(BatchTest, unittest.IsolatedAsyncioTestCase):
+    store_name = "jsonl"
+
+    def test_failed_write_is_truncated_back(self):
+        reserve_itinerary(LEGS[:1])
+        before, size = self.stored(), os.path.getsize(SETTINGS.log_file)
+        write = os.write
+
+        def torn_write(fd, data):
+            write(fd, data[: len(data) // 2])
+            raise OSError("disk full")
+
+        with mock.patch("ai_assistant.reservation_log.os.write", torn_write), self.assertRaises(OSError):
+            reserve_itinerary(LEGS)
+        self.assertEqual(os.path.getsize(SETTINGS.log_file), size)
+        self.assertEqual(self.stored(), before)
+
+
+class SQLiteBatchTest(BatchTest, unittest.IsolatedAsyncioTestCase):
+    store_name = "sqlite"
+
+    def test_failed_insert_rolls_back_the_transaction(self):
+        before = self.stored()
+        # The flight insert runs first and succeeds; the hotel one then fails.
+        HotelReservationTable.raw(
+            "CREATE TRIGGER fail_hotel BEFORE INSERT ON hotel_reservation BEGIN SELECT RAISE(ABORT, 'disk full'); END;"
+        ).run_sync()
+        try:
+            with self.assertRaises(Exception):
+                reserve_itinerary(LEGS[:2])
+        finally:
+            HotelReservationTable.raw("DROP TRIGGER fail_hotel;").run_sync()
+        self.assertEqual(self.stored(), before)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,20 @@
+import support  # noqa: F401 (settings, before ai_assistant is imported)
+import unittest
+from ai_assistant.cache import ResponseCache
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def test_modes_are_cached_apart(self):
+        cache = ResponseCache(max_entries=10, ttl=60, similarity_threshold=0.5, embed=lambda text: [1.0, 0.0])
+        cache.put("hotels", "Sucre", ["quiet"], "agent", "the agent's answer")
+        self.assertEqual(cache.get("hotels", "sucre", ["Quiet"], "agent"), "the agent's answer")
+        # neither the exact nor the semantic tier crosses modes
+        self.assertIsNone(cache.get("hotels", "Sucre", ["quiet"], "direct"))
+        self.assertIsNone(cache.get("hotels", "Sucre", ["calm"], "direct"))
+        cache.put("hotels", "Sucre", ["quiet"], "direct", "the guide's answer")
+        self.assertEqual(cache.get("hotels", "Sucre", ["quiet"], "direct"), "the guide's answer")
+        self.assertEqual(cache.get("hotels", "Sucre", ["calm"], "agent"), "the agent's answer")
+
+
+if __name__ == "__main__":
+    unittest.main()
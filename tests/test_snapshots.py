@@ -0,0 +1,66 @@
+import support  # noqa: F401 (settings, before ai_assistant is imported)
+import os
+import json
+import time
+import tempfile
+import threading
+import unittest
+from unittest import mock
+from llama_index.core.query_engine import RetrieverQueryEngine
+from ai_assistant.prompts import travel_guide_qa_tpl
+from ai_assistant.rags import TravelGuideRAG
+from ai_assistant.snapshots import Snapshot, SnapshotStore
+
+
+class SnapshotStoreTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.rag = TravelGuideRAG(
+            store_path=os.path.join(self.tmp.name, "store"),
+            data_dir=os.path.join(support.TMP, "guide"),
+            qa_prompt_tpl=travel_guide_qa_tpl,
+        )
+        self.path = os.path.join(self.tmp.name, "snapshot.json")
+        self.snapshots = SnapshotStore(self.path, self.rag, workers=4)
+        self.assertTrue(await self.snapshots.refresh())
+
+    def touch_store(self):
+        # what a re-ingest by another process looks like from here
+        docstore = os.path.join(self.rag.store_path, "docstore.json")
+        stat = os.stat(docstore)
+        os.utime(docstore, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    async def test_serves_until_the_store_changes(self):
+        self.assertIsNotNone(self.snapshots.get("hotels", "Sucre"))
+        self.touch_store()
+        self.assertIsNone(self.snapshots.get("hotels", "Sucre"))
+        # same content: refresh only re-verifies the snapshot
+        self.assertFalse(await self.snapshots.refresh())
+        self.assertIsNotNone(self.snapshots.get("hotels", "sucre"))
+
+    async def test_load_checks_the_content_hash(self):
+        self.assertIsNotNone(SnapshotStore(self.path, self.rag, workers=4).get("hotels", "Sucre"))
+        with open(self.path, encoding="utf-8") as file:
+            saved = json.load(file)
+        Snapshot("another store", saved["recommendations"], time.time()).save(self.path)
+        reloaded = SnapshotStore(self.path, self.rag, workers=4)
+        self.assertIsNone(reloaded.snapshot)
+        self.assertIsNone(reloaded.get("hotels", "Sucre"))
+
+    async def test_retrieves_off_the_event_loop(self):
+        retrieve = RetrieverQueryEngine.retrieve
+        threads = []
+
+        def recording(engine, query_bundle):
+            threads.append(threading.current_thread())
+            return retrieve(engine, query_bundle)
+
+        with mock.patch.object(RetrieverQueryEngine, "retrieve", recording):
+            self.assertTrue(await self.snapshots.refresh(force=True))
+        self.assertTrue(threads)
+        self.assertNotIn(threading.current_thread(), threads)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import support  # noqa: F401 (settings, before ai_assistant is imported)
+import os
+import json
+import tempfile
+import unittest
+from datetime import date
+import httpx
+from ai_assistant.api import app
+from ai_assistant.cities import normalize_city
+from ai_assistant.models import HotelReservation, TripReservation
+from ai_assistant.storage import JsonLinesStore, SQLiteStore, import_log, record_city, to_record
+from ai_assistant.summary import get_trip_summary
+from ai_assistant.utils import save_reservation, save_reservations
+
+RESERVATIONS = [
+    TripReservation(trip_type="BUS", date=date(2024, 12, 10), departure="Potosí", destination="Uyuni", cost=80),
+    HotelReservation(
+        checkin_date=date(2024, 12, 10), checkout_date=date(2024, 12, 12), hotel_name="Palacio de Sal", city="UYUNI", cost=300
+    ),
+    TripReservation(trip_type="FLIGHT", date=date(2024, 12, 12), departure="Uyuni", destination="Potosí", cost=150),
+]
+
+
+class CityFilterTest:
+    """Cities match ignoring case and accents, on each reservation store."""
+
+    store_name: str
+
+    def setUp(self):
+        self.store = support.use_store(self, self.store_name)
+        self.store.save_many(RESERVATIONS)
+
+    def expected(self, city: str) -> list[dict]:
+        return [r for r in self.store.iter_records() if normalize_city(record_city(r)) == normalize_city(city)]
+
+    def test_iter_records(self):
+        for city in ("uyuni", "Uyuni", "POTOSI", "potosí"):
+            with self.subTest(city=city):
+                records = list(self.store.iter_records(city=city))
+                self.assertTrue(records)
+                self.assertEqual(records, self.expected(city))
+        hotels = list(self.store.iter_records("HotelReservation", city="uyuni"))
+        self.assertEqual(hotels, [r for r in self.expected("uyuni") if r["reservation_type"] == "HotelReservation"])
+
+    async def test_report_summary(self):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/report/summary", params={"city": "uyuni"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response.json()["total_cost"], sum(record["cost"] for record in self.expected("uyuni"))
+        )
+
+
+class JsonLinesCityFilterTest(CityFilterTest, unittest.IsolatedAsyncioTestCase):
+    store_name = "jsonl"
+
+
+class SQLiteCityFilterTest(CityFilterTest, unittest.IsolatedAsyncioTestCase):
+    store_name = "sqlite"
+
+
+class SQLiteBatchedReadTest(unittest.TestCase):
+    def test_batches_resume_in_order(self):
+        SQLiteStore().save_many(RESERVATIONS * 3)
+        everything = list(SQLiteStore(batch_size=10**6).iter_records())
+        for batch_size in (1, 2, 5):
+            with self.subTest(batch_size=batch_size):
+                store = SQLiteStore(batch_size=batch_size)
+                self.assertEqual(list(store.iter_records()), everything)
+                self.assertEqual(store.records_since().records, everything)
+                self.assertEqual(
+                    list(store.iter_records("TripReservation", city="uyuni")),
+                    [r for r in everything if r["reservation_type"] == "TripReservation" and r["destination"] == "Uyuni"],
+                )
+
+
+class SummaryBuildTest(unittest.IsolatedAsyncioTestCase):
+    async def test_built_by_its_first_read(self):
+        store = support.use_store(self, "jsonl")
+        save_reservations(RESERVATIONS)
+        self.assertFalse(get_trip_summary().built)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/report/summary")
+        self.assertEqual(response.json()["reservations"], len(list(store.iter_records())))
+        # built: bookings now keep it current
+        save_reservation(RESERVATIONS[0])
+        self.assertEqual(get_trip_summary().as_dict()["reservations"], len(list(store.iter_records())))
+
+
+class LogImportTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmp.name, name)
+
+    def test_stores_write_their_own_log(self):
+        store = JsonLinesStore(self.path("other.jsonl"))
+        store.save_many(RESERVATIONS)
+        self.assertEqual(list(store.iter_records()), [to_record(reservation) for reservation in RESERVATIONS])
+        self.assertEqual(store.records_since().records, list(store.iter_records()))
+
+    def test_import_untyped_records_in_one_write(self):
+        # an older log: records without `reservation_type`
+        records = [{k: v for k, v in to_record(reservation).items() if k != "reservation_type"} for reservation in RESERVATIONS]
+        with open(self.path("old.jsonl"), "w", encoding="utf-8") as file:
+            file.writelines(json.dumps(record) + "\n" for record in records)
+        target = JsonLinesStore(self.path("imported.jsonl"))
+        self.assertEqual(import_log(self.path("old.jsonl"), target), len(RESERVATIONS))
+        self.assertEqual(list(target.iter_records()), [to_record(reservation) for reservation in RESERVATIONS])
+
+    def test_failed_import_stores_nothing(self):
+        with open(self.path("bad.jsonl"), "w", encoding="utf-8") as file:
+            file.write(json.dumps(to_record(RESERVATIONS[0])) + "\n" + json.dumps({"trip_type": "BUS"}) + "\n")
+        target = JsonLinesStore(self.path("imported.jsonl"))
+        with self.assertRaises(ValueError):
+            import_log(self.path("bad.jsonl"), target)
+        self.assertEqual(list(target.iter_records()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()